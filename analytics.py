@@ -0,0 +1,270 @@
+import numpy as np
+import pandas as pd
+from tracing import traced
+
+# Label format of each supported period, matching the chart axes
+PERIOD_FORMATS = {
+    "daily": "%Y-%m-%d",
+    "weekly": "%Y-%U",
+    "monthly": "%Y-%m",
+    "yearly": "%Y",
+}
+
+def _period_start(dates: pd.Series, period: str) -> np.ndarray:
+    """Floor datetimes to the start of their period (weeks start on Sunday)"""
+    days = dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    if period == "daily":
+        starts = days
+    elif period == "weekly":
+        # Day 0 of the epoch (1970-01-01) was a Thursday, four days after a Sunday
+        starts = days - (days.astype("int64") + 4) % 7
+    elif period == "monthly":
+        starts = days.astype("datetime64[M]")
+    elif period == "yearly":
+        starts = days.astype("datetime64[Y]")
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    return starts.astype("datetime64[ns]")
+
+def split_income_expense(amounts: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Split signed amounts into non-negative income and expense arrays"""
+    values = amounts.to_numpy(dtype="float64")
+    income = np.where(values > 0, values, 0.0)
+    expenses = np.where(values < 0, -values, 0.0)
+    return income, expenses
+
+@traced()
+def summary_totals(transactions_df: pd.DataFrame) -> dict:
+    """Total income, expenses (as a positive number) and net flow"""
+    if transactions_df.empty:
+        return {"income": 0.0, "expenses": 0.0, "net": 0.0}
+    income, expenses = split_income_expense(transactions_df["amount"])
+    income, expenses = float(income.sum()), float(expenses.sum())
+    return {"income": income, "expenses": expenses, "net": income - expenses}
+
+@traced()
+def period_summary(transactions_df: pd.DataFrame, period: str = "monthly") -> pd.DataFrame:
+    """Income, expenses and transaction count per period.
+
+    Returns one row per period in chronological order with columns
+    ``period`` (label), ``period_start``, ``Income``, ``Expenses`` (positive)
+    and ``Count``.
+    """
+    columns = ["period", "period_start", "Income", "Expenses", "Count"]
+    if transactions_df.empty:
+        return pd.DataFrame(columns=columns)
+
+    income, expenses = split_income_expense(transactions_df["amount"])
+    frame = pd.DataFrame({
+        "period_start": _period_start(transactions_df["date"], period),
+        "Income": income,
+        "Expenses": expenses,
+    })
+    summary = frame.groupby("period_start", sort=True).agg(
+        Income=("Income", "sum"),
+        Expenses=("Expenses", "sum"),
+        Count=("Income", "size"),
+    ).reset_index()
+    # Only the (few) group keys are formatted, not every row
+    summary["period"] = summary["period_start"].dt.strftime(PERIOD_FORMATS[period])
+    return summary[columns]
+
+@traced()
+def category_breakdown(transactions_df: pd.DataFrame, sign: str = "expense") -> pd.DataFrame:
+    """Absolute amount per category (``type``) for expenses or income, largest first"""
+    if transactions_df.empty:
+        return pd.DataFrame(columns=["type", "amount"])
+
+    income, expenses = split_income_expense(transactions_df["amount"])
+    values = expenses if sign == "expense" else income
+    mask = values > 0
+    frame = pd.DataFrame({"type": transactions_df["type"].array, "amount": values})[mask]
+    breakdown = frame.groupby("type", observed=True)["amount"].sum().reset_index()
+    return breakdown.sort_values("amount", ascending=False, ignore_index=True)
+
+@traced()
+def running_balances(transactions_df: pd.DataFrame, account_names: dict | None = None) -> pd.DataFrame:
+    """Cumulative balance per account at every date it had transactions.
+
+    Returns columns ``Date``, ``Account`` and ``Balance`` sorted by account and
+    date. ``account_names`` maps account ids to display names.
+    """
+    if transactions_df.empty:
+        return pd.DataFrame(columns=["Date", "Account", "Balance"])
+
+    daily = (
+        transactions_df.groupby(["account_id", "date"], observed=True, sort=True)["amount"]
+        .sum()
+    )
+    balances = daily.groupby(level="account_id", observed=True).cumsum().reset_index()
+    balances.columns = ["Account", "Date", "Balance"]
+
+    accounts = balances["Account"].astype(object)
+    if account_names:
+        accounts = accounts.map(account_names).fillna(accounts)
+    balances["Account"] = accounts
+    return balances[["Date", "Account", "Balance"]]
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Always keeps the first and last point and never returns more than
+    ``max_points`` indices. ``x`` must be sorted.
+    """
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1][:max(max_points, 0)])
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    # max_points - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        areas = np.abs(
+            (x[anchor] - avg_x) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (avg_y - y[anchor])
+        )
+        anchor = start + int(areas.argmax())
+        selected[i + 1] = anchor
+    return selected
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Indices of the minimum and maximum of each bucket, in order.
+
+    Keeps spikes that LTTB can smooth over; returns at most ``max_points``
+    indices.
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    y = np.asarray(y, dtype="float64")
+    buckets = max(max_points // 2, 1)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    keep = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            window = y[start:end]
+            keep.extend(sorted({start + int(window.argmin()), start + int(window.argmax())}))
+    return np.array(keep[:max_points])
+
+@traced()
+def downsample(df: pd.DataFrame, x: str, y: str, max_points: int,
+               by: str | None = None, method: str = "lttb") -> pd.DataFrame:
+    """Reduce each series in ``df`` to at most ``max_points`` rows.
+
+    Rows must be sorted by ``x`` within each ``by`` group. ``method`` is
+    ``"lttb"`` or ``"minmax"``.
+    """
+    if df.empty or max_points is None:
+        return df
+
+    def reduce(series: pd.DataFrame) -> np.ndarray:
+        if method == "minmax":
+            picked = minmax_indices(series[y].to_numpy(), max_points)
+        else:
+            xs = series[x].to_numpy()
+            if np.issubdtype(xs.dtype, np.datetime64):
+                xs = xs.astype("datetime64[ns]").astype("int64")
+            picked = lttb_indices(xs, series[y].to_numpy(), max_points)
+        return series.index.to_numpy()[picked]
+
+    if by is None:
+        return df.loc[reduce(df)]
+    keep = [reduce(group) for _, group in df.groupby(by, sort=False, observed=True)]
+    return df.loc[np.concatenate(keep)]
+
+def bounded_period_summary(transactions_df: pd.DataFrame, period: str,
+                           max_buckets: int) -> tuple[pd.DataFrame, str]:
+    """``period_summary`` coarsened until it has at most ``max_buckets`` rows.
+
+    Steps through daily -> weekly -> monthly -> yearly starting at ``period``;
+    if even yearly buckets exceed the limit only the most recent ones are
+    kept. Returns the summary and the period actually used.
+    """
+    levels = list(PERIOD_FORMATS)
+    summary = period_summary(transactions_df, period)
+    for coarser in levels[levels.index(period) + 1:]:
+        if len(summary) <= max_buckets:
+            break
+        period = coarser
+        summary = period_summary(transactions_df, period)
+    if len(summary) > max_buckets:
+        summary = summary.tail(max_buckets).reset_index(drop=True)
+    return summary, period
+
+# Cells of the dashboard rollup cube: one per (user, account, category, day)
+ROLLUP_KEYS = ["user_id", "account_id", "category", "day"]
+ROLLUP_COLUMNS = ROLLUP_KEYS + ["income", "expense", "count"]
+
+@traced()
+def rollup_cells(transactions_df: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate transactions into rollup cube cells.
+
+    ``transactions_df`` needs ``user_id``, ``account_id``, ``type``, ``date``
+    and ``amount``. Returns one row per cell with ``day`` as a datetime,
+    ``income`` and ``expense`` sums (both positive) and the row ``count``,
+    ready to be added to the stored cube.
+    """
+    if transactions_df.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+
+    income, expenses = split_income_expense(pd.to_numeric(transactions_df["amount"]))
+    frame = pd.DataFrame({
+        "user_id": transactions_df["user_id"].astype(str).to_numpy(),
+        "account_id": transactions_df["account_id"].astype(str).to_numpy(),
+        "category": transactions_df["type"].astype(object).fillna("").astype(str).to_numpy(),
+        "day": pd.to_datetime(transactions_df["date"]).dt.normalize().to_numpy(),
+        "income": income,
+        "expense": expenses,
+    })
+    return frame.groupby(ROLLUP_KEYS, sort=True).agg(
+        income=("income", "sum"),
+        expense=("expense", "sum"),
+        count=("income", "size"),
+    ).reset_index()
+
+@traced()
+def rollup_totals(cells: pd.DataFrame) -> dict:
+    """``summary_totals`` computed from rollup cells"""
+    if cells.empty:
+        return {"income": 0.0, "expenses": 0.0, "net": 0.0}
+    income, expenses = float(cells["income"].sum()), float(cells["expense"].sum())
+    return {"income": income, "expenses": expenses, "net": income - expenses}
+
+@traced()
+def rollup_period_summary(cells: pd.DataFrame, period: str = "monthly") -> pd.DataFrame:
+    """``period_summary`` computed from rollup cells"""
+    columns = ["period", "period_start", "Income", "Expenses", "Count"]
+    if cells.empty:
+        return pd.DataFrame(columns=columns)
+
+    frame = pd.DataFrame({
+        "period_start": _period_start(cells["day"], period),
+        "Income": cells["income"].to_numpy(dtype="float64"),
+        "Expenses": cells["expense"].to_numpy(dtype="float64"),
+        "Count": cells["count"].to_numpy(dtype="int64"),
+    })
+    summary = frame.groupby("period_start", sort=True).sum().reset_index()
+    summary["period"] = summary["period_start"].dt.strftime(PERIOD_FORMATS[period])
+    return summary[columns]
+
+@traced()
+def rollup_category_breakdown(cells: pd.DataFrame, sign: str = "expense") -> pd.DataFrame:
+    """``category_breakdown`` computed from rollup cells"""
+    if cells.empty:
+        return pd.DataFrame(columns=["type", "amount"])
+
+    values = cells["expense" if sign == "expense" else "income"].to_numpy(dtype="float64")
+    frame = pd.DataFrame({"type": cells["category"].array, "amount": values})[values > 0]
+    breakdown = frame.groupby("type", observed=True)["amount"].sum().reset_index()
+    return breakdown.sort_values("amount", ascending=False, ignore_index=True)
@@ -5,7 +5,7 @@ import os
 
 # Import components
 from components.sidebar import render_sidebar
-from components.charts import income_vs_expense_chart, display_chart
+from components.perf_panel import render_performance_panel
 
 # Authentication setup
 def initialize_auth():
@@ -13,7 +13,12 @@ def initialize_auth():
     query_params = st.query_params
     if "code" in query_params:
         code = query_params["code"][0] if isinstance(query_params["code"], list) else query_params["code"]
+        # Consume the code so later reruns don't try to exchange it again
+        del query_params["code"]
         token_response = acquire_token_by_auth_code(code)
+        if "error" in token_response:
+            st.error(f"Sign-in failed: {token_response.get('error_description', token_response['error'])}")
+            return
         user_email = token_response.get("id_token_claims", {}).get("preferred_username")
         # Get the actual user ID from token
         user_id = get_user_id_from_token(token_response)
@@ -35,6 +40,7 @@ initialize_auth()
 
 # Render sidebar using component
 render_sidebar()
+render_performance_panel()
 
 # Main content - Landing Page
 if "user" not in st.session_state:
@@ -74,12 +80,22 @@ else:
     st.info("Use the sidebar to navigate between pages")
     
     # Quick overview stats if user is logged in
-    from database import fetch_transactions, fetch_accounts
+    from functools import partial
+    from database import fetch_transactions, fetch_accounts, gather_queries
+    from components.charts import income_vs_expense_chart, display_chart
     import pandas as pd
     
     try:
-        accounts_df = fetch_accounts(st.session_state["user_id"])
-        transactions_df = fetch_transactions(st.session_state["user_id"])
+        # Both overview queries run concurrently; one failing leaves the other on the page
+        data, errors = gather_queries({
+            "accounts": partial(fetch_accounts, st.session_state["user_id"], raise_errors=True),
+            "transactions": partial(fetch_transactions, st.session_state["user_id"],
+                                    columns=["date", "amount"], raise_errors=True),
+        })
+        for name, error in errors.items():
+            st.error(f"Could not load {name}: {error}")
+        accounts_df = data["accounts"] if data["accounts"] is not None else pd.DataFrame()
+        transactions_df = data["transactions"] if data["transactions"] is not None else pd.DataFrame()
         
         col1, col2 = st.columns(2)
         
@@ -1,46 +1,84 @@
 import streamlit as st
-import msal
 import os
+import threading
+import functools
+from collections import OrderedDict
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Load values from environment variables
-CLIENT_ID = os.getenv("CLIENT_ID")
-TENANT_ID = os.getenv("TENANT_ID")
-CLIENT_SECRET = os.getenv("CLIENT_SECRET")
-
-if not CLIENT_ID or not TENANT_ID or not CLIENT_SECRET:
-    st.error("Missing Azure AD environment variables. Please set CLIENT_ID, TENANT_ID, and CLIENT_SECRET in your environment.")
-    st.stop()
-
 AUTHORITY = "https://login.microsoftonline.com/consumers"
 SCOPE = ["User.Read"]
 REDIRECT_PATH = "/auth"
 
+REDIRECT_URI = f"http://localhost:8501{REDIRECT_PATH}"
+
+_msal_lock = threading.Lock()
+_msal_app = None
+# Authority discovery responses, shared by every app this process builds
+_http_cache = {}
+# Authorization codes already exchanged, so a rerun never redeems one twice
+_redeemed_codes = OrderedDict()
+
+def _azure_credentials():
+    """Client id and secret from the environment, checked when a client is first built"""
+    client_id = os.getenv("CLIENT_ID")
+    tenant_id = os.getenv("TENANT_ID")
+    client_secret = os.getenv("CLIENT_SECRET")
+    if not client_id or not tenant_id or not client_secret:
+        st.error("Missing Azure AD environment variables. Please set CLIENT_ID, TENANT_ID, and CLIENT_SECRET in your environment.")
+        st.stop()
+    return client_id, client_secret
+
 def build_msal_app(cache=None):
+    import msal
+    client_id, client_secret = _azure_credentials()
     return msal.ConfidentialClientApplication(
-        CLIENT_ID,
+        client_id,
         authority=AUTHORITY,
-        client_credential=CLIENT_SECRET,
+        client_credential=client_secret,
         token_cache=cache,
+        http_cache=_http_cache,
     )
 
+def get_msal_app():
+    """The process-wide MSAL client, built (and its authority discovered) once.
+
+    It only builds sign-in URLs; codes are redeemed by short-lived clients
+    (see ``acquire_token_by_auth_code``), so it never holds user tokens.
+    """
+    global _msal_app
+    with _msal_lock:
+        if _msal_app is None:
+            _msal_app = build_msal_app()
+        return _msal_app
+
+@functools.lru_cache(maxsize=1)
 def get_sign_in_url():
-    app = build_msal_app()
-    return app.get_authorization_request_url(
+    # The URL is the same for every visitor, so it is built once per process
+    return get_msal_app().get_authorization_request_url(
         scopes=SCOPE,
-        redirect_uri=f"http://localhost:8501{REDIRECT_PATH}"
+        redirect_uri=REDIRECT_URI
     )
 
 def acquire_token_by_auth_code(auth_code):
-    app = build_msal_app()
-    result = app.acquire_token_by_authorization_code(
+    """Exchange an authorization code for tokens; each code is redeemed only once"""
+    with _msal_lock:
+        if auth_code in _redeemed_codes:
+            return {"error": "invalid_grant", "error_description": "Authorization code was already redeemed"}
+        _redeemed_codes[auth_code] = True
+        while len(_redeemed_codes) > 1024:
+            _redeemed_codes.popitem(last=False)
+
+    # Tokens are only needed here to read the user's id: a throwaway cache per
+    # exchange keeps them from piling up in a process-wide one. Discovery is
+    # still shared through _http_cache.
+    import msal
+    return build_msal_app(msal.TokenCache()).acquire_token_by_authorization_code(
         auth_code,
         scopes=SCOPE,
-        redirect_uri=f"http://localhost:8501{REDIRECT_PATH}"
+        redirect_uri=REDIRECT_URI
     )
-    return result
 
 # Add this function to get the actual user ID from token
 def get_user_id_from_token(token_response):
@@ -0,0 +1,73 @@
+"""Vectorized analytics versus the groupby-apply code they replaced.
+
+    python benchmarks/bench_analytics.py --rows 100000 1000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from synthetic import synthetic_transactions, synthetic_accounts
+import analytics
+
+
+def legacy_period_summary(transactions_df):
+    """components/charts.income_vs_expense_chart before the analytics module"""
+    df = transactions_df.copy()
+    df['period'] = df['date'].dt.strftime('%Y-%m')
+    return df.groupby('period').apply(
+        lambda x: pd.Series({
+            'Income': x[x['amount'] > 0]['amount'].sum(),
+            'Expenses': abs(x[x['amount'] < 0]['amount'].sum())
+        })
+    ).reset_index()
+
+
+def legacy_running_balances(transactions_df, account_map):
+    """components/charts.account_balance_history before the analytics module"""
+    df = transactions_df.copy()
+    balance_data = []
+    for account_id in df['account_id'].unique():
+        account_txns = df[df['account_id'] == account_id].sort_values('date')
+        running_balance = account_txns.groupby('date')['amount'].sum().cumsum()
+        for date, balance in running_balance.items():
+            balance_data.append({
+                'Date': date,
+                'Account': account_map.get(account_id, account_id),
+                'Balance': balance
+            })
+    return pd.DataFrame(balance_data)
+
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    account_map = synthetic_accounts().set_index("id")["name"].to_dict()
+    cases = [
+        ("monthly summary", legacy_period_summary, lambda df: analytics.period_summary(df, "monthly")),
+        ("running balances", lambda df: legacy_running_balances(df, account_map),
+         lambda df: analytics.running_balances(df, account_map)),
+    ]
+
+    for rows in args.rows:
+        df = synthetic_transactions(rows)
+        print(f"{rows:,} rows")
+        for name, legacy, vectorized in cases:
+            before, after = timed(legacy, df), timed(vectorized, df)
+            print(f"  {name:<17} legacy {before * 1000:9.1f} ms   vectorized {after * 1000:8.1f} ms"
+                  f"   {before / after:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
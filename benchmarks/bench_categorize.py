@@ -0,0 +1,68 @@
+"""Keyword categorization of statement descriptions.
+
+Compares the original per-row rule loop (``legacy_categorize``, a copy of
+the old ``categorize_transaction``, called once per description) with
+``Categorizer.categorize`` on the whole Series, on mostly unique
+descriptions built from merchant names.
+
+    python benchmarks/bench_categorize.py --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic import MERCHANTS
+from utils import Categorizer
+
+
+def legacy_categorize(description):
+    """categorize_transaction as it was: rules rebuilt and scanned per call"""
+    description = description.lower()
+    keyword_map = {
+        "Income": ["salary", "payroll", "deposit", "bonus"],
+        "Food": ["grocery", "supermarket", "food", "restaurant"],
+        "Transport": ["uber", "lyft", "transport", "bus", "subway"],
+        "Housing": ["rent", "mortgage", "housing"],
+        "Entertainment": ["netflix", "spotify", "entertainment", "movie"]
+    }
+    for category, keywords in keyword_map.items():
+        for keyword in keywords:
+            if keyword in description:
+                return keyword.title(), category
+    return "Other", "Other"
+
+
+def synthetic_descriptions(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    merchants = np.array([m.upper() for m in MERCHANTS] + ["POS PURCHASE", "CARD PAYMENT", "ONLINE STORE"])
+    picks = merchants[rng.integers(0, len(merchants), rows)]
+    refs = rng.integers(0, 10 ** 6, rows).astype(str)
+    return pd.Series(np.char.add(np.char.add(picks, " REF "), refs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    descriptions = synthetic_descriptions(args.rows)
+    print(f"{args.rows:,} descriptions, {descriptions.nunique():,} unique")
+
+    start = time.perf_counter()
+    legacy = [legacy_categorize(text)[1] for text in descriptions]
+    legacy_time = time.perf_counter() - start
+    print(f"    legacy: {legacy_time:6.2f}s")
+
+    categorizer = Categorizer()
+    start = time.perf_counter()
+    compiled = categorizer.categorize(descriptions)
+    compiled_time = time.perf_counter() - start
+    print(f"  compiled: {compiled_time:6.2f}s ({legacy_time / compiled_time:.1f}x)")
+
+    assert compiled.tolist() == legacy, "categorizers disagree"
+
+
+if __name__ == "__main__":
+    main()
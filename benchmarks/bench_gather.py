@@ -0,0 +1,90 @@
+"""Page data loading against a Supabase stand-in with simulated network latency.
+
+Serves accounts and transactions from a local HTTP server that sleeps
+``--latency`` seconds per request, then times the dashboard's two queries
+run one after the other and through ``database.gather_queries``.
+
+    python benchmarks/bench_gather.py --latency 0.15 --rows 800
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+from synthetic import synthetic_accounts, synthetic_raw_transactions
+import database
+from db_client import DataClient
+
+
+def serve(tables, latency):
+    """A read-only stand-in for /rest/v1/<table> that honours limit and keyset paging"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            url = urlparse(self.path)
+            query = unquote(url.query)
+            rows = tables.get(url.path.rsplit("/", 1)[-1], [])
+            # Filters are ignored; keyset pages continue after the (date, id) in the "or" filter
+            after = re.search(r'date\.gt\."([^"]+)".*id\.gt\."([^"]+)"', query)
+            if after:
+                rows = [row for row in rows if (row["date"], row["id"]) > after.groups()]
+            limit = re.search(r"limit=(\d+)", query)
+            data = json.dumps(rows[:int(limit.group(1))] if limit else rows).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--rows", type=int, default=800)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    accounts = synthetic_accounts(5).astype(object).to_dict("records")
+    transactions = synthetic_raw_transactions(args.rows).sort_values(["date", "id"]).to_dict("records")
+    server = serve({"accounts": accounts, "transactions": transactions}, args.latency)
+    database.supabase = DataClient(f"http://127.0.0.1:{server.server_address[1]}", "bench-key")
+    # Every run must reach the backend
+    database.data_cache = database.DataCache(ttl=0)
+
+    queries = {
+        "accounts": partial(database.fetch_accounts, "user-1"),
+        "transactions": partial(database.fetch_transactions, "user-1",
+                                columns=["date", "account_id", "amount", "type"]),
+    }
+    print(f"{args.latency * 1000:.0f} ms per request, {args.rows:,} transactions")
+
+    def sequential():
+        return {name: query() for name, query in queries.items()}
+
+    for name, load in [("sequential", sequential), ("gathered", lambda: database.gather_queries(queries))]:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            load()
+            timings.append(time.perf_counter() - start)
+        print(f"{name:>10}: {min(timings) * 1000:7.1f} ms (best of {args.repeat})")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""PDF text extraction on a synthetic multi-page statement.
+
+Compares the old single-threaded ``text += page.get_text()`` loop with
+``extractor.iter_pdf_pages`` run serially and across the process pool.
+
+    python benchmarks/bench_pdf.py --pages 300
+"""
+import argparse
+import time
+
+import fitz
+
+from synthetic import MERCHANTS
+import extractor
+
+
+def synthetic_statement_pdf(pages, lines_per_page=45):
+    """Bytes of a statement-like PDF with one transaction per line"""
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        lines = [f"Statement page {number + 1}"]
+        for line in range(lines_per_page):
+            day = (number * lines_per_page + line) % 28 + 1
+            amount = ((number * 37 + line * 11) % 5000) / 10 - 250
+            lines.append(f"2025-05-{day:02d}  {MERCHANTS[line % len(MERCHANTS)]:<20} {amount:>10.2f}")
+        page.insert_text((40, 40), "\n".join(lines), fontsize=9)
+    return doc.tobytes()
+
+
+def legacy_extract(pdf_bytes):
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    text = ""
+    for page in doc:
+        text += page.get_text()
+    return text
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=extractor.PDF_WORKERS)
+    args = parser.parse_args()
+
+    pdf_bytes = synthetic_statement_pdf(args.pages)
+    print(f"{args.pages} pages, {len(pdf_bytes) / 1024:.0f} KiB, {args.workers} worker(s)")
+
+    # Warm the pool so worker start-up isn't billed to the first run
+    extractor.extract_pages_from_pdf(pdf_bytes, workers=args.workers)
+
+    results = {
+        "legacy loop": timed(lambda: legacy_extract(pdf_bytes)),
+        "serial pages": timed(lambda: extractor.extract_pages_from_pdf(pdf_bytes, workers=1)),
+        "process pool": timed(lambda: extractor.extract_pages_from_pdf(pdf_bytes, workers=args.workers)),
+    }
+    for name, seconds in results.items():
+        print(f"  {name:<13} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
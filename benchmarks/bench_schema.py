@@ -0,0 +1,49 @@
+"""Memory footprint of the canonical transactions schema.
+
+Builds a synthetic history shaped like the Supabase API response and compares
+the old cleaning (``.dt.date`` object dates, object strings) with
+``database.apply_transaction_schema``.
+
+    python benchmarks/bench_schema.py --rows 1000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from synthetic import synthetic_raw_transactions
+from database import apply_transaction_schema
+
+
+def legacy_clean(df):
+    """The cleaning fetch_transactions applied before the canonical schema"""
+    df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
+    df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.date
+    for col in ['type', 'description']:
+        df[col] = df[col].fillna('').astype(object)
+    return df
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    raw = synthetic_raw_transactions(args.rows)
+    print(f"{args.rows:,} rows")
+
+    for name, clean in [("legacy", legacy_clean), ("canonical", apply_transaction_schema)]:
+        start = time.perf_counter()
+        df = clean(raw.copy())
+        elapsed = time.perf_counter() - start
+        columns = ", ".join(f"{col}={df[col].memory_usage(deep=True, index=False) / 1024 ** 2:.1f}"
+                            for col in ["date", "amount", "type", "account_id", "description"])
+        print(f"{name:>10}: {memory_mb(df):8.1f} MiB total ({columns}) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Offline stand-ins for Supabase and Gemini used by the benchmark suite."""
+import bisect
+import json
+import re
+import threading
+import time
+
+# A statement line as written by synthetic_statement_lines: date, description, amount
+STATEMENT_LINE = re.compile(r"^(\d{4}-\d{2}-\d{2})\s+(.*?)\s+(-?\d+\.\d{2})$", re.MULTILINE)
+KEYSET = re.compile(r'^(\w+)\.gt\."([^"]*)",and\(\1\.eq\."[^"]*",id\.gt\."([^"]*)"\)$')
+OPERATORS = {
+    "eq": lambda value, arg: value == arg,
+    "gte": lambda value, arg: value >= arg,
+    "lte": lambda value, arg: value <= arg,
+    "gt": lambda value, arg: value > arg,
+    "lt": lambda value, arg: value < arg,
+    "in": lambda value, arg: value in arg,
+}
+
+
+class StubResponse:
+    def __init__(self, data=None, count=None, text=None):
+        self.data = data
+        self.count = count
+        self.text = text
+
+
+class StubQuery:
+    """The slice of the PostgREST query builder that ``repository.SupabaseRepository`` uses"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.columns = "*"
+        self.filters = []
+        self.orders = []
+        self.after = None
+        self.row_limit = None
+        self.payload = None
+        self.count = None
+
+    def select(self, columns="*", count=None, head=False):
+        self.columns, self.count = columns, count
+        return self
+
+    def insert(self, payload):
+        self.payload = payload
+        return self
+
+    def _filter(self, op, column, value):
+        self.filters.append((column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter("eq", column, value)
+
+    def gte(self, column, value):
+        return self._filter("gte", column, value)
+
+    def lte(self, column, value):
+        return self._filter("lte", column, value)
+
+    def gt(self, column, value):
+        return self._filter("gt", column, value)
+
+    def lt(self, column, value):
+        return self._filter("lt", column, value)
+
+    def in_(self, column, values):
+        return self._filter("in", column, set(values))
+
+    def or_(self, expression):
+        # Only the keyset continuation "(key > v) or (key = v and id > last id)" is understood
+        match = KEYSET.match(expression)
+        if match is None:
+            raise ValueError(f"Unsupported filter: {expression}")
+        self.after = (match.group(2), match.group(3))
+        return self
+
+    def order(self, column):
+        self.orders.append(column)
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def execute(self):
+        if self.payload is not None:
+            return StubResponse(self.client.insert(self.table, self.payload))
+        rows, keys = self.client.view(self.table, tuple(self.filters), tuple(self.orders))
+        if self.count:
+            return StubResponse([], count=len(rows))
+        start = bisect.bisect_right(keys, self.after) if self.after is not None else 0
+        stop = start + self.row_limit if self.row_limit is not None else len(rows)
+        page = rows[start:stop]
+        if self.columns != "*":
+            columns = [column.strip() for column in self.columns.split(",")]
+            page = [{column: row.get(column) for column in columns} for row in page]
+        return StubResponse(page)
+
+
+class StubRpc:
+    def __init__(self, client, name, params):
+        self.client, self.name, self.params = client, name, params
+
+    def execute(self):
+        self.client.rpc_calls.append((self.name, self.params))
+        return StubResponse([])
+
+
+class StubSupabase:
+    """In-memory tables served through the Supabase client interface.
+
+    Filtered, ordered views are computed once and reused by every keyset page
+    (an insert drops them), so paging a million rows stays linear. RPCs only
+    record their calls.
+    """
+
+    def __init__(self, tables=None):
+        self.tables = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.rpc_calls = []
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        return StubQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return StubRpc(self, name, params or {})
+
+    def insert(self, table, payload):
+        rows = payload if isinstance(payload, list) else [payload]
+        with self._lock:
+            self.tables.setdefault(table, []).extend(rows)
+            self._views = {key: view for key, view in self._views.items() if key[0] != table}
+        return rows
+
+    def view(self, table, filters, orders):
+        key = (table, repr(filters), orders)
+        with self._lock:
+            if key not in self._views:
+                rows = [row for row in self.tables.get(table, [])
+                        if all(OPERATORS[op](row.get(column), arg) for column, op, arg in filters)]
+                if orders:
+                    rows.sort(key=lambda row: tuple(str(row[column]) for column in orders))
+                keys = [tuple(str(row[column]) for column in orders) for row in rows]
+                self._views[key] = (rows, keys)
+            return self._views[key]
+
+
+class StubLLM:
+    """Stands in for Gemini: one JSON transaction per statement line of the prompt"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        statement = prompt.split("Bank Statement Text:", 1)[-1]
+        rows = [
+            {"Date": date, "Amount": float(amount), "Description": description,
+             "Type": "Income" if float(amount) > 0 else "Expense"}
+            for date, description, amount in STATEMENT_LINE.findall(statement)
+        ]
+        return StubResponse(text="```json\n" + json.dumps(rows) + "\n```")
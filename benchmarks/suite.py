@@ -0,0 +1,329 @@
+"""Benchmark suite: the app's hot paths on seeded synthetic ledgers, fully offline.
+
+Supabase and Gemini are replaced by the in-memory stubs in ``stubs.py`` (and
+the embedded SQLite backend), so runs are repeatable anywhere. Results are
+written as JSON; ``compare`` flags benchmarks that got slower than a baseline
+and exits non-zero if any did.
+
+    python benchmarks/suite.py run --sizes 1000 100000 1000000 --output results.json
+    python benchmarks/suite.py run --only import --sizes 1000 --baseline results.json
+    python benchmarks/suite.py compare baseline.json results.json --threshold 0.2
+"""
+import argparse
+import datetime
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from synthetic import synthetic_ledger
+from stubs import StubLLM, StubSupabase
+import analytics
+import database
+import extractor
+from components import charts
+from repository import SQLiteRepository, SupabaseRepository
+from utils import categorize_transaction, default_categorizer
+
+# Lines per page of the synthetic PDF statements
+PDF_LINES_PER_PAGE = 45
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register ``setup(ledger)``, which prepares untimed inputs and returns the callable to time"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class Ledger:
+    """One size's synthetic data, with derived inputs built on first use"""
+
+    def __init__(self, rows, seed, max_pdf_pages):
+        self.rows = rows
+        self.max_pdf_pages = max_pdf_pages
+        self.users, self.accounts, self.raw = synthetic_ledger(rows, seed=seed)
+        self.user_id = self.users["id"].iloc[0]
+        self._cache = {}
+
+    def derived(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    @property
+    def transactions(self):
+        return self.derived("transactions", lambda: database.apply_transaction_schema(self.raw.copy()))
+
+    @property
+    def statement(self):
+        """The ledger as an uploaded statement ready for import"""
+        return self.derived("statement", lambda: pd.DataFrame({
+            "Date": self.raw["date"], "Amount": self.raw["amount"],
+            "Description": self.raw["description"], "Category": self.raw["type"],
+        }))
+
+    @property
+    def statement_lines(self):
+        return self.derived("statement_lines", lambda: (
+            self.raw["date"] + "  " + self.raw["description"] + "  "
+            + self.raw["amount"].map("{:.2f}".format)
+        ).tolist())
+
+
+def use_stub_supabase(stub):
+    """Point ``database`` at ``stub`` with caching and the ledger mirror off"""
+    database.supabase = stub
+    database.repository = SupabaseRepository(lambda: stub)
+    database.data_cache = database.DataCache(ttl=0)
+    database.ledger_mirror = None
+
+
+@benchmark("fetch_transactions")
+def bench_fetch_transactions(ledger):
+    # Keyset paging through the stub, DataFrame construction and the canonical schema
+    use_stub_supabase(StubSupabase({"transactions": ledger.raw.to_dict("records")}))
+    return lambda: database.fetch_transactions(ledger.user_id)
+
+
+@benchmark("charts.income_vs_expense_chart")
+def bench_income_vs_expense_chart(ledger):
+    # Charts are serialized to their Vega-Lite spec, as Streamlit does before sending them
+    return lambda: charts.income_vs_expense_chart(ledger.transactions).to_dict()
+
+
+@benchmark("charts.spending_by_category_chart")
+def bench_spending_by_category_chart(ledger):
+    return lambda: charts.spending_by_category_chart(ledger.transactions).to_dict()
+
+
+@benchmark("charts.account_balance_history")
+def bench_account_balance_history(ledger):
+    return lambda: charts.account_balance_history(ledger.transactions, ledger.accounts).to_dict()
+
+
+@benchmark("charts.display_chart")
+def bench_display_chart(ledger):
+    # Streamlit runs in bare mode here; silence its "no script context" warnings
+    logging.disable(logging.WARNING)
+    chart = charts.income_vs_expense_chart(ledger.transactions)
+    return lambda: charts.display_chart(chart)
+
+
+@benchmark("dashboard.ledger")
+def bench_dashboard_ledger(ledger):
+    df = ledger.transactions
+    return lambda: (analytics.summary_totals(df), analytics.period_summary(df, "monthly"),
+                    analytics.category_breakdown(df, sign="expense"))
+
+
+@benchmark("dashboard.rollup")
+def bench_dashboard_rollup(ledger):
+    cells = database.apply_rollup_schema(analytics.rollup_cells(ledger.raw))
+    return lambda: (analytics.rollup_totals(cells), analytics.rollup_period_summary(cells, "monthly"),
+                    analytics.rollup_category_breakdown(cells, sign="expense"))
+
+
+@benchmark("utils.categorize_transaction")
+def bench_categorize_transaction(ledger):
+    descriptions = ledger.raw["description"].tolist()
+    return lambda: [categorize_transaction(text) for text in descriptions]
+
+
+@benchmark("utils.Categorizer.categorize")
+def bench_categorizer(ledger):
+    descriptions = ledger.raw["description"]
+    return lambda: default_categorizer.categorize(descriptions)
+
+
+@benchmark("extractor.extract_text_from_pdf")
+def bench_extract_text_from_pdf(ledger):
+    import fitz
+
+    def build():
+        lines = ledger.statement_lines
+        pages = min(math.ceil(len(lines) / PDF_LINES_PER_PAGE), ledger.max_pdf_pages)
+        doc = fitz.open()
+        for number in range(pages):
+            chunk = lines[number * PDF_LINES_PER_PAGE:(number + 1) * PDF_LINES_PER_PAGE]
+            doc.new_page().insert_text((40, 40), "\n".join(chunk), fontsize=8)
+        return doc.tobytes()
+
+    pdf_bytes = ledger.derived("pdf", build)
+    extractor.extract_text_from_pdf(pdf_bytes)  # start the worker pool outside the timing
+    return lambda: extractor.extract_text_from_pdf(pdf_bytes)
+
+
+@benchmark("extractor.extract_transactions_with_llm")
+def bench_llm_extraction(ledger):
+    # Chunking, concurrent calls to the stub model and merging; no cache
+    text = ledger.derived("statement_text", lambda: "\n".join(ledger.statement_lines))
+    return lambda: extractor.extract_transactions_with_llm(text, llm=StubLLM())
+
+
+@benchmark("import.supabase_stub")
+def bench_import_supabase(ledger):
+    account_id = ledger.accounts["id"].iloc[0]
+
+    def run():
+        use_stub_supabase(StubSupabase())
+        return database.insert_transactions_bulk(ledger.user_id, account_id, ledger.statement)
+    return run
+
+
+@benchmark("import.sqlite")
+def bench_import_sqlite(ledger):
+    account_id = ledger.accounts["id"].iloc[0]
+    directory = tempfile.mkdtemp(prefix="bench-sqlite-")
+    paths = (os.path.join(directory, f"run{number}.sqlite3") for number in itertools.count())
+
+    def run():
+        # A fresh database per run, so every run inserts into empty tables
+        database.repository = SQLiteRepository(next(paths))
+        database.data_cache = database.DataCache(ttl=0)
+        return database.insert_transactions_bulk(ledger.user_id, account_id, ledger.statement)
+    return run
+
+
+def measure(func, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def environment():
+    import altair
+    import numpy
+    import pyarrow
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": {"pandas": pd.__version__, "numpy": numpy.__version__,
+                     "pyarrow": pyarrow.__version__, "altair": altair.__version__},
+    }
+
+
+def run_suite(args):
+    names = [name for name in BENCHMARKS
+             if not args.only or any(name.startswith(prefix) for prefix in args.only)]
+    report = {**environment(), "repeat": args.repeat, "seed": args.seed, "results": []}
+    for rows in args.sizes:
+        print(f"{rows:,} rows")
+        ledger = Ledger(rows, args.seed, args.max_pdf_pages)
+        for name in names:
+            try:
+                runs = measure(BENCHMARKS[name](ledger), args.repeat)
+            except Exception as e:
+                print(f"  {name:<40} failed: {e}")
+                report["results"].append({"benchmark": name, "rows": rows, "error": str(e)})
+                continue
+            best = min(runs)
+            print(f"  {name:<40} {best * 1000:10.1f} ms  ({rows / best:,.0f} rows/s)")
+            report["results"].append({"benchmark": name, "rows": rows, "best": best,
+                                      "median": statistics.median(runs), "runs": runs})
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            return compare(json.load(f), report, args.threshold, args.min_seconds)
+    return 0
+
+
+def compare(baseline, current, threshold=0.2, min_seconds=0.001):
+    """Print each benchmark's change against the baseline; 1 if any regressed, else 0.
+
+    A benchmark regressed when its best time grew by more than ``threshold``
+    (a fraction) and by more than ``min_seconds``, so timer noise on tiny
+    cases is not flagged.
+    """
+    def timings(report):
+        return {(r["benchmark"], r["rows"]): r["best"] for r in report["results"] if "best" in r}
+
+    before, after = timings(baseline), timings(current)
+    regressions = 0
+    print(f"Baseline {baseline.get('commit')} ({baseline.get('created')}) -> "
+          f"{current.get('commit')} ({current.get('created')})")
+    for key in sorted(before.keys() | after.keys(), key=lambda k: (k[1], k[0])):
+        name, rows = key
+        if key not in after:
+            status, detail = "missing", ""
+        elif key not in before:
+            status, detail = "new", f"{after[key] * 1000:10.1f} ms"
+        else:
+            old, new = before[key], after[key]
+            ratio = new / old if old else math.inf
+            if ratio > 1 + threshold and new - old > min_seconds:
+                status = "REGRESSION"
+                regressions += 1
+            elif ratio < 1 / (1 + threshold):
+                status = "faster"
+            else:
+                status = "ok"
+            detail = f"{old * 1000:10.1f} -> {new * 1000:10.1f} ms  {ratio:6.2f}x"
+        print(f"  {name:<40} {rows:>9,}  {status:<10} {detail}")
+    print(f"{regressions} regression(s) beyond {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks and write their results as JSON")
+    run.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    run.add_argument("--only", nargs="+", help="Benchmark name prefixes to run, e.g. charts import")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--max-pdf-pages", type=int, default=500,
+                     help="Cap on the synthetic PDF's pages (%d lines each)" % PDF_LINES_PER_PAGE)
+    run.add_argument("--output", default="benchmark-results.json")
+    run.add_argument("--baseline", help="Compare against this earlier results file")
+
+    diff = commands.add_parser("compare", help="Compare two results files")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+
+    for command in (run, diff):
+        command.add_argument("--threshold", type=float, default=0.2,
+                             help="Slowdown (fraction of the baseline) reported as a regression")
+        command.add_argument("--min-seconds", type=float, default=0.001,
+                             help="Ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        sys.exit(compare(baseline, current, args.threshold, args.min_seconds))
+    sys.exit(run_suite(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Seeded synthetic users, accounts and ledgers shared by the benchmark scripts."""
+import os
+import sys
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# Benchmarks run as scripts from the repo root: make the app modules importable
+# and give modules that read credentials at import time offline placeholders.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench.placeholder.key")
+
+CATEGORIES = ["Salary", "Food", "Transport", "Housing", "Entertainment",
+              "Shopping", "Health", "Education", "Other"]
+MERCHANTS = ["Grocery Mart", "City Transit", "Netflix", "Payroll ACME", "Corner Cafe",
+             "Rent Payment", "Pharmacy Plus", "Bookstore", "Uber Trip", "Spotify"]
+# Statement-style descriptions per category: a merchant text and the kind of
+# reference a bank appends to it ("ref" number, "store" number or "city")
+CATEGORY_MERCHANTS = {
+    "Salary": [("PAYROLL ACME CORP", "ref"), ("SALARY DEPOSIT GLOBEX", "ref")],
+    "Food": [("POS GROCERY MART", "store"), ("CORNER CAFE", "city"), ("TESCO STORES", "store"),
+             ("RESTAURANT LA PIAZZA", "city")],
+    "Transport": [("UBER *TRIP", "ref"), ("CITY TRANSIT FARE", "ref"), ("SHELL FUEL", "store")],
+    "Housing": [("RENT PAYMENT", "ref"), ("MORTGAGE DD HALIFAX", "ref")],
+    "Entertainment": [("NETFLIX.COM", "ref"), ("SPOTIFY P", "ref"), ("CINEWORLD", "city")],
+    "Shopping": [("AMAZON MKTPLACE", "ref"), ("ONLINE STORE", "ref"), ("IKEA", "city")],
+    "Health": [("PHARMACY PLUS", "store"), ("CITY GYM MEMBERSHIP", "ref")],
+    "Education": [("BOOKSTORE", "city"), ("UNIVERSITY FEES", "ref")],
+    "Other": [("ATM WITHDRAWAL", "city"), ("TRANSFER TO SAVINGS", "ref")],
+}
+CITIES = ["LONDON", "MANCHESTER", "LEEDS", "BRISTOL", "GLASGOW", "CARDIFF"]
+ACCOUNT_TYPES = ["checking", "savings", "credit card", "cash"]
+
+
+def synthetic_users(users=1):
+    return pd.DataFrame({
+        "id": [f"user-{i + 1}" for i in range(users)],
+        "email": [f"user{i + 1}@example.com" for i in range(users)],
+    })
+
+
+def synthetic_accounts(accounts=5, user_id="user-1", offset=0):
+    """Account rows as stored; ids are deterministic UUIDs starting after ``offset``"""
+    return pd.DataFrame({
+        "id": [str(uuid.UUID(int=offset + i + 1)) for i in range(accounts)],
+        "user_id": user_id,
+        "name": [f"Account {i + 1}" for i in range(accounts)],
+        "type": [ACCOUNT_TYPES[i % len(ACCOUNT_TYPES)] for i in range(accounts)],
+        "balance": 0.0,
+        "opening_balance": 0.0,
+        "currency": "USD",
+        "created_at": "2015-01-01T00:00:00+00:00",
+    })
+
+
+def synthetic_descriptions(categories, rng):
+    """A realistic statement description for each category in ``categories``"""
+    categories = np.asarray(categories, dtype=object)
+    descriptions = np.empty(len(categories), dtype=object)
+    for category, merchants in CATEGORY_MERCHANTS.items():
+        rows = np.flatnonzero(categories == category)
+        if not len(rows):
+            continue
+        picks = rng.integers(0, len(merchants), len(rows))
+        names = np.array([name for name, _ in merchants], dtype=object)[picks]
+        kinds = np.array([kind for _, kind in merchants], dtype=object)[picks]
+        suffix = np.where(
+            kinds == "ref", rng.integers(10 ** 5, 10 ** 6, len(rows)).astype(str),
+            np.where(kinds == "store", np.char.add("#", rng.integers(100, 9999, len(rows)).astype(str)),
+                     np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), len(rows))]))
+        descriptions[rows] = pd.Series(names).str.cat(pd.Series(suffix.astype(str)), sep=" ").to_numpy()
+    return descriptions
+
+
+def synthetic_raw_transactions(rows, accounts=5, seed=0, user_id="user-1", account_offset=0):
+    """Transactions as they arrive from the API: strings and floats in object columns"""
+    rng = np.random.default_rng(seed)
+    account_ids = [str(uuid.UUID(int=account_offset + i + 1)) for i in range(accounts)]
+    days = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, rows), unit="D")
+    # About one in twelve rows is income; expenses are mostly small with a long tail
+    categories = np.array(CATEGORIES, dtype=object)[
+        np.where(rng.random(rows) < 1 / 12, 0, rng.integers(1, len(CATEGORIES), rows))]
+    amounts = np.where(categories == "Salary", rng.normal(2500, 400, rows),
+                       -rng.lognormal(3.5, 1.0, rows))
+    return pd.DataFrame({
+        "id": [str(uuid.UUID(int=(seed << 64) + i)) for i in range(rows)],
+        "user_id": user_id,
+        "account_id": np.array(account_ids, dtype=object)[rng.integers(0, accounts, rows)],
+        "date": days.strftime("%Y-%m-%d").astype(object),
+        "amount": np.round(amounts, 2).astype(object),
+        "type": categories,
+        "description": synthetic_descriptions(categories, rng),
+    })
+
+
+def synthetic_transactions(rows, accounts=5, seed=0):
+    """Transactions in the canonical schema returned by fetch_transactions"""
+    from database import apply_transaction_schema
+    return apply_transaction_schema(synthetic_raw_transactions(rows, accounts, seed))
+
+
+def synthetic_ledger(rows, users=1, accounts_per_user=5, seed=0):
+    """``(users, accounts, transactions)`` with ``rows`` raw transactions split evenly across users"""
+    users_df = synthetic_users(users)
+    accounts, transactions = [], []
+    for number, user_id in enumerate(users_df["id"]):
+        offset = number * accounts_per_user
+        accounts.append(synthetic_accounts(accounts_per_user, user_id, offset))
+        share = rows // users + (number < rows % users)
+        transactions.append(synthetic_raw_transactions(share, accounts_per_user, seed + number,
+                                                       user_id, offset))
+    return users_df, pd.concat(accounts, ignore_index=True), pd.concat(transactions, ignore_index=True)
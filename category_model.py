@@ -0,0 +1,167 @@
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+TOKEN_RE = re.compile(r"[a-z]+")
+
+def description_features(descriptions, n_features):
+    """Hashed word and character 3-gram features of each description.
+
+    Returns ``(rows, features)``: parallel arrays of row positions and
+    feature buckets, one entry per n-gram occurrence. Digits are dropped, so
+    reference numbers do not split otherwise identical descriptions.
+    """
+    rows, grams = [], []
+    for row, text in enumerate(descriptions):
+        for token in TOKEN_RE.findall(str(text).lower()):
+            padded = f" {token} "
+            rows.extend([row] * (len(padded) - 1))
+            grams.append(f"w:{token}")
+            grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    if not grams:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # hash_array is vectorized and, unlike hash(), stable across processes
+    buckets = pd.util.hash_array(np.array(grams, dtype=object)) % np.uint64(n_features)
+    return np.array(rows, dtype=np.int64), buckets.astype(np.int64)
+
+class CategoryModel:
+    """Multinomial Naive Bayes over hashed description n-grams.
+
+    Training only adds to per-category feature counts, so ``learn`` folds in
+    new labeled transactions without revisiting the old ones. A transaction
+    learned again under the same id (e.g. after its category was edited) has
+    its previous label subtracted first.
+    """
+
+    def __init__(self, n_features=2 ** 16, alpha=0.1):
+        self.n_features = n_features
+        self.alpha = alpha
+        self.categories = []
+        self._counts = np.zeros((0, n_features), dtype=np.float32)
+        self._labels = {}
+        self._class_sizes = {}
+        self._log_prob = None
+
+    @property
+    def size(self):
+        """Number of labeled transactions learned"""
+        return len(self._labels)
+
+    def learn(self, ids, descriptions, categories):
+        """Add labeled transactions; ids already learned are relabeled.
+
+        A category of None removes the transaction from the model.
+        """
+        previous = [self._labels.pop(i) for i in dict.fromkeys(ids) if i in self._labels]
+        if previous:
+            self._add([text for text, _ in previous], [category for _, category in previous], -1.0)
+        labeled = [(i, text, category) for i, text, category in zip(ids, descriptions, categories)
+                   if category is not None]
+        if labeled:
+            self._add([text for _, text, _ in labeled], [category for _, _, category in labeled], 1.0)
+            self._labels.update((i, (text, category)) for i, text, category in labeled)
+        self._log_prob = None
+
+    def predict(self, descriptions) -> pd.DataFrame:
+        """Most likely category and its probability for every description.
+
+        Returns columns ``category`` and ``confidence`` in the order of
+        ``descriptions``; rows are None/0 when nothing has been learned.
+        """
+        descriptions = list(descriptions)
+        if not self._labels or not descriptions:
+            return pd.DataFrame({"category": [None] * len(descriptions), "confidence": 0.0})
+
+        if self._log_prob is None:
+            smoothed = self._counts.astype(np.float64) + self.alpha
+            self._log_prob = np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+            totals = np.array([self._class_sizes.get(c, 0) for c in self.categories], dtype=np.float64)
+            active = totals > 0
+            # Categories whose transactions were all relabeled are never predicted
+            with np.errstate(divide="ignore"):
+                self._log_prior = np.where(
+                    active, np.log((totals + 1) / (totals[active].sum() + active.sum())), -np.inf
+                )
+
+        rows, features = description_features(descriptions, self.n_features)
+        scores = np.tile(self._log_prior, (len(descriptions), 1))
+        # One scatter-add of every n-gram's per-category log-likelihood
+        np.add.at(scores, rows, self._log_prob[:, features].T)
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        return pd.DataFrame({
+            "category": np.array(self.categories, dtype=object)[best],
+            "confidence": probabilities[np.arange(len(best)), best],
+        })
+
+    def _add(self, descriptions, categories, weight):
+        for category in dict.fromkeys(categories):
+            if category not in self.categories:
+                self.categories.append(category)
+                self._counts = np.vstack([self._counts, np.zeros((1, self.n_features), dtype=np.float32)])
+        for category in categories:
+            self._class_sizes[category] = self._class_sizes.get(category, 0) + weight
+        rows, features = description_features(descriptions, self.n_features)
+        if len(rows):
+            index = {category: i for i, category in enumerate(self.categories)}
+            classes = np.array([index[c] for c in categories])[rows]
+            np.add.at(self._counts, (classes, features), weight)
+
+class CategoryModels:
+    """Per-user ``CategoryModel``s, kept in memory and trained from change feeds.
+
+    ``model(user_id)`` pulls the user's transactions changed since the last
+    pull (minus ``overlap_seconds`` for out-of-order commits) and learns the
+    labeled ones, so the first call trains on the full history and later
+    ones only on new or edited rows. ``pull_changes(user_id, since)`` must
+    return a DataFrame with ``id``, ``description``, ``type``, optionally
+    ``category_source``, and a tz-aware ``updated_at``. The ``max_users``
+    most recently used models are kept.
+
+    Only categories the user chose (``category_source == "user"``) are
+    learned, so the model never trains on its own or the keyword rules'
+    predictions. Rows from before ``category_source`` was recorded count
+    unless their type is in ``UNLABELED``.
+    """
+
+    # Directions rather than categories, and the keyword rules' fallback
+    UNLABELED = {"", "Income", "Expense", "Other"}
+
+    def __init__(self, pull_changes, max_users=32, overlap_seconds=60, **model_options):
+        self.pull_changes = pull_changes
+        self.max_users = max_users
+        self.overlap = pd.Timedelta(seconds=overlap_seconds)
+        self.model_options = model_options
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def model(self, user_id) -> CategoryModel:
+        key = str(user_id)
+        with self._lock:
+            entry = self._models.pop(key, None) or {"model": CategoryModel(**self.model_options),
+                                                    "watermark": None, "lock": threading.Lock()}
+            self._models[key] = entry
+            while len(self._models) > self.max_users:
+                self._models.popitem(last=False)
+
+        with entry["lock"]:
+            since = entry["watermark"] - self.overlap if entry["watermark"] is not None else None
+            changes = self.pull_changes(user_id, since)
+            if not changes.empty:
+                labels = changes["type"].astype(object).fillna("").astype(str).astype(object)
+                source = (changes["category_source"].astype(object) if "category_source" in changes
+                          else pd.Series(None, index=changes.index, dtype=object))
+                # Predicted rows (and legacy rows without a real category) drop out of the model
+                learned = source.eq("user") | (source.isna() & ~labels.isin(self.UNLABELED))
+                labels = labels.where(learned, None)
+                entry["model"].learn(changes["id"], changes["description"].fillna("").astype(str), labels)
+                entry["watermark"] = changes["updated_at"].max()
+        return entry["model"]
+
+    def forget(self, user_id):
+        with self._lock:
+            self._models.pop(str(user_id), None)
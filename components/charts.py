@@ -1,33 +1,27 @@
+import os
 import streamlit as st
 import pandas as pd
 import altair as alt
 from datetime import datetime, timedelta
+from analytics import bounded_period_summary, category_breakdown, running_balances, downsample
+from tracing import traced
 
-def income_vs_expense_chart(transactions_df, period="monthly"):
-    """Generate income vs expense chart"""
+# Most points any single chart series may carry to the browser
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "500"))
+
+@traced()
+def income_vs_expense_chart(transactions_df, period="monthly", max_points=None):
+    """Generate income vs expense chart
+
+    Expects the canonical transactions schema from ``database.fetch_transactions``.
+    The period is coarsened automatically (daily -> weekly -> monthly -> yearly)
+    so each series has at most ``max_points`` bars.
+    """
     if transactions_df.empty:
         return None
         
-    # Ensure date column is datetime
-    transactions_df = transactions_df.copy()
-    if 'date' in transactions_df.columns:
-        transactions_df['date'] = pd.to_datetime(transactions_df['date'])
-    
-    # Group by time period
-    if period == "monthly":
-        transactions_df['period'] = transactions_df['date'].dt.strftime('%Y-%m')
-    elif period == "weekly":
-        transactions_df['period'] = transactions_df['date'].dt.strftime('%Y-%U')
-    elif period == "daily":
-        transactions_df['period'] = transactions_df['date'].dt.strftime('%Y-%m-%d')
-    
     # Calculate income and expenses per period
-    summary = transactions_df.groupby('period').apply(
-        lambda x: pd.Series({
-            'Income': x[x['amount'] > 0]['amount'].sum(),
-            'Expenses': abs(x[x['amount'] < 0]['amount'].sum())
-        })
-    ).reset_index()
+    summary, period = bounded_period_summary(transactions_df, period, max_points or CHART_MAX_POINTS)
     
     # Prepare data for chart
     chart_data = pd.melt(
@@ -40,7 +34,7 @@ def income_vs_expense_chart(transactions_df, period="monthly"):
     
     # Create chart
     chart = alt.Chart(chart_data).mark_bar().encode(
-        x=alt.X('period:N', title='Period', sort=None),
+        x=alt.X('period:N', title=f'Period ({period})', sort=None),
         y=alt.Y('Amount:Q', title='Amount ($)'),
         color=alt.Color('Type:N', scale=alt.Scale(
             domain=['Income', 'Expenses'],
@@ -54,19 +48,19 @@ def income_vs_expense_chart(transactions_df, period="monthly"):
     
     return chart
 
+@traced()
 def spending_by_category_chart(transactions_df):
     """Generate pie chart for spending by category"""
     if transactions_df.empty:
         return None
     
-    # Filter for expenses only
-    expenses = transactions_df[transactions_df['amount'] < 0].copy()
-    if expenses.empty:
+    # Expenses grouped by category
+    category_spending = category_breakdown(transactions_df, sign="expense")
+    if category_spending.empty:
         return None
     
-    # Group by category
-    category_spending = expenses.groupby('type')['amount'].sum().abs().reset_index()
-    category_spending = category_spending.sort_values('amount', ascending=False)
+    # Each category's share of the total, for the tooltip
+    category_spending["share"] = category_spending["amount"] / category_spending["amount"].sum()
     
     # Create chart
     chart = alt.Chart(category_spending).mark_arc().encode(
@@ -75,8 +69,7 @@ def spending_by_category_chart(transactions_df):
         tooltip=[
             alt.Tooltip("type:N", title="Category"),
             alt.Tooltip("amount:Q", title="Amount", format="$,.2f"),
-            alt.Tooltip("amount:Q", title="Percentage", format=".1%", 
-                      aggregate="sum", op="mean")
+            alt.Tooltip("share:Q", title="Percentage", format=".1%")
         ]
     ).properties(
         title='Spending by Category',
@@ -85,41 +78,23 @@ def spending_by_category_chart(transactions_df):
     
     return chart
 
-def account_balance_history(transactions_df, accounts_df):
-    """Generate a line chart showing account balance over time"""
+@traced()
+def account_balance_history(transactions_df, accounts_df, max_points=None, method="lttb"):
+    """Generate a line chart showing account balance over time
+
+    Each account's series is downsampled to at most ``max_points`` points
+    (``method`` is ``"lttb"`` or ``"minmax"``) before it goes into the spec.
+    """
     if transactions_df.empty or accounts_df.empty:
         return None
     
     # Create account mapping
     account_map = accounts_df[['id', 'name']].set_index('id')['name'].to_dict()
     
-    # Copy and prepare data
-    df = transactions_df.copy()
-    df['date'] = pd.to_datetime(df['date'])
-    
-    # Get all unique dates
-    all_dates = pd.date_range(
-        start=df['date'].min(), 
-        end=df['date'].max()
-    )
-    
-    # Create cumulative balances for each account
-    balance_data = []
-    
-    for account_id in df['account_id'].unique():
-        account_txns = df[df['account_id'] == account_id].sort_values('date')
-        
-        # Calculate cumulative sum by date
-        running_balance = account_txns.groupby('date')['amount'].sum().cumsum()
-        
-        for date, balance in running_balance.items():
-            balance_data.append({
-                'Date': date,
-                'Account': account_map.get(account_id, account_id),
-                'Balance': balance
-            })
-    
-    balance_df = pd.DataFrame(balance_data)
+    # Cumulative balance per account and date
+    balance_df = running_balances(transactions_df, account_map)
+    balance_df = downsample(balance_df, "Date", "Balance", max_points or CHART_MAX_POINTS,
+                            by="Account", method=method)
     
     if balance_df.empty:
         return None
@@ -137,6 +112,7 @@ def account_balance_history(transactions_df, accounts_df):
     
     return chart
 
+@traced()
 def display_chart(chart, use_container_width=True):
     """Display an Altair chart with proper styling"""
     if chart is None:
@@ -0,0 +1,54 @@
+import streamlit as st
+import pandas as pd
+import tracing
+
+def _layer(name):
+    """The part of a span name that says where the time went: supabase, gemini, database, ..."""
+    return name.replace(" ", ".").split(".", 1)[0]
+
+def render_performance_panel():
+    """Sidebar debug panel with the timing spans of this session's previous rerun.
+
+    Only shown when ``TRACING_ENABLED`` is set. While "Trace reruns" is on,
+    each rerun's spans are collected and shown on the next one, broken down
+    by layer (self time, so nested spans aren't counted twice) and by span;
+    the process-wide histograms are summarized below.
+    """
+    if not tracing.TRACING_ENABLED:
+        return
+
+    with st.sidebar.expander("⏱️ Performance"):
+        if not st.toggle("Trace reruns", key="trace_reruns"):
+            tracing.stop_collecting()
+            st.session_state.pop("trace_spans", None)
+        else:
+            spans = st.session_state.get("trace_spans")
+            if spans:
+                df = pd.DataFrame(spans, columns=["span", "seconds", "self_seconds", "error"])
+                layers = (df.assign(layer=df["span"].map(_layer)).groupby("layer")["self_seconds"].sum()
+                          .sort_values(ascending=False) * 1000)
+                st.caption(f"Previous rerun: {len(df)} spans, {layers.sum():,.0f} ms traced")
+                st.bar_chart(layers.rename("ms"), horizontal=True)
+                by_span = df.groupby("span").agg(
+                    calls=("seconds", "size"),
+                    total_ms=("seconds", "sum"),
+                    self_ms=("self_seconds", "sum"),
+                    errors=("error", "sum"),
+                ).sort_values("self_ms", ascending=False)
+                by_span[["total_ms", "self_ms"]] *= 1000
+                st.dataframe(by_span.round(1), use_container_width=True)
+            else:
+                st.caption("Timings appear here from the next rerun on.")
+            st.session_state["trace_spans"] = tracing.start_collecting()
+
+        snapshot = tracing.stats.snapshot()
+        if snapshot:
+            st.caption("Since the server started")
+            st.dataframe(pd.DataFrame([
+                {"span": name, "calls": entry["count"],
+                 "mean_ms": entry["seconds"] / entry["count"] * 1000,
+                 "p95_ms": (tracing.stats.quantile(name, 0.95) or 0) * 1000,
+                 "max_ms": entry["max_seconds"] * 1000,
+                 "errors": entry["errors"]}
+                for name, entry in snapshot.items()
+            ]).sort_values("mean_ms", ascending=False).set_index("span").round(1), use_container_width=True)
@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
+from analytics import summary_totals, period_summary
 
 def show_dashboard(data: pd.DataFrame):
+    """Render a simple dashboard for transactions in the canonical schema
+    (see ``database.apply_transaction_schema``)"""
     st.title("📊 Your Financial Dashboard")
 
     if data.empty:
@@ -11,9 +14,10 @@ def show_dashboard(data: pd.DataFrame):
     # Ensure proper casing
     data.columns = [col.lower() for col in data.columns]
 
-    income = data[data["type"] == "Income"]["amount"].sum()
-    expense = data[data["type"] == "Expense"]["amount"].sum()
-    balance = income + expense
+    totals = summary_totals(data)
+    income = totals["income"]
+    expense = totals["expenses"]
+    balance = totals["net"]
 
     st.metric("Total Income", f"${income:,.2f}")
     st.metric("Total Expense", f"${expense:,.2f}")
@@ -21,11 +25,7 @@ def show_dashboard(data: pd.DataFrame):
 
     # Show breakdown by date
     st.subheader("Monthly Summary")
-    data["date"] = pd.to_datetime(data["date"])
-    monthly = data.groupby(data["date"].dt.to_period("M")).agg({
-        "amount": ["sum"],
-        "type": lambda x: (x == "Income").sum()
-    }).rename(columns={"sum": "Total", "<lambda_0>": "Income Count"})
+    monthly = period_summary(data, "monthly").set_index("period")[["Income", "Expenses", "Count"]]
 
     st.dataframe(monthly)
 
@@ -1,68 +1,695 @@
 import os
-from supabase import create_client
+import time
+import inspect
+import threading
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, OrderedDict
 from dotenv import load_dotenv
 import pandas as pd
+from ledger_mirror import LedgerMirror
+from utils import Categorizer, default_categorizer
+from category_model import CategoryModels
+from analytics import rollup_cells
+from repository import SupabaseRepository, SQLiteRepository
+from tracing import traced
 
 load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Where accounts and transactions live: "supabase" (default) or "sqlite", an
+# embedded single-file database for local, single-tenant and test deployments
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "financial-planner.sqlite3")
+# Rows sent per multi-row insert when importing statements
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "500"))
+# Rows per keyset page when reading transactions (PostgREST caps responses at 1000 by default)
+TRANSACTIONS_PAGE_SIZE = int(os.getenv("TRANSACTIONS_PAGE_SIZE", "1000"))
+# Shared read cache: seconds an entry stays fresh and total size budget
+DATA_CACHE_TTL = float(os.getenv("DATA_CACHE_TTL", "300"))
+DATA_CACHE_MAX_BYTES = int(os.getenv("DATA_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Optional local Parquet mirror of each user's ledger (disabled unless a directory is set)
+LEDGER_MIRROR_DIR = os.getenv("LEDGER_MIRROR_DIR")
+LEDGER_MIRROR_MAX_BYTES = int(os.getenv("LEDGER_MIRROR_MAX_BYTES", str(512 * 1024 * 1024)))
+LEDGER_MIRROR_RESYNC_SECONDS = float(os.getenv("LEDGER_MIRROR_RESYNC_SECONDS", "3600"))
+# Shared HTTP pool to Supabase: connections, per-request and connect timeouts
+# (seconds), and retries of failed reads with jittered exponential backoff
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "10"))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+SUPABASE_READ_RETRIES = int(os.getenv("SUPABASE_READ_RETRIES", "3"))
+SUPABASE_RETRY_BACKOFF = float(os.getenv("SUPABASE_RETRY_BACKOFF", "0.25"))
+# Threads shared by all sessions for running a page's independent queries at once
+DB_QUERY_WORKERS = int(os.getenv("DB_QUERY_WORKERS", "8"))
+# History-trained categorizer: labeled transactions needed before it is used,
+# and the probability a prediction needs to beat the keyword rules
+CATEGORY_MODEL_MIN_HISTORY = int(os.getenv("CATEGORY_MODEL_MIN_HISTORY", "20"))
+CATEGORY_MODEL_MIN_CONFIDENCE = float(os.getenv("CATEGORY_MODEL_MIN_CONFIDENCE", "0.6"))
 
-def insert_transaction(user_id, account_id, date, amount, t_type, desc):
+# Created on first use so importing this module does no SDK or network work
+supabase = None
+_supabase_lock = threading.Lock()
+
+def get_supabase():
+    """The process-wide Supabase client (a pooled, instrumented ``DataClient``)"""
+    global supabase
+    with _supabase_lock:
+        if supabase is None:
+            from db_client import DataClient
+            supabase = DataClient(
+                SUPABASE_URL, SUPABASE_KEY,
+                pool_size=SUPABASE_POOL_SIZE,
+                timeout=SUPABASE_TIMEOUT,
+                connect_timeout=SUPABASE_CONNECT_TIMEOUT,
+                retries=SUPABASE_READ_RETRIES,
+                backoff=SUPABASE_RETRY_BACKOFF
+            )
+        return supabase
+
+repository = None
+_repository_lock = threading.Lock()
+
+def get_repository():
+    """The process-wide storage backend selected by ``STORAGE_BACKEND``"""
+    global repository
+    with _repository_lock:
+        if repository is None:
+            if STORAGE_BACKEND == "sqlite":
+                repository = SQLiteRepository(SQLITE_PATH)
+            elif STORAGE_BACKEND == "supabase":
+                repository = SupabaseRepository(get_supabase)
+            else:
+                raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+        return repository
+
+_query_pool = None
+_query_pool_lock = threading.Lock()
+
+def gather_queries(queries, timeout=None):
+    """Run independent queries concurrently and return them together.
+
+    ``queries`` maps a name to a zero-argument callable, e.g.
+    ``{"accounts": partial(fetch_accounts, user_id)}``. Each runs on a
+    process-wide thread pool in a copy of the caller's context (so per-rerun
+    call tracking still sees it). Returns ``(results, errors)``, both keyed
+    by name: a query that raised or missed ``timeout`` has result None and
+    its exception in ``errors``, without affecting the others.
+    """
+    global _query_pool
+    with _query_pool_lock:
+        if _query_pool is None:
+            _query_pool = ThreadPoolExecutor(max_workers=DB_QUERY_WORKERS, thread_name_prefix="db-query")
+
+    futures = {
+        name: _query_pool.submit(contextvars.copy_context().run, query)
+        for name, query in queries.items()
+    }
+    deadline = None if timeout is None else time.monotonic() + timeout
+    results, errors = {}, {}
+    for name, future in futures.items():
+        try:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            results[name] = future.result(timeout=remaining)
+        except Exception as e:
+            print(f"Query {name} failed: {e}")
+            results[name] = None
+            errors[name] = e
+    return results, errors
+
+class DataCache:
+    """Process-wide LRU cache of query results, shared by all sessions.
+
+    Entries are keyed by ``(user_id, query name, parameters)``, expire after
+    ``ttl`` seconds and are evicted least-recently-used first once their
+    combined DataFrame size exceeds ``max_bytes``. Writes made through this
+    module invalidate the affected user's entries; the TTL bounds staleness
+    for writes made elsewhere. Each invalidation bumps the user's
+    generation, so a read that started before it is not cached after it.
+    """
+
+    def __init__(self, ttl=DATA_CACHE_TTL, max_bytes=DATA_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, nbytes, df)
+        self._generations = {}  # user_id -> invalidation count
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def generation(self, user_id):
+        """Read before a load and pass to ``put``, which drops results invalidated meanwhile"""
+        with self._lock:
+            return self._generations.get(str(user_id), 0)
+
+    def put(self, key, df, generation=None):
+        nbytes = int(df.memory_usage(deep=True).sum())
+        if self.ttl <= 0 or nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generations.get(key[0], 0):
+                return
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, nbytes, df)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        """Drop every cached result belonging to ``user_id``"""
+        with self._lock:
+            self._generations[str(user_id)] = self._generations.get(str(user_id), 0) + 1
+            for key in [key for key in self._entries if key[0] == str(user_id)]:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def _discard(self, key):
+        self._bytes -= self._entries.pop(key)[1]
+
+data_cache = DataCache()
+
+def _freeze(value):
+    """Turn query parameters into a hashable cache key component"""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+def _cached_query(func):
+    """Serve a per-user DataFrame query from ``data_cache``.
+
+    The wrapped function must take ``user_id`` as its first argument and raise
+    on failure, so errors are never cached. Callers get a copy they can mutate.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        user_id = str(params.pop("user_id"))
+        key = (user_id, func.__name__, _freeze(params))
+
+        df = data_cache.get(key)
+        if df is None:
+            generation = data_cache.generation(user_id)
+            df = func(*args, **kwargs)
+            data_cache.put(key, df, generation)
+        return df.copy()
+
+    return wrapper
+
+@traced()
+def insert_transaction(user_id, account_id, date, amount, t_type, desc, category_source="user"):
+    """Insert one transaction; ``category_source`` is "auto" when ``t_type`` was predicted"""
     data = {
         "user_id": user_id,
         "account_id": account_id,  # New field
         "date": date,
         "amount": amount,
         "type": t_type,
-        "description": desc
+        "description": desc,
+        "category_source": category_source
     }
     
     # Update the account balance after transaction
-    supabase.table("transactions").insert(data).execute()
-    update_account_balance(account_id)
+    get_repository().insert_transactions([data])
+    apply_balance_delta(account_id, amount)
+    apply_rollup_deltas([data])
+    data_cache.invalidate_user(user_id)
 
-def update_account_balance(account_id):
-    # Calculate new balance from transactions
-    query = f"""
-    UPDATE accounts 
-    SET balance = (
-        SELECT SUM(amount) 
-        FROM transactions 
-        WHERE account_id = '{account_id}'
+def _prepare_bulk_rows(user_id, account_id, df):
+    """Validate and normalize a statement DataFrame into insert payloads.
+
+    Column names are matched case-insensitively (``Date``/``date`` etc.).
+    Returns ``(payloads, errors)``: a list of ``(row_label, payload)`` for the
+    valid rows and a Series of error messages indexed like ``df``.
+    """
+    frame = df.rename(columns=lambda c: str(c).strip().lower())
+    errors = pd.Series(None, index=df.index, dtype=object)
+
+    missing = [col for col in ("date", "amount") if col not in frame.columns]
+    if missing:
+        errors[:] = f"Missing column(s): {', '.join(missing)}"
+        return [], errors
+
+    dates = pd.to_datetime(frame["date"], errors="coerce")
+    amounts = pd.to_numeric(frame["amount"], errors="coerce")
+    errors[dates.isna().to_numpy()] = "Invalid date"
+    errors[amounts.isna().to_numpy()] = "Invalid amount"
+
+    valid = errors.isna().to_numpy()
+    empty = pd.Series("", index=frame.index)
+    columns = {
+        "user_id": user_id,
+        "account_id": account_id,
+        "date": dates.dt.strftime("%Y-%m-%d"),
+        "amount": amounts.astype(float),
+        # A categorized statement's category takes precedence over Income/Expense
+        "type": frame.get("category", frame.get("type", empty)).fillna("").astype(str),
+        "description": frame.get("description", empty).fillna("").astype(str),
+        # Statement categories come from predict_categories, not the user
+        "category_source": "auto",
+    }
+    records = pd.DataFrame(columns, index=frame.index)[valid].to_dict("records")
+    return list(zip(df.index[valid], records)), errors
+
+DUPLICATE_ERROR = "Duplicate transaction"
+
+def transaction_fingerprints(account_id, dates, amounts, descriptions) -> pd.Series:
+    """Fingerprint per transaction: account, day, amount in cents and normalized description.
+
+    Descriptions are lowercased with runs of punctuation and whitespace
+    collapsed, so "UBER *TRIP" and "uber trip" match. Rows with an invalid
+    date or amount get a missing fingerprint.
+    """
+    dates = pd.to_datetime(pd.Series(dates), errors="coerce")
+    cents = (pd.to_numeric(pd.Series(amounts), errors="coerce") * 100).round().astype("Int64")
+    if descriptions is None:
+        descriptions = [""] * len(dates)
+    text = (
+        pd.Series(descriptions).fillna("").astype(str).str.lower()
+        .str.replace(r"[^0-9a-z]+", " ", regex=True).str.strip()
     )
-    WHERE id = '{account_id}'
+    fingerprints = (f"{account_id}|" + dates.dt.strftime("%Y-%m-%d") + "|"
+                    + cents.astype(str) + "|" + text.to_numpy())
+    return fingerprints.where(dates.notna().to_numpy() & cents.notna().to_numpy())
+
+def flag_duplicates(user_id, account_id, df, source_column=None, use_cache=True) -> pd.Series:
+    """Mark rows of a statement that are already in the account's ledger.
+
+    The account's transactions in the statement's date range are fetched
+    once and counted by fingerprint in a hash map, so a row is a duplicate
+    when its fingerprint has already been seen as often as it occurs here
+    (two identical coffees on one day stay distinct). With ``source_column``
+    rows from earlier sources (e.g. an overlapping statement in the same
+    upload) count as seen too. Returns a boolean Series indexed like ``df``.
+    Imports pass ``use_cache=False`` so the ledger is read fresh, never from
+    a cached result that predates a recent write.
     """
-    supabase.rpc('execute_sql', {'query': query}).execute()
+    frame = df.rename(columns=lambda c: str(c).strip().lower())
+    duplicates = pd.Series(False, index=df.index)
+    if frame.empty or "date" not in frame.columns or "amount" not in frame.columns:
+        return duplicates
 
-def fetch_transactions(user_id):
-    try:
-        response = supabase.table("transactions").select("*").eq("user_id", user_id).execute()
-        data = response.data
+    fingerprints = transaction_fingerprints(
+        account_id, frame["date"].to_numpy(), frame["amount"].to_numpy(),
+        frame["description"].to_numpy() if "description" in frame.columns else None
+    )
+    fingerprints.index = df.index
+    dates = pd.to_datetime(frame["date"], errors="coerce")
+    if dates.isna().all():
+        return duplicates
+
+    existing = fetch_transactions(
+        user_id, start_date=dates.min(), end_date=dates.max(),
+        account_ids=[account_id], columns=["date", "amount", "description"], use_cache=use_cache
+    )
+    seen = Counter()
+    if not existing.empty:
+        seen.update(transaction_fingerprints(
+            account_id, existing["date"], existing["amount"], existing["description"]
+        ).dropna())
+
+    sources = frame[source_column.lower()] if source_column and source_column.lower() in frame.columns else None
+    groups = fingerprints.groupby(sources.to_numpy(), sort=False) if sources is not None else [(None, fingerprints)]
+    for _, group in groups:
+        group = group.dropna()
+        occurrence = group.groupby(group).cumcount()
+        duplicates[group.index] = (occurrence < group.map(seen).fillna(0)).to_numpy()
+        for fingerprint, count in group.value_counts().items():
+            seen[fingerprint] = max(seen[fingerprint], count)
+    return duplicates
+
+@traced()
+def insert_transactions_bulk(user_id, account_id, df, chunk_size=None, skip_duplicates=False):
+    """Insert a statement's transactions in multi-row batches.
+
+    The DataFrame is validated once, valid rows are inserted ``chunk_size`` at a
+    time and the summed amount of the inserted rows is applied to every touched
+    account's balance once at the end. If a batch is rejected, its rows are retried one by one so a single
+    bad row does not fail its neighbours.
+
+    The import is not atomic: each batch (or retried row) commits on its own,
+    so an import can partly succeed, and the balance and rollup updates run
+    afterwards for the rows that made it in. The returned ``success`` column
+    says which rows those are; a failure after the inserts (e.g. in the
+    balance update) leaves them in place and is fixed by
+    ``reconcile_account_balances``/``reconcile_rollups`` with ``fix=True``.
+
+    With ``skip_duplicates`` rows flagged by ``flag_duplicates`` (using a
+    ``Source`` column when present) are not inserted and fail with
+    ``DUPLICATE_ERROR``.
+
+    Returns a DataFrame indexed like ``df`` with ``success`` and ``error``
+    columns.
+    """
+    chunk_size = chunk_size or BULK_INSERT_CHUNK_SIZE
+    # Work on positions so duplicate index labels can't collide
+    positional = df.reset_index(drop=True)
+    payloads, errors = _prepare_bulk_rows(user_id, account_id, positional)
+    if skip_duplicates:
+        duplicates = flag_duplicates(user_id, account_id, positional, source_column="Source", use_cache=False)
+        errors[duplicates.to_numpy()] = DUPLICATE_ERROR
+        payloads = [(label, payload) for label, payload in payloads if not duplicates[label]]
+    success = pd.Series(False, index=errors.index)
+    balance_deltas = {}
+    inserted = []
+
+    for start in range(0, len(payloads), chunk_size):
+        chunk = payloads[start:start + chunk_size]
+        try:
+            get_repository().insert_transactions([payload for _, payload in chunk])
+            success[[label for label, _ in chunk]] = True
+            inserted.extend(payload for _, payload in chunk)
+            for _, payload in chunk:
+                balance_deltas[payload["account_id"]] = balance_deltas.get(payload["account_id"], 0) + payload["amount"]
+        except Exception as e:
+            print(f"Bulk insert failed, retrying rows individually: {e}")
+            for label, payload in chunk:
+                try:
+                    get_repository().insert_transactions([payload])
+                    success[label] = True
+                    inserted.append(payload)
+                    balance_deltas[payload["account_id"]] = balance_deltas.get(payload["account_id"], 0) + payload["amount"]
+                except Exception as row_error:
+                    errors[label] = str(row_error)
+
+    for touched_account, delta in balance_deltas.items():
+        apply_balance_delta(touched_account, delta)
+    apply_rollup_deltas(inserted)
+    if inserted:
+        data_cache.invalidate_user(user_id)
+
+    results = pd.DataFrame({"success": success, "error": errors})
+    results.index = df.index
+    return results
+
+def apply_balance_delta(account_id, delta):
+    """Add the signed ``delta`` to an account's stored balance.
+
+    Runs as a single parameterized UPDATE in the backend, so a write costs the
+    same no matter how long the account's history is. See
+    ``supabase/migrations`` for the SQL functions used on Supabase.
+    """
+    if not delta:
+        return
+    get_repository().apply_balance_delta(account_id, delta)
+
+def update_account_balance(account_id):
+    """Recompute an account's balance from its opening balance and full ledger"""
+    get_repository().recompute_account_balance(account_id)
+
+def apply_rollup_deltas(transactions):
+    """Add newly inserted transactions (insert payload dicts) to the dashboard rollup cube.
+
+    The rows are aggregated into (user, account, category, day) cells first,
+    so a whole import is one upsert of at most a few cells per day.
+    """
+    if not transactions:
+        return
+    get_repository().apply_rollup_deltas(rollup_cells(pd.DataFrame(transactions)))
+
+def rebuild_rollups(user_id=None):
+    """Recompute the rollup cube from the ledger, for one user or everyone"""
+    get_repository().rebuild_rollups(user_id)
+    if user_id is not None:
+        data_cache.invalidate_user(user_id)
+    else:
+        data_cache.clear()
+
+def reconcile_rollups(user_id=None, fix=False, tolerance=0.005):
+    """Check the rollup cube against the transaction ledger.
+
+    Returns a DataFrame of the cells whose income, expense or count differ
+    (``cube_*`` and ``ledger_*`` columns). With ``fix=True`` the cube of
+    every affected user is rebuilt.
+    """
+    drifted = get_repository().rollup_drift(user_id, tolerance=tolerance)
+    if fix:
+        for drifted_user in drifted["user_id"].unique():
+            rebuild_rollups(drifted_user)
+    return drifted.reset_index(drop=True)
+
+def reconcile_account_balances(user_id=None, fix=False, tolerance=0.005):
+    """Check stored balances against the transaction ledger.
+
+    Compares each account's ``balance`` with ``opening_balance + SUM(amount)``
+    for one user, or for every account when ``user_id`` is None. With
+    ``fix=True`` drifted accounts are recomputed from the ledger.
+
+    Returns a DataFrame of the drifted accounts with ``balance``,
+    ``ledger_balance`` and ``drift`` columns.
+    """
+    accounts_df = get_repository().accounts(user_id, columns=["id", "user_id", "name", "balance"])
+    ledger_df = get_repository().ledger_balances(user_id)
+
+    report = accounts_df.merge(ledger_df, left_on="id", right_on="account_id", how="left")
+    report["balance"] = pd.to_numeric(report["balance"], errors="coerce").fillna(0.0)
+    report["ledger_balance"] = pd.to_numeric(report["ledger_balance"], errors="coerce").fillna(0.0)
+    report["drift"] = report["balance"] - report["ledger_balance"]
+    drifted = report.loc[report["drift"].abs() > tolerance,
+                         ["id", "user_id", "name", "balance", "ledger_balance", "drift"]]
+
+    if fix:
+        for account_id, account_user in zip(drifted["id"], drifted["user_id"]):
+            update_account_balance(account_id)
+            data_cache.invalidate_user(account_user)
+
+    return drifted.reset_index(drop=True)
+
+# Canonical column types of the DataFrames returned by fetch_transactions and
+# fetch_accounts. Consumers can rely on these and should not re-parse:
+#   transactions: date -> datetime64[ns] (midnight), amount -> float64 (dollars,
+#                 never NaN), type/account_id -> category, description -> str
+#   accounts:     balance/opening_balance -> float64, created_at -> datetime64[ns, UTC],
+#                 type/currency -> category
+TRANSACTION_CATEGORICALS = ["type", "account_id", "category_source"]
+ACCOUNT_CATEGORICALS = ["type", "currency"]
+
+@traced()
+def apply_transaction_schema(df):
+    """Coerce a raw transactions DataFrame to the canonical schema.
+
+    Rows whose date or amount can't be parsed are dropped (and reported)
+    rather than carried along as NaT/NaN.
+    """
+    invalid = pd.Series(False, index=df.index)
+    if 'amount' in df.columns:
+        df['amount'] = pd.to_numeric(df['amount'], errors='coerce').astype('float64')
+        invalid |= df['amount'].isna()
+    
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.normalize()
+        invalid |= df['date'].isna()
+    
+    if invalid.any():
+        print(f"Dropping {int(invalid.sum())} transaction(s) with an invalid date or amount")
+        df = df[~invalid].reset_index(drop=True)
         
-        # Convert to DataFrame and clean types
-        if data:
-            df = pd.DataFrame(data)
-            
-            # Ensure proper column types
-            if 'amount' in df.columns:
-                df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
-            
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.date
-                
-            # Ensure string columns are actually strings (not None/NaN)
-            for col in ['type', 'description']:
-                if col in df.columns:
-                    df[col] = df[col].fillna('').astype(str)
-                    
-            return df
+    # Ensure string columns are actually strings (not None/NaN)
+    if 'description' in df.columns:
+        df['description'] = df['description'].fillna('').astype(str)
+    for col in TRANSACTION_CATEGORICALS:
+        if col in df.columns:
+            if col == 'type':
+                df[col] = df[col].fillna('')
+            df[col] = df[col].astype('category')
+    return df
+
+def apply_rollup_schema(df):
+    """Coerce raw rollup cube cells: ``day`` -> datetime64, sums -> float64, ``count`` -> int64"""
+    df["day"] = pd.to_datetime(df["day"]).dt.normalize()
+    for col in ["income", "expense"]:
+        df[col] = pd.to_numeric(df[col]).astype("float64")
+    df["count"] = pd.to_numeric(df["count"]).astype("int64")
+    for col in ["account_id", "category"]:
+        df[col] = df[col].astype("category")
+    return df
+
+def apply_account_schema(df):
+    """Coerce a raw accounts DataFrame to the canonical schema"""
+    for col in ['balance', 'opening_balance']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0).astype('float64')
+    if 'created_at' in df.columns:
+        df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce', utc=True)
+    for col in ACCOUNT_CATEGORICALS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+def _format_date(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+def iter_transaction_pages(user_id, start_date=None, end_date=None, account_ids=None,
+                           sign=None, columns=None, page_size=None):
+    """Stream a user's transactions as DataFrames of at most ``page_size`` rows.
+
+    Filters are sent to the backend: an inclusive ``start_date``/``end_date``
+    range, a list of ``account_ids`` and ``sign`` (``"income"`` for positive
+    amounts, ``"expense"`` for negative ones). ``columns`` limits the selected
+    columns. Pages are read in ``(date, id)`` keyset order.
+    """
+    pages = get_repository().transaction_pages(
+        user_id,
+        start_date=_format_date(start_date) if start_date is not None else None,
+        end_date=_format_date(end_date) if end_date is not None else None,
+        account_ids=list(account_ids) if account_ids is not None else None,
+        sign=sign,
+        columns=list(columns) if columns else None,
+        page_size=page_size or TRANSACTIONS_PAGE_SIZE
+    )
+    for df in pages:
+        yield apply_transaction_schema(df)
+
+def _pull_transaction_changes(user_id, since=None):
+    """All of a user's transactions updated at or after ``since`` (everything if None)"""
+    pages = list(get_repository().transaction_changes(user_id, since, page_size=TRANSACTIONS_PAGE_SIZE))
+    if not pages:
         return pd.DataFrame()
+    df = apply_transaction_schema(pd.concat(pages, ignore_index=True))
+    df["updated_at"] = pd.to_datetime(df["updated_at"], utc=True)
+    return df
+
+def _count_transactions(user_id):
+    return get_repository().count_transactions(user_id)
+
+ledger_mirror = LedgerMirror(
+    LEDGER_MIRROR_DIR,
+    pull_changes=_pull_transaction_changes,
+    count_remote=_count_transactions,
+    max_bytes=LEDGER_MIRROR_MAX_BYTES,
+    resync_interval=LEDGER_MIRROR_RESYNC_SECONDS
+) if LEDGER_MIRROR_DIR else None
+
+def _filter_transactions(df, start_date=None, end_date=None, account_ids=None,
+                         sign=None, columns=None):
+    """Apply fetch_transactions' filters locally, e.g. to the ledger mirror"""
+    if df.empty:
+        return df
+    mask = pd.Series(True, index=df.index)
+    if start_date is not None:
+        mask &= df["date"] >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= df["date"] <= pd.Timestamp(end_date)
+    if account_ids is not None:
+        mask &= df["account_id"].isin(list(account_ids))
+    if sign == "income":
+        mask &= df["amount"] > 0
+    elif sign == "expense":
+        mask &= df["amount"] < 0
+
+    df = df[mask].sort_values(["date", "id"], ignore_index=True)
+    if columns:
+        df = df[list(columns)]
+    return apply_transaction_schema(df)
+
+@_cached_query
+def _load_transactions(user_id, start_date=None, end_date=None, account_ids=None,
+                       sign=None, columns=None):
+    if ledger_mirror is not None:
+        return _filter_transactions(
+            ledger_mirror.read(user_id),
+            start_date=start_date,
+            end_date=end_date,
+            account_ids=account_ids,
+            sign=sign,
+            columns=columns
+        )
+
+    pages = list(iter_transaction_pages(
+        user_id,
+        start_date=start_date,
+        end_date=end_date,
+        account_ids=account_ids,
+        sign=sign,
+        columns=columns
+    ))
+    if pages:
+        # Re-apply the schema so categories are unified across pages
+        return apply_transaction_schema(pd.concat(pages, ignore_index=True))
+    return pd.DataFrame()
+
+@traced()
+def fetch_transactions(user_id, start_date=None, end_date=None, account_ids=None,
+                       sign=None, columns=None, raise_errors=False, use_cache=True):
+    """Fetch a user's transactions as one DataFrame.
+
+    Accepts the same filters as ``iter_transaction_pages`` and reads every page.
+    Results are served from the shared ``data_cache`` when fresh, unless
+    ``use_cache`` is False (then the backend is always read). A failed
+    load returns an empty DataFrame unless ``raise_errors`` is set (e.g. under
+    ``gather_queries``, which reports each query's error).
+    """
+    load = _load_transactions if use_cache else _load_transactions.__wrapped__
+    try:
+        return load(
+            user_id,
+            start_date=start_date,
+            end_date=end_date,
+            account_ids=account_ids,
+            sign=sign,
+            columns=columns
+        )
     except Exception as e:
         print(f"Error fetching transactions: {e}")
+        if raise_errors:
+            raise
         return pd.DataFrame()
 
+@_cached_query
+def _load_rollup(user_id, start_date=None, end_date=None, account_ids=None):
+    return apply_rollup_schema(get_repository().rollup_cells(
+        user_id,
+        start_date=_format_date(start_date) if start_date is not None else None,
+        end_date=_format_date(end_date) if end_date is not None else None,
+        account_ids=list(account_ids) if account_ids is not None else None
+    ))
+
+@traced()
+def fetch_rollup(user_id, start_date=None, end_date=None, account_ids=None, raise_errors=False):
+    """A user's rollup cube cells for an inclusive date range and optional accounts.
+
+    Columns are ``account_id``, ``category``, ``day``, ``income``, ``expense``
+    (positive) and ``count``; the ``analytics.rollup_*`` functions turn them
+    into the dashboard's totals, period summaries and category breakdowns.
+    Errors are handled as in ``fetch_transactions``.
+    """
+    try:
+        return _load_rollup(user_id, start_date=start_date, end_date=end_date, account_ids=account_ids)
+    except Exception as e:
+        print(f"Error fetching rollup: {e}")
+        if raise_errors:
+            raise
+        return apply_rollup_schema(pd.DataFrame(columns=["account_id", "category", "day",
+                                                         "income", "expense", "count"]))
+
 def create_account(user_id, account_name, account_type, initial_balance=0, currency="USD"):
     try:
         # Just create the account directly, profiles check removed
@@ -71,23 +698,98 @@ def create_account(user_id, account_name, account_type, initial_balance=0, curre
             "name": account_name,
             "type": account_type,
             "balance": initial_balance,
+            "opening_balance": initial_balance,
             "currency": currency
         }
-        return supabase.table("accounts").insert(data).execute()
+        created = get_repository().insert_account(data)
+        data_cache.invalidate_user(user_id)
+        return created
     except Exception as e:
         print(f"Error in create_account: {e}")
         raise e
 
-def fetch_accounts(user_id):
+@_cached_query
+def _load_accounts(user_id):
+    df = get_repository().accounts(user_id)
+    if not df.empty:
+        return apply_account_schema(df)
+    return pd.DataFrame()
+
+@traced()
+def fetch_accounts(user_id, raise_errors=False):
+    """A user's accounts; errors are handled as in ``fetch_transactions``"""
     try:
-        response = supabase.table("accounts").select("*").eq("user_id", user_id).execute()
-        if response.data:
-            df = pd.DataFrame(response.data)
-            # Clean types as needed
-            if 'balance' in df.columns:
-                df['balance'] = pd.to_numeric(df['balance'], errors='coerce')
-            return df
-        return pd.DataFrame()
+        return _load_accounts(user_id)
     except Exception as e:
         print(f"Error fetching accounts: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        if raise_errors:
+            raise
+        return pd.DataFrame()
+
+@_cached_query
+def _load_category_rules(user_id):
+    return get_repository().category_rules(user_id)
+
+@traced()
+def fetch_category_rules(user_id):
+    """The user's own categorization rules (``keyword``, ``category``, ``priority``)"""
+    try:
+        return _load_category_rules(user_id)
+    except Exception as e:
+        print(f"Error fetching category rules: {e}")
+        return pd.DataFrame(columns=["keyword", "category", "priority"])
+
+category_models = CategoryModels(_pull_transaction_changes)
+
+@traced()
+def predict_categories(user_id, descriptions):
+    """Category for every description in one batch, indexed like ``descriptions``.
+
+    The user's own rules win; otherwise the model trained on the user's
+    labeled history is used where it is confident, and the built-in keyword
+    rules fill in the rest.
+    """
+    explicit = Categorizer(fetch_category_rules(user_id).to_dict("records"), default=None).categorize(descriptions)
+    categories = default_categorizer.categorize(descriptions)
+    try:
+        model = category_models.model(user_id)
+        if model.size >= CATEGORY_MODEL_MIN_HISTORY:
+            predicted = model.predict(descriptions)
+            confident = (predicted["confidence"] >= CATEGORY_MODEL_MIN_CONFIDENCE).to_numpy()
+            categories[confident] = predicted["category"].to_numpy()[confident]
+    except Exception as e:
+        print(f"Error predicting categories from history: {e}")
+    return explicit.where(explicit.notna(), categories)
+
+if __name__ == "__main__":
+    # Reconciliation entry point, e.g. from cron: python database.py --fix
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reconcile account balances against the ledger")
+    parser.add_argument("--user", help="Only check this user's accounts")
+    parser.add_argument("--fix", action="store_true", help="Recompute drifted balances")
+    parser.add_argument("--rollups", action="store_true",
+                        help="Check the dashboard rollup cube instead (--fix rebuilds drifted users)")
+    parser.add_argument("--rebuild-rollups", action="store_true",
+                        help="Rebuild the dashboard rollup cube from the ledger")
+    args = parser.parse_args()
+
+    if args.rebuild_rollups:
+        rebuild_rollups(args.user)
+        print("Rollup cube rebuilt.")
+        raise SystemExit
+    if args.rollups:
+        drifted = reconcile_rollups(user_id=args.user, fix=args.fix)
+        if drifted.empty:
+            print("The rollup cube matches the ledger.")
+        else:
+            print(drifted.to_string(index=False))
+            print(f"{len(drifted)} cell(s) drifted{' and were rebuilt' if args.fix else ''}.")
+        raise SystemExit
+
+    drifted = reconcile_account_balances(user_id=args.user, fix=args.fix)
+    if drifted.empty:
+        print("All account balances match the ledger.")
+    else:
+        print(drifted.to_string(index=False))
+        print(f"{len(drifted)} account(s) drifted{' and were recomputed' if args.fix else ''}.")
@@ -0,0 +1,160 @@
+import time
+import random
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+import httpx
+from tracing import record_span
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient
+
+# Methods that can be repeated safely, and responses worth repeating them for
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+_call_scope = ContextVar("db_call_scope", default=None)
+
+class CallStats:
+    """Count and latency of HTTP calls, in total and per ``METHOD /path``"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, endpoint, seconds, error=False, retries=0):
+        with self._lock:
+            self.calls += 1
+            self.seconds += seconds
+            self.errors += int(error)
+            self.retries += retries
+            count, total, slowest = self.endpoints.get(endpoint, (0, 0.0, 0.0))
+            self.endpoints[endpoint] = (count + 1, total + seconds, max(slowest, seconds))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "seconds": self.seconds,
+                "endpoints": {
+                    endpoint: {"count": count, "seconds": total, "max_seconds": slowest}
+                    for endpoint, (count, total, slowest) in self.endpoints.items()
+                },
+            }
+
+    def reset(self):
+        with self._lock:
+            self.calls = self.errors = self.retries = 0
+            self.seconds = 0.0
+            self.endpoints = {}
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """Retries idempotent requests with jittered backoff and records every call.
+
+    A GET/HEAD that fails to connect, times out or gets a retryable status is
+    sent again up to ``retries`` times, sleeping a random time of up to
+    ``backoff * 2 ** attempt`` seconds before each attempt. Writes are never
+    retried, since the backend may have applied them.
+    """
+
+    def __init__(self, inner, stats, retries=3, backoff=0.25, max_backoff=5.0):
+        self.inner = inner
+        self.stats = stats
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def handle_request(self, request):
+        endpoint = f"{request.method} {request.url.path}"
+        attempts = self.retries + 1 if request.method in IDEMPOTENT_METHODS else 1
+        start = time.perf_counter()
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))))
+            try:
+                response = self.inner.handle_request(request)
+            except httpx.TransportError:
+                if attempt + 1 < attempts:
+                    continue
+                self._record(endpoint, start, error=True, retries=attempt)
+                raise
+            if response.status_code in RETRY_STATUSES and attempt + 1 < attempts:
+                response.close()
+                continue
+            self._record(endpoint, start, error=response.status_code >= 400, retries=attempt)
+            return response
+
+    def _record(self, endpoint, start, error, retries):
+        seconds = time.perf_counter() - start
+        self.stats.record(endpoint, seconds, error, retries)
+        record_span(f"supabase {endpoint}", seconds, error)
+        scope = _call_scope.get()
+        if scope is not None:
+            scope.record(endpoint, seconds, error, retries)
+
+    def close(self):
+        self.inner.close()
+
+class _PooledPostgrestClient(SyncPostgrestClient):
+    def __init__(self, base_url, *, transport, limits, **kwargs):
+        self._transport = transport
+        self._limits = limits
+        super().__init__(base_url, **kwargs)
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return SyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            follow_redirects=True,
+            transport=self._transport,
+            limits=self._limits,
+        )
+
+class DataClient:
+    """Supabase REST (PostgREST) client shared by every session in the process.
+
+    One keep-alive connection pool of ``pool_size`` connections serves all
+    calls; ``timeout`` bounds each request and ``connect_timeout`` opening a
+    connection. Reads are retried as described in ``InstrumentedTransport``
+    and every call's latency is counted in ``stats``. Exposes the ``table``
+    and ``rpc`` builders of the Supabase client.
+    """
+
+    def __init__(self, url, key, pool_size=10, timeout=10.0, connect_timeout=5.0,
+                 retries=3, backoff=0.25, transport=None):
+        self.stats = CallStats()
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        inner = transport or httpx.HTTPTransport(limits=limits)
+        self._rest = _PooledPostgrestClient(
+            f"{url.rstrip('/')}/rest/v1",
+            headers={"apiKey": key, "Authorization": f"Bearer {key}",
+                     "Accept": "application/json", "Content-Type": "application/json"},
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            transport=InstrumentedTransport(inner, self.stats, retries=retries, backoff=backoff),
+            limits=limits,
+        )
+
+    def table(self, name):
+        return self._rest.table(name)
+
+    def rpc(self, func, params=None):
+        return self._rest.rpc(func, params or {})
+
+    @contextmanager
+    def track(self):
+        """Count only the calls made inside this block (e.g. one Streamlit rerun).
+
+        Yields a ``CallStats`` for the calls made from the current thread or
+        context; the process-wide ``stats`` keep counting as usual.
+        """
+        scope = CallStats()
+        token = _call_scope.set(scope)
+        try:
+            yield scope
+        finally:
+            _call_scope.reset(token)
+
+    def close(self):
+        self._rest.aclose()
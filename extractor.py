@@ -1,10 +1,18 @@
-import fitz  # PyMuPDF
 import pandas as pd
 import os
 import json
-import google.generativeai as genai
+import threading
+import multiprocessing
+import time
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator
 from dotenv import load_dotenv
 import re
+from statement_cache import StatementCache
+from tracing import span, traced
 
 load_dotenv()
 
@@ -12,18 +20,125 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GOOGLE_PROJECT_ID = os.getenv("GOOGLE_PROJECT_ID")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
 
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel(GEMINI_MODEL)
+# Documents with at least this many pages are split across a process pool
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "50"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+# Separates pages in the text handed to later stages
+PAGE_BREAK = "\f"
 
+# LLM extraction: chunk size in characters (~4 per token), parallel requests,
+# retries per chunk with exponential backoff, and rows compared at chunk edges
+LLM_CHUNK_CHARS = int(os.getenv("LLM_CHUNK_CHARS", "12000"))
+LLM_CHUNK_OVERLAP_LINES = int(os.getenv("LLM_CHUNK_OVERLAP_LINES", "2"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "1.0"))
+LLM_BOUNDARY_WINDOW = 3
+# Part of the parse cache key: bump whenever build_prompt or the layout parser changes
+PROMPT_VERSION = "2"
+
+statement_cache = StatementCache()
+
+# The Gemini SDK is imported and configured on first use, not at import
+model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """The process-wide Gemini model"""
+    global model
+    with _model_lock:
+        if model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=GOOGLE_API_KEY)
+            model = genai.GenerativeModel(GEMINI_MODEL)
+        return model
+
+_pdf_pool = None
+_pdf_pool_size = 0
+_pdf_pool_lock = threading.Lock()
+
+def _get_pdf_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by all sessions, started on first use.
+
+    Uses "spawn" so workers never fork the Streamlit server's threads. The
+    pool is only rebuilt if a caller asks for more workers than it has.
+    """
+    global _pdf_pool, _pdf_pool_size
+    with _pdf_pool_lock:
+        if _pdf_pool is None or _pdf_pool_size < workers:
+            if _pdf_pool is not None:
+                _pdf_pool.shutdown(wait=False)
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _pdf_pool_size = workers
+        return _pdf_pool
+
+def _open_pdf(source):
+    import fitz  # PyMuPDF, loaded with the first PDF
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+def _pdf_source(file):
+    """A path or the bytes of an upload, whichever can be reopened by workers"""
+    if isinstance(file, (str, os.PathLike)):
+        return os.fspath(file)
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if hasattr(file, "getvalue"):  # Streamlit UploadedFile / BytesIO
+        return file.getvalue()
+    return file.read()
+
+def _extract_page_range(source, start: int, stop: int) -> list[str]:
+    doc = _open_pdf(source)
+    try:
+        return [doc[number].get_text() for number in range(start, stop)]
+    finally:
+        doc.close()
+
+def iter_pdf_pages(file, workers: int | None = None) -> Iterator[str]:
+    """Yield the text of each page of a PDF, in page order.
+
+    ``file`` may be a path, bytes or a file-like upload. Documents with at
+    least ``PDF_PARALLEL_MIN_PAGES`` pages are split into page ranges that are
+    extracted across the shared process pool; pages are still yielded in
+    order as soon as their range is done.
+    """
+    source = _pdf_source(file)
+    workers = workers or PDF_WORKERS
+    doc = _open_pdf(source)
+    page_count = doc.page_count
+
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        try:
+            for page in doc:
+                yield page.get_text()
+        finally:
+            doc.close()
+        return
+
+    doc.close()
+    # A few ranges per worker keeps the pool busy while early pages stream out
+    step = -(-page_count // (workers * 4))
+    pool = _get_pdf_pool(workers)
+    futures = [pool.submit(_extract_page_range, source, start, min(start + step, page_count))
+               for start in range(0, page_count, step)]
+    for future in futures:
+        yield from future.result()
+
+def extract_pages_from_pdf(file, workers: int | None = None) -> list[str]:
+    """Text of every page of a PDF"""
+    return list(iter_pdf_pages(file, workers=workers))
+
+@traced()
 def extract_text_from_pdf(file) -> str:
-    doc = fitz.open(stream=file.read(), filetype="pdf")
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
+    """Text of a whole PDF, with pages separated by ``PAGE_BREAK``"""
+    return PAGE_BREAK.join(iter_pdf_pages(file))
 
-def extract_transactions_with_llm(text: str) -> pd.DataFrame:
-    prompt = f"""
+def build_prompt(text: str) -> str:
+    return f"""
 You are a financial assistant. Extract structured transaction data from the bank statement text below.
 Each transaction should include the following fields: Date, Amount, Type (Income/Expense), and Description.
 Return the result as a JSON list of objects.
@@ -32,26 +147,477 @@ Bank Statement Text:
 {text}
     """
 
+def _split_long_page(page: str, max_chars: int, overlap_lines: int) -> list[str]:
+    """Split one oversized page on line boundaries, repeating a few lines
+    across each cut so a transaction spanning it is seen whole at least once"""
+    lines = page.splitlines(keepends=True)
+    parts, current, size = [], [], 0
+    for line in lines:
+        if current and size + len(line) > max_chars:
+            parts.append("".join(current))
+            current = current[-overlap_lines:] if overlap_lines else []
+            size = sum(len(kept) for kept in current)
+        current.append(line)
+        size += len(line)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+def _statement_chunks(text: str, max_chars: int, overlap_lines: int) -> list[tuple[str, bool]]:
+    """``(chunk, overlaps_previous)`` pairs; only the parts of a cut page overlap"""
+    chunks, current = [], ""
+    for page in text.split(PAGE_BREAK):
+        if not page.strip():
+            continue
+        if len(page) > max_chars:
+            if current:
+                chunks.append((current, False))
+                current = ""
+            parts = _split_long_page(page, max_chars, overlap_lines)
+            chunks.extend((part, number > 0 and overlap_lines > 0) for number, part in enumerate(parts))
+        elif current and len(current) + len(page) + 1 > max_chars:
+            chunks.append((current, False))
+            current = page
+        else:
+            current = f"{current}\n{page}" if current else page
+    if current:
+        chunks.append((current, False))
+    return chunks
+
+def chunk_statement_text(text: str, max_chars: int | None = None,
+                         overlap_lines: int | None = None) -> list[str]:
+    """Split statement text into chunks of at most ~``max_chars`` characters.
+
+    Whole pages (separated by ``PAGE_BREAK``) are packed together; only pages
+    that are too large on their own are cut, on line boundaries.
+    """
+    max_chars = max_chars or LLM_CHUNK_CHARS
+    overlap_lines = LLM_CHUNK_OVERLAP_LINES if overlap_lines is None else overlap_lines
+    return [chunk for chunk, _ in _statement_chunks(text, max_chars, overlap_lines)]
+
+def _parse_llm_response(content: str) -> list[dict]:
+    content = content.strip()
+
+    # Remove Markdown code block if present
+    if content.startswith("```"):
+        content = re.sub(r"^```[a-zA-Z]*\n?", "", content)  # Remove opening ```
+        content = re.sub(r"\n?```$", "", content)           # Remove closing ```
+        content = content.strip()
+
+    if not content:
+        print("Gemini response was empty!")
+        return []
+    data = json.loads(content)
+    if isinstance(data, dict):
+        data = [data]
+    return data
+
+def _extract_chunk(llm, chunk: str, retries: int) -> list[dict]:
+    """Send one chunk to the model, retrying failed calls and unparseable replies"""
+    for attempt in range(retries + 1):
+        try:
+            with span("gemini.generate_content"):
+                response = llm.generate_content(build_prompt(chunk))
+            return _parse_llm_response(response.text)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            print(f"Gemini chunk failed (attempt {attempt + 1}), retrying: {e}")
+            time.sleep(LLM_RETRY_BACKOFF * 2 ** attempt)
+
+def _row_key(row: dict) -> tuple:
+    """Identity of an extracted transaction for boundary de-duplication"""
+    lowered = {str(key).lower(): value for key, value in row.items()}
+    amount = lowered.get("amount")
     try:
-        response = model.generate_content(prompt)
-        content = response.text.strip()
-        print("Gemini raw response:", content)
-
-        # Remove Markdown code block if present
-        if content.startswith("```"):
-            content = re.sub(r"^```[a-zA-Z]*\n?", "", content)  # Remove opening ```
-            content = re.sub(r"\n?```$", "", content)           # Remove closing ```
-            content = content.strip()
-
-        if not content:
-            print("Gemini response was empty!")
-            return pd.DataFrame()
-        data = json.loads(content)
-        return pd.DataFrame(data)
-    except Exception as e:
-        print("Error parsing Gemini response:", e)
+        amount = round(float(amount), 2)
+    except (TypeError, ValueError):
+        pass
+    return (str(lowered.get("date", "")).strip(), amount,
+            " ".join(str(lowered.get("description", "")).lower().split()))
+
+def _merge_chunk_rows(chunk_rows: list[list[dict]], window: int, overlaps: list[bool]) -> list[dict]:
+    """Concatenate per-chunk results in statement order.
+
+    When ``overlaps[i]`` says chunk ``i`` repeats the last lines of chunk
+    ``i - 1`` (a page cut by ``_split_long_page``), its leading rows that
+    match one of the previous chunk's last ``window`` rows are dropped.
+    Chunks of whole pages never overlap, so identical transactions on either
+    side of a page break are kept.
+    """
+    merged, previous_tail = [], []
+    for rows, overlapping in zip(chunk_rows, overlaps):
+        tail = [_row_key(row) for row in previous_tail] if overlapping else []
+        start = 0
+        while start < min(window, len(rows)) and _row_key(rows[start]) in tail:
+            tail.remove(_row_key(rows[start]))
+            start += 1
+        merged.extend(rows[start:])
+        previous_tail = rows[-window:]
+    return merged
+
+def extract_transactions_with_llm(text: str, llm=None, max_chars: int | None = None,
+                                  concurrency: int | None = None,
+                                  retries: int | None = None) -> pd.DataFrame:
+    """Extract transactions from statement text with the LLM.
+
+    The text is split into page-aligned chunks of about ``max_chars``
+    characters that are sent concurrently, at most ``concurrency`` at a time,
+    each retried up to ``retries`` times. Results are merged back in
+    statement order with the duplicates from cut pages' overlapping lines
+    removed. ``llm`` is
+    any object with Gemini's ``generate_content(prompt).text`` interface and
+    defaults to the configured Gemini model.
+
+    Chunks that still fail are skipped; their numbers are listed in
+    ``df.attrs["failed_chunks"]``.
+    """
+    llm = llm or get_model()
+    retries = LLM_MAX_RETRIES if retries is None else retries
+    chunks = _statement_chunks(text, max_chars or LLM_CHUNK_CHARS, LLM_CHUNK_OVERLAP_LINES)
+    if not chunks:
         return pd.DataFrame()
 
-def parse_pdf(file) -> pd.DataFrame:
-    raw_text = extract_text_from_pdf(file)
-    return extract_transactions_with_llm(raw_text)
\ No newline at end of file
+    def run(chunk):
+        try:
+            return _extract_chunk(llm, chunk, retries)
+        except Exception as e:
+            print("Error parsing Gemini response:", e)
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(concurrency or LLM_CONCURRENCY, len(chunks))) as pool:
+        results = list(pool.map(run, [chunk for chunk, _ in chunks]))
+
+    failed = [number for number, rows in enumerate(results) if rows is None]
+    rows = _merge_chunk_rows([rows or [] for rows in results], LLM_BOUNDARY_WINDOW,
+                             [overlapping for _, overlapping in chunks])
+    df = pd.DataFrame(rows)
+    df.attrs["failed_chunks"] = failed
+    return df
+
+DEFAULT_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%d.%m.%Y",
+                        "%d %b %Y", "%d %B %Y", "%b %d, %Y", "%B %d, %Y")
+
+@dataclass
+class LayoutProfile:
+    """How to read one bank's statement layout without the LLM.
+
+    ``identifiers`` must all appear on the first page for the profile to be
+    tried (an empty tuple matches any statement). On each line the date is
+    read from the leading words and the amount from the trailing numbers:
+    ``amount_position`` picks which one (-1 for the last, -2 when a running
+    balance follows the amount). Words in ``debit_markers`` after the amount
+    make it negative. Lines whose whole description matches one of
+    ``skip_patterns`` (opening balances, totals) are summary rows, not
+    transactions. A parse is accepted when at least ``min_confidence`` of
+    the date-led lines (summary rows included) yield a transaction.
+
+    One of ``date_formats`` is used for the whole statement: the one under
+    which every date-led line parses. When several fit with different
+    results (e.g. DD/MM and MM/DD with no day above 12) the profile is not
+    used.
+
+    Profiles not tied to a bank must check the layout first:
+    ``require_header`` only reads lines below a "Date ... Amount" header
+    without a balance or debit/credit column, and ``require_debits`` rejects
+    parses without a single negative amount (unsigned amounts can't be told
+    apart from income).
+    """
+    name: str
+    identifiers: tuple[str, ...] = ()
+    date_formats: tuple[str, ...] = DEFAULT_DATE_FORMATS
+    amount_position: int = -1
+    debit_markers: tuple[str, ...] = ("DR", "DEBIT")
+    use_tables: bool = True
+    min_confidence: float = 0.9
+    min_rows: int = 1
+    require_header: bool = False
+    require_debits: bool = False
+    skip_patterns: tuple[str, ...] = (r"(opening|closing|starting|ending) balance",
+                                      r"(sub ?)?total", r"(balance )?(brought|carried) forward")
+    header_keywords: dict = field(default_factory=lambda: {
+        "date": ("date", "posted", "transaction date"),
+        "description": ("description", "details", "memo", "payee", "narrative"),
+        "amount": ("amount", "value"),
+        "debit": ("debit", "withdrawal", "withdrawals", "paid out"),
+        "credit": ("credit", "deposit", "deposits", "paid in"),
+        "balance": ("balance",),
+    })
+
+# Tried in order; the generic profile goes last so bank-specific ones win
+LAYOUT_PROFILES: list[LayoutProfile] = [
+    LayoutProfile(name="generic", require_header=True, require_debits=True),
+]
+
+def register_layout_profile(profile: LayoutProfile):
+    """Add a bank layout, tried before the profiles already registered"""
+    LAYOUT_PROFILES.insert(0, profile)
+
+# How many statements each extraction path handled in this process
+EXTRACTION_PATH_COUNTS = Counter()
+_extraction_counts_lock = threading.Lock()
+
+def _record_extraction_path(path: str):
+    with _extraction_counts_lock:
+        EXTRACTION_PATH_COUNTS[path] += 1
+
+_AMOUNT_RE = re.compile(r"^\(?[-+]?[$€£]?\(?[-+]?\d[\d,]*(\.\d+)?\)?-?$")
+
+def _parse_amount(token: str) -> float | None:
+    """Parse "1,234.56", "-$12.00", "(12.00)" or "12.00-" into a float"""
+    token = token.strip()
+    if not _AMOUNT_RE.match(token):
+        return None
+    negative = token.startswith(("-", "(")) or token.endswith(("-", ")")) or "-" in token[:3]
+    digits = re.sub(r"[^\d.]", "", token)
+    try:
+        value = float(digits)
+    except ValueError:
+        return None
+    return -value if negative else value
+
+_DATE_START_RE = re.compile(r"^(\d|[A-Za-z]{3})")
+
+def _parse_date(words: list[str], formats: tuple[str, ...]) -> tuple[str | None, int]:
+    """Parse a date from the first one to three words; returns (ISO date, words used)"""
+    if not words or not _DATE_START_RE.match(words[0]):
+        return None, 0
+    # Shorter prefixes of a multi-word date ("01", "01 May") never parse on their own
+    for count in (1, 2, 3):
+        if len(words) < count:
+            break
+        candidate = " ".join(words[:count])
+        for fmt in formats:
+            try:
+                return datetime.strptime(candidate, fmt).strftime("%Y-%m-%d"), count
+            except ValueError:
+                continue
+    return None, 0
+
+def _page_lines(page) -> list[list[str]]:
+    """Words of a page grouped into visual lines, left to right"""
+    words = sorted(page.get_text("words"), key=lambda w: ((w[1] + w[3]) / 2, w[0]))
+    lines, current, current_y = [], [], None
+    for x0, y0, x1, y1, text, *_ in words:
+        y = (y0 + y1) / 2
+        if current and abs(y - current_y) > max((y1 - y0) / 2, 1.0):
+            lines.append([word for _, word in sorted(current)])
+            current = []
+        if not current:
+            current_y = y
+        current.append((x0, text))
+    if current:
+        lines.append([word for _, word in sorted(current)])
+    return lines
+
+def _transaction_row(date: str, amount: float, description: str) -> dict:
+    return {
+        "Date": date,
+        "Amount": amount,
+        "Type": "Income" if amount > 0 else "Expense",
+        "Description": description.strip(),
+    }
+
+def _is_skipped(description: str, profile: LayoutProfile) -> bool:
+    """Whether the whole description is a summary row ("Opening balance", "Total")"""
+    description = " ".join(re.sub(r"[^a-z ]+", " ", description.lower()).split())
+    return any(re.fullmatch(pattern, description) for pattern in profile.skip_patterns)
+
+def _statement_date_format(doc, profile: LayoutProfile) -> str | None:
+    """The single date format that reads every date-led line, or None if it is ambiguous.
+
+    Formats are tried statement-wide rather than per line, so a DD/MM
+    statement never mixes in MM/DD readings of its days up to the 12th.
+    """
+    formats = list(profile.date_formats)
+    if len(formats) == 1:
+        return formats[0]
+    readings = {fmt: [] for fmt in formats}
+    for page in doc:
+        for words in _page_lines(page):
+            parsed = {fmt: _parse_date(words, (fmt,)) for fmt in formats}
+            if all(date is None for date, _ in parsed.values()):
+                continue
+            for fmt, (date, _) in parsed.items():
+                if readings[fmt] is None:
+                    continue
+                if date is None:
+                    readings[fmt] = None
+                else:
+                    readings[fmt].append(date)
+    fitting = [fmt for fmt, dates in readings.items() if dates is not None]
+    if not fitting:
+        return None
+    # Formats that read every line identically (or no dated lines at all) are interchangeable
+    if all(readings[fmt] == readings[fitting[0]] for fmt in fitting):
+        return fitting[0]
+    return None
+
+def _parse_words(doc, profile: LayoutProfile) -> tuple[list[dict], float]:
+    """Rows from date-led text lines; confidence is the share of those lines parsed"""
+    rows, candidates = [], 0
+    header_ok = not profile.require_header
+    for page in doc:
+        for words in _page_lines(page):
+            date, used = _parse_date(words, profile.date_formats)
+            if date is None:
+                if profile.require_header:
+                    columns = _table_columns(words, profile)
+                    if "date" in columns and ("amount" in columns or "balance" in columns
+                                              or "debit" in columns or "credit" in columns):
+                        # Only a lone amount column says which trailing number to read
+                        header_ok = "amount" in columns and not columns.keys() & {"balance", "debit", "credit"}
+                continue
+            if not header_ok:
+                continue
+            candidates += 1
+            rest = words[used:]
+            negative = False
+            while rest and rest[-1].upper() in profile.debit_markers + ("CR", "CREDIT"):
+                negative = negative or rest[-1].upper() in profile.debit_markers
+                rest = rest[:-1]
+
+            numbers = 0
+            while numbers < len(rest) and _parse_amount(rest[len(rest) - 1 - numbers]) is not None:
+                numbers += 1
+            if numbers < -profile.amount_position:
+                continue
+            amount = _parse_amount(rest[profile.amount_position])
+            description = " ".join(rest[:len(rest) - numbers])
+            if _is_skipped(description, profile):
+                continue
+            if negative:
+                amount = -abs(amount)
+            rows.append(_transaction_row(date, amount, description))
+    return rows, (len(rows) / candidates if candidates else 0.0)
+
+def _table_columns(header: list, profile: LayoutProfile) -> dict:
+    """Map column roles (date, description, amount, debit, credit) to header positions"""
+    columns = {}
+    for position, label in enumerate(header):
+        label = " ".join(str(label or "").lower().split())
+        for role, keywords in profile.header_keywords.items():
+            if role not in columns and any(keyword in label for keyword in keywords):
+                columns[role] = position
+                break
+    return columns
+
+def _parse_tables(doc, profile: LayoutProfile) -> tuple[list[dict], float]:
+    """Rows from ruled or aligned tables found by PyMuPDF"""
+    rows, candidates = [], 0
+    for page in doc:
+        for table in page.find_tables().tables:
+            cells = table.extract()
+            if not cells:
+                continue
+            columns = _table_columns(cells[0], profile)
+            has_amount = "amount" in columns or "debit" in columns or "credit" in columns
+            if "date" not in columns or not has_amount:
+                continue
+            for cell_row in cells[1:]:
+                def cell(role):
+                    return str(cell_row[columns[role]] or "").strip() if role in columns else ""
+                date, _ = _parse_date(cell("date").split(), profile.date_formats)
+                if date is None:
+                    continue
+                candidates += 1
+                if _is_skipped(cell("description"), profile):
+                    continue
+                amount = _parse_amount(cell("amount")) if "amount" in columns else None
+                if amount is None:
+                    debit, credit = _parse_amount(cell("debit")), _parse_amount(cell("credit"))
+                    if debit is None and credit is None:
+                        continue
+                    amount = (credit or 0.0) - abs(debit or 0.0)
+                rows.append(_transaction_row(date, amount, cell("description")))
+    return rows, (len(rows) / candidates if candidates else 0.0)
+
+@traced()
+def parse_with_layout(doc) -> tuple[pd.DataFrame, str | None]:
+    """Try the registered layout profiles on an open PDF.
+
+    Returns the parsed transactions and the ``"layout:<profile>"`` path that
+    produced them, or an empty DataFrame and None when no profile is
+    confident enough.
+    """
+    first_page = doc[0].get_text() if doc.page_count else ""
+    for profile in LAYOUT_PROFILES:
+        if not all(identifier in first_page for identifier in profile.identifiers):
+            continue
+        date_format = _statement_date_format(doc, profile)
+        if date_format is None:
+            print(f"Layout {profile.name}: statement dates match no single format, skipping")
+            continue
+        profile = replace(profile, date_formats=(date_format,))
+        parsers = [_parse_words] + ([_parse_tables] if profile.use_tables else [])
+        for parser in parsers:
+            try:
+                rows, confidence = parser(doc, profile)
+            except Exception as e:
+                print(f"Layout parser {profile.name} failed: {e}")
+                continue
+            if profile.require_debits and not any(row["Amount"] < 0 for row in rows):
+                continue
+            if len(rows) >= profile.min_rows and confidence >= profile.min_confidence:
+                return pd.DataFrame(rows), f"layout:{profile.name}"
+    return pd.DataFrame(), None
+
+def _parse_with_cache(content, parse) -> pd.DataFrame:
+    """Return the cached parse of ``content`` or run ``parse()`` and store it.
+
+    Only complete, non-empty results are cached so failures are retried.
+    ``df.attrs["extraction_path"]`` says which path produced the result.
+    """
+    key = statement_cache.key(content, GEMINI_MODEL, PROMPT_VERSION)
+    df = statement_cache.get(key)
+    if df is not None:
+        df.attrs["extraction_path"] = "cache"
+        _record_extraction_path("cache")
+        return df
+
+    df = parse()
+    if not df.empty and not df.attrs.get("failed_chunks"):
+        statement_cache.put(key, df)
+    return df
+
+def _parse_statement_text_uncached(text: str) -> pd.DataFrame:
+    df = extract_transactions_with_llm(text)
+    df.attrs["extraction_path"] = "llm"
+    _record_extraction_path("llm")
+    return df
+
+def _parse_pdf_uncached(source) -> pd.DataFrame:
+    """Layout fast path first, the LLM only when it isn't confident"""
+    doc = _open_pdf(source)
+    try:
+        df, path = parse_with_layout(doc)
+    finally:
+        doc.close()
+    if path is not None:
+        df.attrs["extraction_path"] = path
+        _record_extraction_path(path)
+        return df
+    return _parse_statement_text_uncached(extract_text_from_pdf(source))
+
+@traced()
+def parse_statement_text(text: str, use_cache: bool = True) -> pd.DataFrame:
+    """Extract transactions from pasted statement text"""
+    if not use_cache:
+        return _parse_statement_text_uncached(text)
+    return _parse_with_cache(text, lambda: _parse_statement_text_uncached(text))
+
+@traced()
+def parse_pdf(file, use_cache: bool = True) -> pd.DataFrame:
+    """Extract transactions from a PDF statement.
+
+    ``df.attrs["extraction_path"]`` is ``"layout:<profile>"``, ``"llm"`` or
+    ``"cache"``; ``EXTRACTION_PATH_COUNTS`` tallies them per process.
+    """
+    source = _pdf_source(file)
+    if not use_cache:
+        return _parse_pdf_uncached(source)
+
+    if not isinstance(source, bytes):
+        with open(source, "rb") as f:
+            source = f.read()
+    return _parse_with_cache(source, lambda: _parse_pdf_uncached(source))
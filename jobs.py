@@ -0,0 +1,262 @@
+import os
+import io
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+# Holds uploaded statements until they are processed, and the extracted
+# transactions after: kept in the app's own (owner-only) data directory
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join("data", "jobs.sqlite3"))
+# Server-wide cap on statement jobs running at the same time
+JOBS_MAX_CONCURRENT = int(os.getenv("JOBS_MAX_CONCURRENT", "2"))
+# Finished jobs (and their results) are deleted after this many seconds
+JOBS_RETENTION_SECONDS = float(os.getenv("JOBS_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    account_id TEXT,
+    filename TEXT,
+    content_hash TEXT,
+    payload BLOB,
+    result TEXT,
+    meta TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_user_created_idx ON jobs (user_id, created_at);
+CREATE INDEX IF NOT EXISTS jobs_user_hash_idx ON jobs (user_id, content_hash);
+"""
+
+class JobQueue:
+    """Statement processing jobs persisted in SQLite and run by a worker pool.
+
+    A parse job runs extract -> categorize on a PDF or pasted text and stores
+    the reviewed-to-be transactions; an import job bulk-inserts reviewed
+    rows. Status, stage, progress and results live in SQLite, so a page can
+    poll a job after a browser refresh. Jobs left queued or running by a
+    previous process are re-queued when the queue starts.
+
+    The uploaded statement is dropped as soon as its job finishes, either
+    way, and finished jobs older than ``retention_seconds`` are deleted when
+    the queue starts and on every submit.
+    """
+
+    def __init__(self, db_path=JOBS_DB_PATH, max_workers=JOBS_MAX_CONCURRENT,
+                 retention_seconds=JOBS_RETENTION_SECONDS):
+        self.db_path = db_path
+        self.retention_seconds = retention_seconds
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="statement-job")
+        self._sweep()
+        self._recover()
+
+    def submit_parse(self, user_id, account_id, content, filename=None, force=False):
+        """Queue extraction of a PDF (bytes) or pasted text (str); returns the job id.
+
+        Resubmitting the same content for the same user returns the existing
+        job, failed ones included, so page reruns never retry on their own;
+        ``force`` queues a new job (e.g. when the user asks for a retry).
+        """
+        content_hash = hashlib.sha256(
+            content.encode("utf-8") if isinstance(content, str) else content
+        ).hexdigest()
+        existing = self.find_parse_job(user_id, content_hash)
+        if existing is not None and not force:
+            return existing["id"]
+
+        kind = "parse_text" if isinstance(content, str) else "parse_pdf"
+        payload = content.encode("utf-8") if isinstance(content, str) else content
+        return self._insert(user_id, kind, account_id, filename, content_hash, payload)
+
+    def submit_import(self, user_id, account_id, df, filename=None):
+        """Queue a bulk import of reviewed transactions; returns the job id"""
+        payload = df.to_json(orient="table", index=False).encode("utf-8")
+        return self._insert(user_id, "import", account_id, filename, None, payload)
+
+    def get(self, job_id):
+        """The job as a dict with its ``result`` decoded to a DataFrame, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, user_id, kind, status, stage, progress, account_id, filename, "
+                "content_hash, result, meta, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        return self._decode(row) if row else None
+
+    def find_parse_job(self, user_id, content_hash):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE user_id = ? AND content_hash = ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (str(user_id), content_hash)
+            ).fetchone()
+        return self.get(row["id"]) if row else None
+
+    def list(self, user_id, limit=20):
+        """The user's most recent jobs, without results"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, kind, status, stage, progress, filename, error, created_at, updated_at "
+                "FROM jobs WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+                (str(user_id), limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def _sweep(self):
+        """Delete finished jobs that were last updated before the retention window"""
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (SUCCEEDED, FAILED, time.time() - self.retention_seconds)
+            )
+
+    def _insert(self, user_id, kind, account_id, filename, content_hash, payload):
+        self._sweep()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, user_id, kind, status, stage, account_id, filename, "
+                "content_hash, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, str(user_id), kind, QUEUED, "queued",
+                 None if account_id is None else str(account_id), filename,
+                 content_hash, payload, now, now)
+            )
+        self._pool.submit(self._run, job_id)
+        return job_id
+
+    def _recover(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = 'queued', progress = 0 WHERE status = ?",
+                (QUEUED, RUNNING)
+            )
+        for row in rows:
+            self._pool.submit(self._run, row["id"])
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _run(self, job_id):
+        with self._connect() as conn:
+            job = conn.execute(
+                "SELECT kind, user_id, account_id, payload FROM jobs WHERE id = ? AND status = ?",
+                (job_id, QUEUED)
+            ).fetchone()
+        if job is None:
+            return
+        self._update(job_id, status=RUNNING, stage="starting", progress=0.0)
+
+        def progress(stage, fraction):
+            self._update(job_id, stage=stage, progress=fraction)
+
+        try:
+            if job["kind"] == "import":
+                df = pd.read_json(io.StringIO(job["payload"].decode("utf-8")), orient="table")
+                result = run_import(job["user_id"], job["account_id"], df, progress)
+            else:
+                content = job["payload"].decode("utf-8") if job["kind"] == "parse_text" else job["payload"]
+                result = run_parse(job["user_id"], content, progress)
+            # The uploaded statement is no longer needed once the job is done
+            self._update(
+                job_id, status=SUCCEEDED, stage="done", progress=1.0, payload=None,
+                result=result.to_json(orient="table", index=False),
+                meta=json.dumps(result.attrs)
+            )
+        except Exception as e:
+            print(f"Statement job {job_id} failed: {e}")
+            self._update(job_id, status=FAILED, stage="failed", error=str(e), payload=None)
+
+    def _decode(self, row):
+        job = dict(row)
+        meta = json.loads(job.pop("meta")) if job["meta"] else {}
+        if job["result"]:
+            job["result"] = pd.read_json(io.StringIO(job["result"]), orient="table")
+            # df.attrs (extraction path, failed chunks, ...) do not survive JSON
+            job["result"].attrs.update(meta)
+        return job
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation; safe across worker threads
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+def run_parse(user_id, content, progress=lambda stage, fraction: None) -> pd.DataFrame:
+    """Extract and categorize a statement (PDF bytes or pasted text) for a user"""
+    from extractor import parse_pdf, parse_statement_text
+    from database import predict_categories
+
+    progress("extracting", 0.1)
+    if isinstance(content, str):
+        df = parse_statement_text(content)
+    else:
+        df = parse_pdf(content)
+    if df.empty:
+        raise ValueError("Could not extract any transactions from the statement")
+
+    progress("categorizing", 0.8)
+    description = next((col for col in df.columns if str(col).lower() == "description"), None)
+    if description is not None:
+        df["Category"] = predict_categories(user_id, df[description])
+    return df
+
+def run_import(user_id, account_id, df, progress=lambda stage, fraction: None) -> pd.DataFrame:
+    """Bulk-insert reviewed transactions, skipping duplicates, and return per-row results"""
+    from database import insert_transactions_bulk
+
+    progress("importing", 0.1)
+    results = insert_transactions_bulk(user_id, account_id, df, skip_duplicates=True)
+    return results.reset_index(names="row")
+
+def merge_parse_results(finished_jobs) -> pd.DataFrame:
+    """One review table from several finished parse jobs, tagged with a ``Source`` column"""
+    frames = [
+        job["result"].assign(Source=job["filename"] or "pasted text")
+        for job in finished_jobs if job["result"] is not None
+    ]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """The process-wide job queue, started on first use"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
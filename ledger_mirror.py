@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import pandas as pd
+
+class LedgerMirror:
+    """Local Parquet copy of each user's transactions, synced incrementally.
+
+    Every ``read`` pulls only the rows whose ``watermark_column`` is at or
+    after the last synced value (minus ``overlap_seconds`` for rows committed
+    out of order) and merges them by ``id``. At most every
+    ``resync_interval`` seconds the local row count is checked against the
+    backend and the user's copy is reloaded in full on a mismatch, which also
+    picks up deletes. The mirror directory is kept under ``max_bytes`` by
+    evicting the least recently read users.
+
+    ``pull_changes(user_id, since)`` must return the user's transactions with
+    ``watermark_column >= since`` (all of them when ``since`` is None) as a
+    DataFrame with a tz-aware datetime ``watermark_column``, and
+    ``count_remote(user_id)`` the number of rows on the backend.
+    """
+
+    def __init__(self, root, pull_changes, count_remote, max_bytes=512 * 1024 * 1024,
+                 resync_interval=3600, overlap_seconds=60, watermark_column="updated_at"):
+        self.root = root
+        self.pull_changes = pull_changes
+        self.count_remote = count_remote
+        self.max_bytes = max_bytes
+        self.resync_interval = resync_interval
+        self.overlap = pd.Timedelta(seconds=overlap_seconds)
+        self.watermark_column = watermark_column
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def read(self, user_id):
+        """Return the user's full ledger after an incremental sync"""
+        with self._user_lock(user_id):
+            df, meta = self._load(user_id)
+            now = time.time()
+
+            if df is None:
+                df = self._full_sync(user_id, meta, now)
+            else:
+                since = pd.Timestamp(meta["watermark"]) - self.overlap if meta.get("watermark") else None
+                changes = self.pull_changes(user_id, since)
+                if not changes.empty:
+                    df = pd.concat([df, changes], ignore_index=True)
+                    df = df.drop_duplicates(subset="id", keep="last").reset_index(drop=True)
+
+                if now - meta.get("last_full_check", 0) >= self.resync_interval:
+                    meta["last_full_check"] = now
+                    if self.count_remote(user_id) != len(df):
+                        df = self._full_sync(user_id, meta, now)
+                    else:
+                        self._save(user_id, df, meta)
+                elif not changes.empty:
+                    self._save(user_id, df, meta)
+
+            os.utime(self._data_path(user_id))
+        self._enforce_size_cap(keep=user_id)
+        return df
+
+    def purge_user(self, user_id):
+        """Delete the local copy of one user's ledger"""
+        with self._user_lock(user_id):
+            for path in (self._data_path(user_id), self._meta_path(user_id)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def size_bytes(self):
+        return sum(os.path.getsize(path) for path in self._files())
+
+    def _full_sync(self, user_id, meta, now):
+        df = self.pull_changes(user_id, None)
+        meta["last_full_check"] = now
+        self._save(user_id, df, meta)
+        return df
+
+    def _load(self, user_id):
+        data_path, meta_path = self._data_path(user_id), self._meta_path(user_id)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None, {}
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            return pd.read_parquet(data_path), meta
+        except Exception as e:
+            print(f"Discarding unreadable ledger mirror for user: {e}")
+            return None, {}
+
+    def _save(self, user_id, df, meta):
+        if not df.empty and self.watermark_column in df.columns:
+            meta["watermark"] = df[self.watermark_column].max().isoformat()
+        meta["rows"] = len(df)
+
+        # Write to temporary files first so readers never see a partial copy
+        data_path, meta_path = self._data_path(user_id), self._meta_path(user_id)
+        df.to_parquet(data_path + ".tmp", index=False)
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(data_path + ".tmp", data_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def _enforce_size_cap(self, keep):
+        keep_path = self._data_path(keep)
+        data_files = sorted(
+            (path for path in self._files() if path.endswith(".parquet")),
+            key=os.path.getmtime
+        )
+        total = self.size_bytes()
+        for path in data_files:
+            if total <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+            meta_path = path[:-len(".parquet")] + ".json"
+            for victim in (path, meta_path):
+                if os.path.exists(victim):
+                    total -= os.path.getsize(victim)
+                    os.remove(victim)
+
+    def _files(self):
+        return [os.path.join(self.root, name) for name in os.listdir(self.root)
+                if name.endswith((".parquet", ".json"))]
+
+    def _user_key(self, user_id):
+        # Hashed so user ids never appear in file names
+        return hashlib.sha256(str(user_id).encode()).hexdigest()[:32]
+
+    def _data_path(self, user_id):
+        return os.path.join(self.root, f"{self._user_key(user_id)}.parquet")
+
+    def _meta_path(self, user_id):
+        return os.path.join(self.root, f"{self._user_key(user_id)}.json")
+
+    def _user_lock(self, user_id):
+        with self._locks_guard:
+            return self._locks.setdefault(str(user_id), threading.Lock())
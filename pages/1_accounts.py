@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
 from database import create_account, fetch_accounts
+from components.perf_panel import render_performance_panel
 
 st.set_page_config(page_title="Accounts", page_icon="🏦")
+render_performance_panel()
 
 # Auth check
 if "user" not in st.session_state:
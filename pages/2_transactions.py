@@ -1,9 +1,13 @@
 import streamlit as st
 import pandas as pd
-from database import insert_transaction, fetch_transactions, fetch_accounts
+from database import insert_transaction, fetch_transactions, fetch_accounts, predict_categories
 import datetime
+from components.perf_panel import render_performance_panel
+
+AUTO_CATEGORY = "Auto-detect from description"
 
 st.set_page_config(page_title="Transactions", page_icon="💸")
+render_performance_panel()
 
 # Auth check
 if "user" not in st.session_state:
@@ -38,13 +42,16 @@ with left_col:
             
         category = st.selectbox(
             "Category",
-            ["Salary", "Food", "Transport", "Housing", "Entertainment", "Shopping", "Health", "Education", "Other"]
+            [AUTO_CATEGORY, "Salary", "Food", "Transport", "Housing", "Entertainment", "Shopping", "Health", "Education", "Other"]
         )
         description = st.text_input("Description")
         
         submit = st.form_submit_button("Add Transaction")
         
         if submit and account_id and amount and description:
+            category_source = "auto" if category == AUTO_CATEGORY else "user"
+            if category == AUTO_CATEGORY:
+                category = predict_categories(st.session_state["user_id"], pd.Series([description])).iloc[0]
             try:
                 insert_transaction(
                     user_id=st.session_state["user_id"],
@@ -52,7 +59,8 @@ with left_col:
                     date=date.strftime("%Y-%m-%d"),
                     amount=amount,
                     t_type=category,
-                    desc=description
+                    desc=description,
+                    category_source=category_source
                 )
                 st.success("Transaction added successfully!")
             except Exception as e:
@@ -83,24 +91,24 @@ with right_col:
         if st.button("Refresh"):
             st.rerun()
     
-    # Fetch and display transactions
+    # Fetch and display transactions, letting the backend apply the filters
     try:
-        transactions_df = fetch_transactions(st.session_state["user_id"])
+        filter_account_ids = None
+        if 'filter_account' in st.session_state and filter_account != "All Accounts" and not accounts_df.empty:
+            filter_account_ids = accounts_df[accounts_df["name"] == filter_account]["id"].tolist()
         
-        if not transactions_df.empty:
-            # Apply filters
-            filtered_df = transactions_df.copy()
-            
-            if 'filter_account' in st.session_state and filter_account != "All Accounts" and not accounts_df.empty:
-                account_id = accounts_df[accounts_df["name"] == filter_account]["id"].values[0]
-                filtered_df = filtered_df[filtered_df["account_id"] == account_id]
-            
-            if 'filter_type' in st.session_state and filter_type != "All Types":
-                if filter_type == "Income":
-                    filtered_df = filtered_df[filtered_df["amount"] > 0]
-                elif filter_type == "Expense":
-                    filtered_df = filtered_df[filtered_df["amount"] < 0]
-            
+        filter_sign = None
+        if 'filter_type' in st.session_state and filter_type != "All Types":
+            filter_sign = filter_type.lower()
+        
+        filtered_df = fetch_transactions(
+            st.session_state["user_id"],
+            account_ids=filter_account_ids,
+            sign=filter_sign,
+            columns=["date", "account_id", "description", "type", "amount"]
+        )
+        
+        if not filtered_df.empty:
             # Add account name to display
             if not accounts_df.empty:
                 account_map = accounts_df[["id", "name"]].set_index("id")["name"].to_dict()
@@ -110,7 +118,7 @@ with right_col:
             st.dataframe(
                 filtered_df[["date", "account_name", "description", "type", "amount"]],
                 column_config={
-                    "date": "Date",
+                    "date": st.column_config.DateColumn("Date"),
                     "account_name": "Account",
                     "description": "Description",
                     "type": "Category",
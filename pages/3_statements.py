@@ -1,9 +1,16 @@
+import os
+import time
 import streamlit as st
-from extractor import parse_pdf
-from database import insert_transaction, fetch_accounts
+from jobs import get_job_queue, merge_parse_results
+from database import fetch_accounts, flag_duplicates, DUPLICATE_ERROR
 import pandas as pd
+from components.perf_panel import render_performance_panel
+
+JOB_POLL_SECONDS = 1.0
+STATEMENT_UPLOAD_MAX_FILES = int(os.getenv("STATEMENT_UPLOAD_MAX_FILES", "24"))
 
 st.set_page_config(page_title="Upload Statements", page_icon="📄")
+render_performance_panel()
 
 # Auth check
 if "user" not in st.session_state:
@@ -12,6 +19,15 @@ if "user" not in st.session_state:
 
 st.title("📄 Statement Upload")
 
+def report_import_results(results):
+    """Show per-row errors, skipped duplicates and the imported count for a bulk import"""
+    duplicates = results["error"] == DUPLICATE_ERROR
+    for row, error in results.loc[~results["success"] & ~duplicates, "error"].items():
+        st.error(f"Error importing transaction {row}: {error}")
+    if duplicates.any():
+        st.info(f"Skipped {int(duplicates.sum())} transactions that were already imported")
+    st.success(f"Successfully imported {int(results['success'].sum())} transactions!")
+
 # Get accounts for selection
 try:
     accounts_df = fetch_accounts(st.session_state["user_id"])
@@ -29,50 +45,91 @@ try:
         format_func=lambda x: account_options[x]
     )
     
+    queue = get_job_queue()
+    user_id = st.session_state["user_id"]
+
+    def show_job(job_id, label, retry=None):
+        """Show a job's progress; returns the finished job, or None while it runs or after it failed.
+
+        A failed job stays failed across reruns; ``retry`` (called without
+        arguments) resubmits it when the user clicks "Retry". It is also
+        offered for a statement whose text was only partly extracted.
+        """
+        job = queue.get(job_id)
+        if job is None:
+            return None
+        if job["status"] in ("queued", "running"):
+            st.progress(job["progress"], text=f"{label}: {job['stage']}...")
+            return None
+        failed = job["status"] == "failed"
+        failed_chunks = job["result"].attrs.get("failed_chunks") if job["result"] is not None else None
+        if failed:
+            st.error(f"{label} failed: {job['error']}")
+        elif failed_chunks:
+            st.warning(f"{label}: {len(failed_chunks)} part(s) of the statement could not be read, "
+                       "so some transactions are missing. Retry before importing.")
+        if (failed or failed_chunks) and retry is not None and st.button("Retry", key=f"retry_{job_id}"):
+            retry()
+            st.rerun()
+        return None if failed else job
+
     # File uploader
-    st.subheader("Upload Bank Statement")
-    uploaded_file = st.file_uploader("Upload statement (PDF)", type=["pdf"])
+    st.subheader("Upload Bank Statements")
+    uploaded_files = st.file_uploader(
+        "Upload statements (PDF)", type=["pdf"], accept_multiple_files=True
+    )
+    
+    if len(uploaded_files) > STATEMENT_UPLOAD_MAX_FILES:
+        st.warning(f"Only the first {STATEMENT_UPLOAD_MAX_FILES} statements will be processed")
+        uploaded_files = uploaded_files[:STATEMENT_UPLOAD_MAX_FILES]
     
-    if uploaded_file:
-        with st.spinner("Extracting transactions..."):
-            transactions = parse_pdf(uploaded_file)
+    if uploaded_files:
+        # One job per file; the queue runs up to JOBS_MAX_CONCURRENT of them at once.
+        # The same file maps to the same job, so a rerun or refresh re-attaches to it.
+        # Failed statements are only run again when the user clicks "Retry".
+        file_jobs = {}
+        for file in uploaded_files:
+            job_id = queue.submit_parse(user_id, account_id, file.getvalue(), file.name)
+            file_jobs.setdefault(job_id, file)
+        job_ids = list(file_jobs)
+        finished = []
+        for job_id, file in file_jobs.items():
+            job = show_job(
+                job_id, f"Extracting {queue.get(job_id)['filename']}",
+                retry=lambda file=file: queue.submit_parse(
+                    user_id, account_id, file.getvalue(), file.name, force=True)
+            )
+            if job is not None:
+                finished.append(job)
         
-        if not transactions.empty:
-            st.success(f"Found {len(transactions)} transactions!")
+        if finished:
+            transactions = merge_parse_results(finished)
+            transactions["Duplicate"] = flag_duplicates(user_id, account_id, transactions, source_column="Source")
+            st.success(
+                f"Found {len(transactions)} transactions in "
+                f"{len(finished)} of {len(job_ids)} statements"
+            )
+            st.caption(", ".join(
+                f"{job['filename']}: {job['result'].attrs.get('extraction_path', 'llm')}"
+                for job in finished
+            ))
             
             # Display extracted transactions before importing
             st.subheader("Extracted Transactions")
+            if transactions["Duplicate"].any():
+                st.warning(f"{int(transactions['Duplicate'].sum())} transactions look like duplicates "
+                           "of ones already imported and will be skipped")
             st.dataframe(transactions)
             
             # Option to edit before importing
             st.info("Review the extracted transactions above. If everything looks correct, click Import.")
             
+            # All finished statements go in as one import job
             if st.button("Import Transactions"):
-                imported_count = 0
-                with st.spinner("Importing transactions..."):
-                    for _, row in transactions.iterrows():
-                        try:
-                            # Ensure proper case for the columns
-                            date = row.get("Date", row.get("date"))
-                            amount = float(row.get("Amount", row.get("amount")))
-                            t_type = row.get("Type", row.get("type"))
-                            description = row.get("Description", row.get("description"))
-                            
-                            insert_transaction(
-                                user_id=st.session_state["user_id"],
-                                account_id=account_id,
-                                date=date,
-                                amount=amount,
-                                t_type=t_type,
-                                desc=description
-                            )
-                            imported_count += 1
-                        except Exception as e:
-                            st.error(f"Error importing transaction: {e}")
-                
-                st.success(f"Successfully imported {imported_count} transactions!")
-        else:
-            st.error("Could not extract any transactions from the uploaded file.")
+                st.session_state["import_job_id"] = queue.submit_import(
+                    user_id, account_id, transactions,
+                    ", ".join(job["filename"] for job in finished)
+                )
     
     # Manual text input option
     st.subheader("Or paste statement text")
@@ -81,34 +138,41 @@ try:
     statement_text = st.text_area("Paste statement text here", height=200)
     
     if statement_text and st.button("Extract from Text"):
-        from extractor import extract_transactions_with_llm
-        
-        with st.spinner("Extracting transactions from text..."):
-            text_transactions = extract_transactions_with_llm(statement_text)
+        st.session_state["extracted_statement_text"] = statement_text
+    
+    if statement_text and st.session_state.get("extracted_statement_text") == statement_text:
+        text_job = show_job(
+            queue.submit_parse(user_id, account_id, statement_text), "Extracting transactions",
+            retry=lambda: queue.submit_parse(user_id, account_id, statement_text, force=True)
+        )
             
-        if not text_transactions.empty:
+        if text_job is not None:
+            text_transactions = text_job["result"]
+            text_transactions["Duplicate"] = flag_duplicates(user_id, account_id, text_transactions)
             st.success(f"Found {len(text_transactions)} transactions!")
             st.dataframe(text_transactions)
             
             if st.button("Import Text Transactions"):
-                imported_count = 0
-                with st.spinner("Importing transactions..."):
-                    for _, row in text_transactions.iterrows():
-                        try:
-                            insert_transaction(
-                                user_id=st.session_state["user_id"],
-                                account_id=account_id,
-                                date=row["Date"],
-                                amount=row["Amount"],
-                                t_type=row["Type"],
-                                desc=row["Description"]
-                            )
-                            imported_count += 1
-                        except Exception as e:
-                            st.error(f"Error importing transaction: {e}")
-                
-                st.success(f"Successfully imported {imported_count} transactions!")
+                st.session_state["import_job_id"] = queue.submit_import(
+                    user_id, account_id, text_transactions
+                )
+    
+    if "import_job_id" in st.session_state:
+        import_job = show_job(st.session_state["import_job_id"], "Importing transactions")
+        if import_job is not None:
+            report_import_results(import_job["result"].set_index("row"))
+    
+    with st.expander("Recent statement jobs"):
+        recent = pd.DataFrame(queue.list(user_id))
+        if recent.empty:
+            st.write("No jobs yet")
         else:
-            st.error("Could not extract any transactions from the pasted text.")
+            recent["created_at"] = pd.to_datetime(recent["created_at"], unit="s")
+            st.dataframe(recent[["created_at", "filename", "kind", "status", "stage", "error"]])
+    
+    # Keep polling while any of this user's jobs is still in progress
+    if any(job["status"] in ("queued", "running") for job in queue.list(user_id)):
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
 except Exception as e:
     st.error(f"Error: {e}")
\ No newline at end of file
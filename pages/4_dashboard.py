@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from database import fetch_transactions, fetch_accounts
+from functools import partial
+from database import fetch_rollup, fetch_accounts, gather_queries
+from analytics import rollup_totals, rollup_period_summary, rollup_category_breakdown
 import datetime
+from components.perf_panel import render_performance_panel
 
 st.set_page_config(page_title="Dashboard", page_icon="📊", layout="wide")
+render_performance_panel()
 
 # Auth check
 if "user" not in st.session_state:
@@ -15,18 +19,6 @@ st.title("📊 Financial Dashboard")
 
 # Fetch data
 try:
-    accounts_df = fetch_accounts(st.session_state["user_id"])
-    transactions_df = fetch_transactions(st.session_state["user_id"])
-    
-    if transactions_df.empty:
-        st.info("No transaction data available. Add transactions to see your dashboard.")
-        st.stop()
-        
-    # Add account names to transactions
-    if not accounts_df.empty:
-        account_map = accounts_df[["id", "name"]].set_index("id")["name"].to_dict()
-        transactions_df["account_name"] = transactions_df["account_id"].map(account_map)
-    
     # Dashboard filters
     st.sidebar.header("Dashboard Filters")
     
@@ -50,19 +42,29 @@ try:
         elif date_filter == "Year to date":
             start_date = datetime.date(today.year, 1, 1)
         else:  # All time
-            start_date = transactions_df["date"].min()
+            start_date = None
         end_date = today
     
-    # Ensure consistent date types
-    transactions_df["date"] = pd.to_datetime(transactions_df["date"])
-    start_date = pd.Timestamp(start_date)
-    end_date = pd.Timestamp(end_date)
-
-    # Apply date filter (using timestamps for both sides)
-    filtered_df = transactions_df[(transactions_df["date"] >= start_date) & 
-                                 (transactions_df["date"] <= end_date)]
+    # Accounts and the period's rollup cube cells (daily per-account and
+    # per-category totals) are independent, so both are fetched at once; the
+    # account filter is then applied locally
+    data, errors = gather_queries({
+        "accounts": partial(fetch_accounts, st.session_state["user_id"], raise_errors=True),
+        "rollup": partial(
+            fetch_rollup,
+            st.session_state["user_id"],
+            start_date=start_date,
+            end_date=end_date,
+            raise_errors=True
+        ),
+    })
+    for name, error in errors.items():
+        st.error(f"Could not load {name}: {error}")
+    accounts_df = data["accounts"] if data["accounts"] is not None else pd.DataFrame()
+    filtered_df = data["rollup"] if data["rollup"] is not None else pd.DataFrame()
     
     # Account filter
+    account_ids = None
     if not accounts_df.empty:
         account_filter = st.sidebar.multiselect(
             "Accounts",
@@ -72,12 +74,19 @@ try:
         
         if "All Accounts" not in account_filter and account_filter:
             account_ids = accounts_df[accounts_df["name"].isin(account_filter)]["id"].tolist()
-            filtered_df = filtered_df[filtered_df["account_id"].isin(account_ids)]
+    
+    if account_ids is not None and not filtered_df.empty:
+        filtered_df = filtered_df[filtered_df["account_id"].isin(account_ids)].reset_index(drop=True)
+    
+    if filtered_df.empty:
+        st.info("No transaction data available for the selected filters. Add transactions to see your dashboard.")
+        st.stop()
     
     # Calculate summary metrics
-    total_income = filtered_df[filtered_df["amount"] > 0]["amount"].sum()
-    total_expense = abs(filtered_df[filtered_df["amount"] < 0]["amount"].sum())
-    net_flow = total_income - total_expense
+    totals = rollup_totals(filtered_df)
+    total_income = totals["income"]
+    total_expense = totals["expenses"]
+    net_flow = totals["net"]
     
     # Display summary metrics
     st.subheader("Financial Summary")
@@ -91,15 +100,7 @@ try:
     st.subheader("Income vs Expenses")
     
     # Group by month and calculate income/expenses
-    monthly_data = filtered_df.copy()
-    monthly_data["month"] = monthly_data["date"].dt.to_period("M").astype(str)
-    
-    monthly_summary = monthly_data.groupby("month").apply(
-        lambda x: pd.Series({
-            "Income": x[x["amount"] > 0]["amount"].sum(),
-            "Expenses": abs(x[x["amount"] < 0]["amount"].sum())
-        })
-    ).reset_index()
+    monthly_summary = rollup_period_summary(filtered_df, "monthly").rename(columns={"period": "month"})
     
     # Reshape data for chart
     chart_data = pd.melt(
@@ -124,21 +125,19 @@ try:
     # Expense breakdown by category
     st.subheader("Expense Breakdown by Category")
     
-    # Filter for expenses only and group by type/category
-    expenses_df = filtered_df[filtered_df["amount"] < 0].copy()
-    expenses_by_category = expenses_df.groupby("type")["amount"].sum().abs().reset_index()
-    expenses_by_category = expenses_by_category.sort_values("amount", ascending=False)
+    # Group expenses by type/category
+    expenses_by_category = rollup_category_breakdown(filtered_df, sign="expense")
     
     # Create donut chart for categories
     if not expenses_by_category.empty:
+        expenses_by_category["share"] = expenses_by_category["amount"] / expenses_by_category["amount"].sum()
         pie_chart = alt.Chart(expenses_by_category).mark_arc().encode(
             theta=alt.Theta(field="amount", type="quantitative"),
             color=alt.Color(field="type", type="nominal"),
             tooltip=[
                 alt.Tooltip("type:N", title="Category"),
                 alt.Tooltip("amount:Q", title="Amount", format="$,.2f"),
-                alt.Tooltip("amount:Q", title="Percentage", format=".1%", 
-                           aggregate="sum", op="mean")
+                alt.Tooltip("share:Q", title="Percentage", format=".1%")
             ]
         ).properties(height=300)
         
@@ -0,0 +1,513 @@
+import os
+import json
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+import pandas as pd
+
+# Columns of the transactions table that may be selected or filtered on
+TRANSACTION_COLUMNS = ["id", "user_id", "account_id", "date", "amount", "type",
+                       "description", "category_source", "created_at", "updated_at"]
+ACCOUNT_COLUMNS = ["id", "user_id", "name", "type", "balance", "opening_balance",
+                   "currency", "created_at"]
+ROLLUP_COLUMNS = ["account_id", "category", "day", "income", "expense", "count"]
+ROLLUP_DRIFT_COLUMNS = ["user_id", "account_id", "category", "day", "cube_income", "ledger_income",
+                        "cube_expense", "ledger_expense", "cube_count", "ledger_count"]
+
+class Repository:
+    """Storage of accounts, transactions and category rules.
+
+    ``database`` talks only to this interface; the backend is picked by
+    ``STORAGE_BACKEND``. Reads return raw DataFrames (strings for dates and
+    timestamps) that ``database`` coerces to the canonical schema.
+    """
+
+    def insert_transactions(self, rows):
+        """Insert a list of transaction dicts atomically (all or none)"""
+        raise NotImplementedError
+
+    def transaction_pages(self, user_id, start_date=None, end_date=None, account_ids=None,
+                          sign=None, columns=None, page_size=1000):
+        """Yield a user's matching transactions in ``(date, id)`` order, ``page_size`` rows at a time.
+
+        ``start_date``/``end_date`` are inclusive ``YYYY-MM-DD`` strings and
+        ``sign`` is ``"income"`` or ``"expense"``. Pages hold ``columns``
+        (every column if None); no empty page is yielded.
+        """
+        raise NotImplementedError
+
+    def transaction_changes(self, user_id, since=None, page_size=1000):
+        """Yield pages of a user's transactions updated at or after the UTC Timestamp ``since``"""
+        raise NotImplementedError
+
+    def count_transactions(self, user_id):
+        raise NotImplementedError
+
+    def insert_account(self, row):
+        """Insert an account dict and return the stored rows"""
+        raise NotImplementedError
+
+    def accounts(self, user_id=None, columns=None):
+        """One user's accounts, or every account when ``user_id`` is None"""
+        raise NotImplementedError
+
+    def apply_balance_delta(self, account_id, delta):
+        raise NotImplementedError
+
+    def recompute_account_balance(self, account_id):
+        raise NotImplementedError
+
+    def ledger_balances(self, user_id=None):
+        """``account_id`` and ``ledger_balance`` (opening balance plus every amount) per account"""
+        raise NotImplementedError
+
+    def category_rules(self, user_id):
+        """The user's ``keyword``, ``category``, ``priority`` rules in creation order"""
+        raise NotImplementedError
+
+    def apply_rollup_deltas(self, cells):
+        """Add ``analytics.rollup_cells`` output to the stored cube, creating missing cells"""
+        raise NotImplementedError
+
+    def rollup_cells(self, user_id, start_date=None, end_date=None, account_ids=None):
+        """A user's stored cube cells (``ROLLUP_COLUMNS``) in an inclusive day range"""
+        raise NotImplementedError
+
+    def rebuild_rollups(self, user_id=None):
+        """Recompute one user's cube, or everyone's when ``user_id`` is None, from the ledger"""
+        raise NotImplementedError
+
+    def rollup_drift(self, user_id=None, tolerance=0.005):
+        """Cells (``ROLLUP_DRIFT_COLUMNS``) where the cube and the ledger disagree"""
+        raise NotImplementedError
+
+def _iter_keyset_rows(build_query, key_column, page_size):
+    """Yield raw row pages of ``build_query()`` in ``(key_column, id)`` order.
+
+    Each page continues after the last row of the previous one (keyset
+    pagination), so no page depends on an OFFSET or on the backend's row cap.
+    """
+    last_key = None
+    while True:
+        query = build_query()
+        if last_key is not None:
+            # Values are quoted because timestamps contain PostgREST's reserved "." and ":"
+            last_value, last_id = last_key
+            query = query.or_(f'{key_column}.gt."{last_value}",'
+                              f'and({key_column}.eq."{last_value}",id.gt."{last_id}")')
+
+        rows = query.order(key_column).order("id").limit(page_size).execute().data
+        if not rows:
+            return
+        yield rows
+
+        if len(rows) < page_size:
+            return
+        last_key = (rows[-1][key_column], rows[-1]["id"])
+
+class SupabaseRepository(Repository):
+    """Supabase (PostgREST) tables plus the SQL functions in ``supabase/migrations``.
+
+    ``client`` is a zero-argument callable returning the client, so the
+    process-wide one is only created (or swapped) where it is looked up.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def insert_transactions(self, rows):
+        # A multi-row insert is one statement, so PostgreSQL applies all rows or none
+        self.client().table("transactions").insert(rows).execute()
+
+    def transaction_pages(self, user_id, start_date=None, end_date=None, account_ids=None,
+                          sign=None, columns=None, page_size=1000):
+        # The keyset columns are always fetched and dropped again if not requested
+        selected = list(dict.fromkeys(list(columns) + ["date", "id"])) if columns else ["*"]
+
+        def build_query():
+            query = self.client().table("transactions").select(",".join(selected)).eq("user_id", user_id)
+            if start_date is not None:
+                query = query.gte("date", start_date)
+            if end_date is not None:
+                query = query.lte("date", end_date)
+            if account_ids is not None:
+                query = query.in_("account_id", list(account_ids))
+            if sign == "income":
+                query = query.gt("amount", 0)
+            elif sign == "expense":
+                query = query.lt("amount", 0)
+            return query
+
+        for rows in _iter_keyset_rows(build_query, "date", page_size):
+            df = pd.DataFrame(rows)
+            yield df[list(columns)] if columns else df
+
+    def transaction_changes(self, user_id, since=None, page_size=1000):
+        def build_query():
+            query = self.client().table("transactions").select("*").eq("user_id", user_id)
+            if since is not None:
+                query = query.gte("updated_at", since.isoformat())
+            return query
+
+        for rows in _iter_keyset_rows(build_query, "updated_at", page_size):
+            yield pd.DataFrame(rows)
+
+    def count_transactions(self, user_id):
+        response = (self.client().table("transactions")
+                    .select("id", count="exact", head=True)
+                    .eq("user_id", user_id)
+                    .execute())
+        return response.count
+
+    def insert_account(self, row):
+        return self.client().table("accounts").insert(row).execute().data
+
+    def accounts(self, user_id=None, columns=None):
+        query = self.client().table("accounts").select(", ".join(columns) if columns else "*")
+        if user_id is not None:
+            query = query.eq("user_id", str(user_id))
+        return pd.DataFrame(query.execute().data or [], columns=columns)
+
+    def apply_balance_delta(self, account_id, delta):
+        self.client().rpc("apply_account_balance_delta", {
+            "p_account_id": account_id,
+            "p_delta": float(delta)
+        }).execute()
+
+    def recompute_account_balance(self, account_id):
+        self.client().rpc("recompute_account_balance", {"p_account_id": account_id}).execute()
+
+    def ledger_balances(self, user_id=None):
+        params = {"p_user_id": str(user_id) if user_id is not None else None}
+        return pd.DataFrame(self.client().rpc("account_ledger_balances", params).execute().data or [],
+                            columns=["account_id", "ledger_balance"])
+
+    def category_rules(self, user_id):
+        response = (
+            self.client().table("category_rules").select("keyword,category,priority")
+            .eq("user_id", user_id).order("created_at").execute()
+        )
+        return pd.DataFrame(response.data, columns=["keyword", "category", "priority"])
+
+    def apply_rollup_deltas(self, cells):
+        self.client().rpc("apply_transaction_rollup_deltas", {"p_cells": _rollup_records(cells)}).execute()
+
+    def rollup_cells(self, user_id, start_date=None, end_date=None, account_ids=None):
+        def build_query():
+            query = (self.client().table("transaction_rollups")
+                     .select(",".join(ROLLUP_COLUMNS + ["id"])).eq("user_id", str(user_id)))
+            if start_date is not None:
+                query = query.gte("day", start_date)
+            if end_date is not None:
+                query = query.lte("day", end_date)
+            if account_ids is not None:
+                query = query.in_("account_id", list(account_ids))
+            return query
+
+        rows = [row for page in _iter_keyset_rows(build_query, "day", 1000) for row in page]
+        return pd.DataFrame(rows, columns=ROLLUP_COLUMNS + ["id"])[ROLLUP_COLUMNS]
+
+    def rebuild_rollups(self, user_id=None):
+        self.client().rpc("rebuild_transaction_rollups", {"p_user_id": _optional_str(user_id)}).execute()
+
+    def rollup_drift(self, user_id=None, tolerance=0.005):
+        params = {"p_user_id": _optional_str(user_id), "p_tolerance": tolerance}
+        return pd.DataFrame(self.client().rpc("transaction_rollup_drift", params).execute().data or [],
+                            columns=ROLLUP_DRIFT_COLUMNS)
+
+def _rollup_records(cells):
+    """Cube cells as JSON-ready dicts with ``YYYY-MM-DD`` days"""
+    records = cells.assign(day=pd.to_datetime(cells["day"]).dt.strftime("%Y-%m-%d"))
+    return [
+        {"user_id": user, "account_id": account, "category": category, "day": day,
+         "income": float(income), "expense": float(expense), "count": int(count)}
+        for user, account, category, day, income, expense, count in
+        records[["user_id", "account_id", "category", "day", "income", "expense", "count"]].itertuples(index=False)
+    ]
+
+def _optional_str(value):
+    return str(value) if value is not None else None
+
+_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+SQLITE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT,
+    balance REAL NOT NULL DEFAULT 0,
+    opening_balance REAL NOT NULL DEFAULT 0,
+    currency TEXT,
+    created_at TEXT NOT NULL DEFAULT ({_NOW})
+);
+CREATE INDEX IF NOT EXISTS accounts_user_idx ON accounts (user_id);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    amount REAL NOT NULL,
+    type TEXT,
+    description TEXT,
+    category_source TEXT,
+    created_at TEXT NOT NULL DEFAULT ({_NOW}),
+    updated_at TEXT NOT NULL DEFAULT ({_NOW})
+);
+CREATE INDEX IF NOT EXISTS transactions_user_date_idx ON transactions (user_id, date, id);
+CREATE INDEX IF NOT EXISTS transactions_account_id_idx ON transactions (account_id);
+CREATE INDEX IF NOT EXISTS transactions_user_updated_at_idx ON transactions (user_id, updated_at, id);
+CREATE TRIGGER IF NOT EXISTS transactions_set_updated_at
+    AFTER UPDATE ON transactions FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+    BEGIN
+        UPDATE transactions SET updated_at = {_NOW} WHERE id = NEW.id;
+    END;
+
+CREATE TABLE IF NOT EXISTS category_rules (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    category TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT ({_NOW})
+);
+CREATE INDEX IF NOT EXISTS category_rules_user_idx ON category_rules (user_id);
+
+CREATE TABLE IF NOT EXISTS transaction_rollups (
+    user_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    day TEXT NOT NULL,
+    income REAL NOT NULL DEFAULT 0,
+    expense REAL NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, account_id, category, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS transaction_rollups_user_day_idx ON transaction_rollups (user_id, day);
+"""
+
+# The ledger aggregated into cube cells, for rebuilding and checking the cube
+LEDGER_ROLLUP_SQL = (
+    "SELECT user_id, account_id, COALESCE(type, '') AS category, date AS day, "
+    "SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END) AS income, "
+    "SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END) AS expense, COUNT(*) AS count "
+    "FROM transactions WHERE ? IS NULL OR user_id = ? "
+    "GROUP BY user_id, account_id, COALESCE(type, ''), date"
+)
+
+INSERT_TRANSACTION_SQL = (
+    "INSERT INTO transactions (id, user_id, account_id, date, amount, type, description, category_source) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+class SQLiteRepository(Repository):
+    """Embedded single-file backend for local, single-tenant and test deployments.
+
+    The database runs in WAL mode, so page reads never wait on an import.
+    Each thread keeps its own connection, whose statement cache reuses the
+    prepared form of every query below: their SQL text is fixed and all values
+    (including account id lists, passed as JSON) are bound parameters. Bulk
+    inserts go through one ``executemany`` per batch.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._connection()
+        had_rollups = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transaction_rollups'").fetchone()
+        conn.executescript(SQLITE_SCHEMA)
+        # Databases created before transactions had a category_source
+        if "category_source" not in {row[1] for row in conn.execute("PRAGMA table_info(transactions)")}:
+            conn.execute("ALTER TABLE transactions ADD COLUMN category_source TEXT")
+        # Databases created before the rollup cube: fill it from the existing ledger
+        if not had_rollups and conn.execute("SELECT EXISTS(SELECT 1 FROM transactions)").fetchone()[0]:
+            self.rebuild_rollups()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _frame(self, sql, params=()):
+        cursor = self._connection().execute(sql, params)
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=[c[0] for c in cursor.description])
+
+    @staticmethod
+    def _select(columns, allowed):
+        unknown = [column for column in columns or [] if column not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+        return ", ".join(columns) if columns else ", ".join(allowed)
+
+    def insert_transactions(self, rows):
+        params = [
+            (str(uuid.uuid4()), str(row["user_id"]), str(row["account_id"]), str(row["date"])[:10],
+             float(row["amount"]), row.get("type"), row.get("description"), row.get("category_source"))
+            for row in rows
+        ]
+        with self._transaction() as conn:
+            conn.executemany(INSERT_TRANSACTION_SQL, params)
+
+    def transaction_pages(self, user_id, start_date=None, end_date=None, account_ids=None,
+                          sign=None, columns=None, page_size=1000):
+        # Unset filters are bound as NULL, so every call shares one prepared statement per column list
+        sql = (
+            f"SELECT {self._select(columns, TRANSACTION_COLUMNS)} FROM transactions "
+            "WHERE user_id = ? AND (? IS NULL OR date >= ?) AND (? IS NULL OR date <= ?) "
+            "AND (? IS NULL OR account_id IN (SELECT value FROM json_each(?))) "
+            "AND (? IS NULL OR (? = 'income' AND amount > 0) OR (? = 'expense' AND amount < 0)) "
+            "ORDER BY date, id"
+        )
+        accounts = json.dumps([str(a) for a in account_ids]) if account_ids is not None else None
+        cursor = self._connection().execute(sql, (
+            str(user_id), start_date, start_date, end_date, end_date,
+            accounts, accounts, sign, sign, sign
+        ))
+        names = [c[0] for c in cursor.description]
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                return
+            yield pd.DataFrame.from_records(rows, columns=names)
+
+    def transaction_changes(self, user_id, since=None, page_size=1000):
+        if since is not None:
+            since = pd.Timestamp(since).tz_convert("UTC").strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+        cursor = self._connection().execute(
+            f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM transactions "
+            "WHERE user_id = ? AND (? IS NULL OR updated_at >= ?) ORDER BY updated_at, id",
+            (str(user_id), since, since)
+        )
+        names = [c[0] for c in cursor.description]
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                return
+            yield pd.DataFrame.from_records(rows, columns=names)
+
+    def count_transactions(self, user_id):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM transactions WHERE user_id = ?", (str(user_id),)
+        ).fetchone()[0]
+
+    def insert_account(self, row):
+        account_id = str(uuid.uuid4())
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO accounts (id, user_id, name, type, balance, opening_balance, currency) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (account_id, str(row["user_id"]), row["name"], row.get("type"),
+                 float(row.get("balance") or 0), float(row.get("opening_balance") or 0), row.get("currency"))
+            )
+        return self._frame(f"SELECT {', '.join(ACCOUNT_COLUMNS)} FROM accounts WHERE id = ?",
+                           (account_id,)).to_dict("records")
+
+    def accounts(self, user_id=None, columns=None):
+        return self._frame(
+            f"SELECT {self._select(columns, ACCOUNT_COLUMNS)} FROM accounts "
+            "WHERE ? IS NULL OR user_id = ? ORDER BY created_at, id",
+            (_optional_str(user_id),) * 2
+        )
+
+    def apply_balance_delta(self, account_id, delta):
+        with self._transaction() as conn:
+            conn.execute("UPDATE accounts SET balance = COALESCE(balance, 0) + ? WHERE id = ?",
+                         (float(delta), str(account_id)))
+
+    def recompute_account_balance(self, account_id):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE accounts SET balance = opening_balance + COALESCE("
+                "(SELECT SUM(amount) FROM transactions WHERE account_id = accounts.id), 0) "
+                "WHERE id = ?",
+                (str(account_id),)
+            )
+
+    def ledger_balances(self, user_id=None):
+        return self._frame(
+            "SELECT a.id AS account_id, a.opening_balance + COALESCE(SUM(t.amount), 0) AS ledger_balance "
+            "FROM accounts a LEFT JOIN transactions t ON t.account_id = a.id "
+            "WHERE ? IS NULL OR a.user_id = ? GROUP BY a.id, a.opening_balance",
+            (_optional_str(user_id),) * 2
+        )
+
+    def category_rules(self, user_id):
+        return self._frame(
+            "SELECT keyword, category, priority FROM category_rules "
+            "WHERE user_id = ? ORDER BY created_at, rowid",
+            (str(user_id),)
+        )
+
+    def apply_rollup_deltas(self, cells):
+        params = [tuple(record.values()) for record in _rollup_records(cells)]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO transaction_rollups (user_id, account_id, category, day, income, expense, count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (user_id, account_id, category, day) DO UPDATE SET "
+                "income = income + excluded.income, expense = expense + excluded.expense, "
+                "count = count + excluded.count",
+                params
+            )
+
+    def rollup_cells(self, user_id, start_date=None, end_date=None, account_ids=None):
+        accounts = json.dumps([str(a) for a in account_ids]) if account_ids is not None else None
+        return self._frame(
+            f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM transaction_rollups "
+            "WHERE user_id = ? AND (? IS NULL OR day >= ?) AND (? IS NULL OR day <= ?) "
+            "AND (? IS NULL OR account_id IN (SELECT value FROM json_each(?))) ORDER BY day",
+            (str(user_id), start_date, start_date, end_date, end_date, accounts, accounts)
+        )
+
+    def rebuild_rollups(self, user_id=None):
+        user = _optional_str(user_id)
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM transaction_rollups WHERE ? IS NULL OR user_id = ?", (user, user))
+            conn.execute(f"INSERT INTO transaction_rollups {LEDGER_ROLLUP_SQL}", (user, user))
+
+    def rollup_drift(self, user_id=None, tolerance=0.005):
+        user = _optional_str(user_id)
+        return self._frame(
+            "SELECT user_id, account_id, category, day, "
+            "SUM(cube_income) AS cube_income, SUM(ledger_income) AS ledger_income, "
+            "SUM(cube_expense) AS cube_expense, SUM(ledger_expense) AS ledger_expense, "
+            "SUM(cube_count) AS cube_count, SUM(ledger_count) AS ledger_count FROM ("
+            "SELECT user_id, account_id, category, day, income AS cube_income, 0 AS ledger_income, "
+            "expense AS cube_expense, 0 AS ledger_expense, count AS cube_count, 0 AS ledger_count "
+            "FROM transaction_rollups WHERE ? IS NULL OR user_id = ? "
+            "UNION ALL "
+            "SELECT user_id, account_id, category, day, 0, income, 0, expense, 0, count "
+            f"FROM ({LEDGER_ROLLUP_SQL})"
+            ") GROUP BY user_id, account_id, category, day "
+            "HAVING ABS(SUM(cube_income) - SUM(ledger_income)) > ? "
+            "OR ABS(SUM(cube_expense) - SUM(ledger_expense)) > ? "
+            "OR SUM(cube_count) != SUM(ledger_count) "
+            "ORDER BY user_id, day, account_id, category",
+            (user, user, user, user, tolerance, tolerance)
+        )
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
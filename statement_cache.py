@@ -0,0 +1,112 @@
+import os
+import io
+import hashlib
+import tempfile
+import threading
+import pandas as pd
+
+STATEMENT_CACHE_DIR = os.getenv(
+    "STATEMENT_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "financial-planner", "statements")
+)
+STATEMENT_CACHE_MAX_BYTES = int(os.getenv("STATEMENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+class StatementCache:
+    """Disk-backed cache of parsed statements, keyed by content hash.
+
+    A key covers the statement bytes (or pasted text), the model name and the
+    prompt version, so changing either re-parses. Entries are JSON files;
+    reading one refreshes its modification time and the least recently used
+    entries are deleted once the directory exceeds ``max_bytes``. Hit and
+    miss counts are kept per process.
+    """
+
+    def __init__(self, root=STATEMENT_CACHE_DIR, max_bytes=STATEMENT_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(content, model_name, prompt_version):
+        """Content address of a statement for a given model and prompt"""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        digest = hashlib.sha256()
+        digest.update(hashlib.sha256(content).digest())
+        digest.update(f"\0{model_name}\0{prompt_version}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                df = pd.read_json(io.StringIO(f.read()), orient="table")
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            print(f"Discarding unreadable statement cache entry: {e}")
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return df
+
+    def put(self, key, df):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(df.to_json(orient="table", index=False))
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            self._remove(path)
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if name.endswith(".json"):
+                path = os.path.join(self.root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.json")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
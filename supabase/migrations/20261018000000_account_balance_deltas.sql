@@ -0,0 +1,48 @@
+-- Balances are maintained incrementally by the app; the opening balance keeps
+-- them reconcilable against the transaction ledger.
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS opening_balance numeric NOT NULL DEFAULT 0;
+
+-- Existing accounts: take today's balance as correct and derive the opening
+-- balance from it, so they reconcile without drift. Drift that predates this
+-- migration is folded into the opening balance and is not reported.
+UPDATE accounts a
+SET opening_balance = COALESCE(a.balance, 0) - COALESCE(
+    (SELECT SUM(t.amount) FROM transactions t WHERE t.account_id = a.id), 0
+);
+
+CREATE INDEX IF NOT EXISTS transactions_account_id_idx ON transactions (account_id);
+
+-- Apply the signed amount of one insert (or one batch) to an account
+CREATE OR REPLACE FUNCTION apply_account_balance_delta(p_account_id uuid, p_delta numeric)
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE accounts
+    SET balance = COALESCE(balance, 0) + p_delta
+    WHERE id = p_account_id;
+$$;
+
+-- Full recompute from the ledger, used when reconciliation finds drift
+CREATE OR REPLACE FUNCTION recompute_account_balance(p_account_id uuid)
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE accounts
+    SET balance = opening_balance + COALESCE(
+        (SELECT SUM(amount) FROM transactions WHERE account_id = p_account_id), 0
+    )
+    WHERE id = p_account_id;
+$$;
+
+-- Expected balance of each account according to the ledger
+CREATE OR REPLACE FUNCTION account_ledger_balances(p_user_id text DEFAULT NULL)
+RETURNS TABLE (account_id uuid, ledger_balance numeric)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT a.id, a.opening_balance + COALESCE(SUM(t.amount), 0)
+    FROM accounts a
+    LEFT JOIN transactions t ON t.account_id = a.id
+    WHERE p_user_id IS NULL OR a.user_id = p_user_id
+    GROUP BY a.id, a.opening_balance;
+$$;
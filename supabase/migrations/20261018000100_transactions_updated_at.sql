@@ -0,0 +1,20 @@
+-- Sync watermark for the local ledger mirror: rows created or changed since
+-- the last pull are found through (user_id, updated_at).
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS transactions_user_updated_at_idx ON transactions (user_id, updated_at, id);
+
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS transactions_set_updated_at ON transactions;
+CREATE TRIGGER transactions_set_updated_at
+    BEFORE UPDATE ON transactions
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
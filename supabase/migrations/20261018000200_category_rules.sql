@@ -0,0 +1,12 @@
+-- User-defined keyword rules for categorizing imported transactions. They
+-- are applied before the built-in rules; a higher priority wins.
+CREATE TABLE IF NOT EXISTS category_rules (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id uuid NOT NULL,
+    keyword text NOT NULL,
+    category text NOT NULL,
+    priority integer NOT NULL DEFAULT 0,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS category_rules_user_idx ON category_rules (user_id);
@@ -0,0 +1,86 @@
+-- Pre-aggregated dashboard cube: income, expense (positive) and row count per
+-- user, account, category and day. The app adds the cells of every insert;
+-- rebuild_transaction_rollups and transaction_rollup_drift recompute and
+-- check it against the ledger.
+CREATE TABLE IF NOT EXISTS transaction_rollups (
+    id uuid NOT NULL UNIQUE DEFAULT gen_random_uuid(),
+    user_id text NOT NULL,
+    account_id uuid NOT NULL,
+    category text NOT NULL,
+    day date NOT NULL,
+    income numeric NOT NULL DEFAULT 0,
+    expense numeric NOT NULL DEFAULT 0,
+    count integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, account_id, category, day)
+);
+
+-- Keyset reads of a user's date window: (user_id, day, id)
+CREATE INDEX IF NOT EXISTS transaction_rollups_user_day_idx ON transaction_rollups (user_id, day, id);
+
+-- Add a batch of cells (a JSON array of rows) to the cube in one statement
+CREATE OR REPLACE FUNCTION apply_transaction_rollup_deltas(p_cells jsonb)
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO transaction_rollups AS r (user_id, account_id, category, day, income, expense, count)
+    SELECT c.user_id, c.account_id, c.category, c.day, c.income, c.expense, c.count
+    FROM jsonb_to_recordset(p_cells)
+        AS c(user_id text, account_id uuid, category text, day date,
+             income numeric, expense numeric, count integer)
+    ON CONFLICT (user_id, account_id, category, day) DO UPDATE
+    SET income = r.income + EXCLUDED.income,
+        expense = r.expense + EXCLUDED.expense,
+        count = r.count + EXCLUDED.count;
+$$;
+
+-- The ledger aggregated into cube cells
+CREATE OR REPLACE FUNCTION ledger_rollup_cells(p_user_id text DEFAULT NULL)
+RETURNS TABLE (user_id text, account_id uuid, category text, day date,
+               income numeric, expense numeric, count integer)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT t.user_id::text, t.account_id, COALESCE(t.type, ''), t.date::date,
+           SUM(CASE WHEN t.amount > 0 THEN t.amount ELSE 0 END),
+           SUM(CASE WHEN t.amount < 0 THEN -t.amount ELSE 0 END),
+           COUNT(*)::integer
+    FROM transactions t
+    WHERE p_user_id IS NULL OR t.user_id::text = p_user_id
+    GROUP BY t.user_id, t.account_id, COALESCE(t.type, ''), t.date::date;
+$$;
+
+-- Recompute one user's cube (or everyone's) from the ledger
+CREATE OR REPLACE FUNCTION rebuild_transaction_rollups(p_user_id text DEFAULT NULL)
+RETURNS void
+LANGUAGE sql
+AS $$
+    DELETE FROM transaction_rollups WHERE p_user_id IS NULL OR user_id = p_user_id;
+    INSERT INTO transaction_rollups (user_id, account_id, category, day, income, expense, count)
+    SELECT * FROM ledger_rollup_cells(p_user_id);
+$$;
+
+-- Cells where the cube and the ledger disagree
+CREATE OR REPLACE FUNCTION transaction_rollup_drift(p_user_id text DEFAULT NULL, p_tolerance numeric DEFAULT 0.005)
+RETURNS TABLE (user_id text, account_id uuid, category text, day date,
+               cube_income numeric, ledger_income numeric,
+               cube_expense numeric, ledger_expense numeric,
+               cube_count integer, ledger_count integer)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE(r.user_id, l.user_id), COALESCE(r.account_id, l.account_id),
+           COALESCE(r.category, l.category), COALESCE(r.day, l.day),
+           COALESCE(r.income, 0), COALESCE(l.income, 0),
+           COALESCE(r.expense, 0), COALESCE(l.expense, 0),
+           COALESCE(r.count, 0), COALESCE(l.count, 0)
+    FROM (SELECT * FROM transaction_rollups WHERE p_user_id IS NULL OR user_id = p_user_id) r
+    FULL OUTER JOIN ledger_rollup_cells(p_user_id) l
+        ON r.user_id = l.user_id AND r.account_id = l.account_id
+       AND r.category = l.category AND r.day = l.day
+    WHERE ABS(COALESCE(r.income, 0) - COALESCE(l.income, 0)) > p_tolerance
+       OR ABS(COALESCE(r.expense, 0) - COALESCE(l.expense, 0)) > p_tolerance
+       OR COALESCE(r.count, 0) <> COALESCE(l.count, 0);
+$$;
+
+-- Backfill from the existing ledger
+SELECT rebuild_transaction_rollups();
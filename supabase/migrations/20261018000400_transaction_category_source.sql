@@ -0,0 +1,5 @@
+-- Who chose a transaction's category: 'user' when picked by hand, 'auto' when
+-- predicted (statement imports, "Auto-detect"). The per-user category model
+-- only learns from 'user' rows; NULL marks rows from before this column.
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS category_source text
+    CHECK (category_source IN ('user', 'auto'));
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# Make the top-level modules importable when running pytest from any directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Placeholder credentials so modules that build clients at import time load offline
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.placeholder.key")
+os.environ.setdefault("CLIENT_ID", "test-client-id")
+os.environ.setdefault("TENANT_ID", "test-tenant-id")
+os.environ.setdefault("CLIENT_SECRET", "test-client-secret")
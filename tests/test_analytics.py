@@ -0,0 +1,92 @@
+import pandas as pd
+
+import analytics
+from database import apply_transaction_schema
+
+
+def make_transactions():
+    return apply_transaction_schema(pd.DataFrame({
+        "date": ["2025-01-04", "2025-01-05", "2025-01-05", "2025-02-01", "2025-02-03"],
+        "amount": [100.0, -20.0, -5.0, 50.0, -30.0],
+        "type": ["Salary", "Food", "Transport", "Salary", "Food"],
+        "account_id": ["a", "a", "b", "b", "a"],
+    }))
+
+
+def test_period_summary_matches_per_period_masks():
+    df = make_transactions()
+
+    monthly = analytics.period_summary(df, "monthly")
+    assert monthly["period"].tolist() == ["2025-01", "2025-02"]
+    assert monthly["Income"].tolist() == [100.0, 50.0]
+    assert monthly["Expenses"].tolist() == [25.0, 30.0]
+    assert monthly["Count"].tolist() == [3, 2]
+
+    # Saturday 2025-01-04 and Sunday 2025-01-05 fall in different weeks
+    weekly = analytics.period_summary(df, "weekly")
+    assert weekly["period_start"].dt.strftime("%Y-%m-%d").tolist() == [
+        "2024-12-29", "2025-01-05", "2025-01-26", "2025-02-02"]
+
+
+def test_category_breakdown_and_totals():
+    df = make_transactions()
+
+    breakdown = analytics.category_breakdown(df, sign="expense")
+    assert list(zip(breakdown["type"], breakdown["amount"])) == [("Food", 50.0), ("Transport", 5.0)]
+    assert analytics.summary_totals(df) == {"income": 150.0, "expenses": 55.0, "net": 95.0}
+
+
+def test_running_balances_per_account():
+    df = make_transactions()
+
+    balances = analytics.running_balances(df, {"a": "Checking"})
+    checking = balances[balances["Account"] == "Checking"]
+    assert checking["Balance"].tolist() == [100.0, 80.0, 50.0]
+    assert balances[balances["Account"] == "b"]["Balance"].tolist() == [-5.0, 45.0]
+
+
+def test_downsample_caps_points_per_series_and_keeps_endpoints():
+    dates = pd.date_range("2020-01-01", periods=1000, freq="D")
+    balances = pd.DataFrame({
+        "Date": list(dates) * 2,
+        "Account": ["a"] * 1000 + ["b"] * 1000,
+        "Balance": list(range(1000)) + [(-1) ** i * i for i in range(1000)],
+    })
+
+    for method in ["lttb", "minmax"]:
+        reduced = analytics.downsample(balances, "Date", "Balance", 50, by="Account", method=method)
+        counts = reduced.groupby("Account").size()
+        assert (counts <= 50).all() and (counts >= 40).all()
+        series = reduced[reduced["Account"] == "b"]
+        assert series["Date"].is_monotonic_increasing
+    lttb = analytics.downsample(balances, "Date", "Balance", 50, by="Account")
+    assert lttb.groupby("Account")["Date"].agg(["min", "max"]).eq(
+        [dates[0], dates[-1]]).all().all()
+
+
+def test_bounded_period_summary_coarsens_until_within_budget():
+    df = apply_transaction_schema(pd.DataFrame({
+        "date": pd.date_range("2015-01-01", "2024-12-31", freq="D"),
+        "amount": 1.0,
+        "type": "Salary",
+        "account_id": "a",
+    }))
+
+    summary, period = analytics.bounded_period_summary(df, "daily", 200)
+    assert period == "monthly" and len(summary) == 120
+    summary, period = analytics.bounded_period_summary(df, "daily", 5)
+    assert period == "yearly" and summary["period"].tolist() == ["2020", "2021", "2022", "2023", "2024"]
+
+
+def test_rollup_cells_answer_dashboard_queries_like_the_raw_ledger():
+    df = make_transactions().assign(user_id="u1")
+    cells = analytics.rollup_cells(df)
+    # Two Food expenses on different days stay separate cells; nothing merges across accounts
+    assert len(cells) == 5
+    assert cells["count"].sum() == len(df)
+
+    assert analytics.rollup_totals(cells) == analytics.summary_totals(df)
+    pd.testing.assert_frame_equal(analytics.rollup_period_summary(cells, "weekly"),
+                                  analytics.period_summary(df, "weekly"), check_dtype=False)
+    assert (analytics.rollup_category_breakdown(cells).to_dict("records")
+            == analytics.category_breakdown(df).to_dict("records"))
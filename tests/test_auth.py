@@ -0,0 +1,60 @@
+import pytest
+
+import auth
+
+
+class FakeMsalApp:
+    built = 0
+    exchanges = []
+
+    def __init__(self, client_id, authority, client_credential, token_cache, http_cache):
+        FakeMsalApp.built += 1
+        self.token_cache = token_cache
+        self.http_cache = http_cache
+
+    def get_authorization_request_url(self, scopes, redirect_uri):
+        return f"https://login.example/authorize?redirect_uri={redirect_uri}"
+
+    def acquire_token_by_authorization_code(self, code, scopes, redirect_uri):
+        FakeMsalApp.exchanges.append((code, self))
+        return {"access_token": "token", "id_token_claims": {"sub": "user-1"}}
+
+
+@pytest.fixture
+def fake_msal(monkeypatch):
+    FakeMsalApp.built = 0
+    FakeMsalApp.exchanges = []
+    monkeypatch.setattr("msal.ConfidentialClientApplication", FakeMsalApp)
+    monkeypatch.setattr(auth, "_msal_app", None)
+    monkeypatch.setattr(auth, "_redeemed_codes", auth.OrderedDict())
+    auth.get_sign_in_url.cache_clear()
+    yield
+    auth.get_sign_in_url.cache_clear()
+
+
+def test_msal_app_and_sign_in_url_are_built_once(fake_msal):
+    urls = {auth.get_sign_in_url() for _ in range(5)}
+
+    assert urls == {"https://login.example/authorize?redirect_uri=http://localhost:8501/auth"}
+    assert auth.get_msal_app() is auth.get_msal_app()
+    assert FakeMsalApp.built == 1
+
+
+def test_auth_code_is_redeemed_once(fake_msal):
+    first = auth.acquire_token_by_auth_code("code-1")
+    second = auth.acquire_token_by_auth_code("code-1")
+
+    assert auth.get_user_id_from_token(first) == "user-1"
+    assert second["error"] == "invalid_grant"
+    assert [code for code, _ in FakeMsalApp.exchanges] == ["code-1"]
+
+
+def test_auth_codes_are_redeemed_with_throwaway_token_caches(fake_msal):
+    auth.acquire_token_by_auth_code("code-1")
+    auth.acquire_token_by_auth_code("code-2")
+
+    apps = [app for _, app in FakeMsalApp.exchanges]
+    shared = auth.get_msal_app()
+    assert all(app is not shared and app.http_cache is shared.http_cache for app in apps)
+    assert apps[0].token_cache is not apps[1].token_cache
+    assert shared.token_cache is None
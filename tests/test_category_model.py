@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from category_model import CategoryModel, CategoryModels
+
+
+HISTORY = [
+    ("t1", "TESCO STORES 1234", "Food"),
+    ("t2", "Tesco Express 88", "Food"),
+    ("t3", "SHELL FUEL STATION", "Transport"),
+    ("t4", "shell petrol 9", "Transport"),
+    ("t5", "CITY GYM MEMBERSHIP", "Health"),
+    ("t6", "Gym monthly fee", "Health"),
+]
+
+
+def test_model_predicts_batches_from_history():
+    model = CategoryModel(n_features=2 ** 12)
+    ids, descriptions, categories = zip(*HISTORY)
+    model.learn(ids, descriptions, categories)
+
+    predicted = model.predict(["TESCO 5555", "Shell garage", "gym"])
+    assert predicted["category"].tolist() == ["Food", "Transport", "Health"]
+    assert (predicted["confidence"] > 0.5).all()
+    assert CategoryModel().predict(["anything"])["category"].tolist() == [None]
+
+
+def test_incremental_learning_matches_full_retrain():
+    incremental = CategoryModel(n_features=2 ** 12)
+    for transaction in HISTORY:
+        incremental.learn(*([value] for value in transaction))
+    # t6 is recategorized, then t5 loses its category altogether
+    incremental.learn(["t6"], ["Gym monthly fee"], ["Entertainment"])
+    incremental.learn(["t5"], ["CITY GYM MEMBERSHIP"], [None])
+
+    final = [row for row in HISTORY if row[0] not in ("t5", "t6")] + [("t6", "Gym monthly fee", "Entertainment")]
+    retrained = CategoryModel(n_features=2 ** 12)
+    retrained.learn(*zip(*final))
+
+    batch = ["tesco", "shell", "gym fee", "unknown shop"]
+    assert incremental.size == retrained.size == 5
+    assert incremental.predict(batch)["category"].tolist() == retrained.predict(batch)["category"].tolist()
+    assert np.allclose(incremental.predict(batch)["confidence"], retrained.predict(batch)["confidence"])
+
+
+def test_models_pull_only_new_changes():
+    pulls = []
+    changes = [pd.DataFrame({
+        "id": [row[0] for row in HISTORY],
+        "description": [row[1] for row in HISTORY],
+        "type": [row[2] for row in HISTORY],
+        "updated_at": pd.to_datetime(["2025-05-01T10:00:00Z"] * len(HISTORY)),
+    }), pd.DataFrame({
+        "id": ["t7", "t8"],
+        "description": ["Netflix.com", "ATM withdrawal"],
+        "type": ["Entertainment", "Expense"],
+        "updated_at": pd.to_datetime(["2025-05-02T10:00:00Z"] * 2),
+    })]
+
+    def pull_changes(user_id, since):
+        pulls.append(since)
+        return changes.pop(0) if changes else pd.DataFrame()
+
+    models = CategoryModels(pull_changes, n_features=2 ** 12)
+    assert models.model("user-1").size == 6
+    # The second pull starts (with overlap) at the first pull's watermark and skips unlabeled rows
+    assert models.model("user-1").size == 7
+    assert pulls[0] is None
+    assert pulls[1] == pd.Timestamp("2025-05-01T09:59:00Z")
+
+
+def test_models_learn_only_user_chosen_categories():
+    changes = [pd.DataFrame({
+        "id": ["t1", "t2", "t3", "t4", "t5", "t6"],
+        "description": ["TESCO STORES", "SHELL FUEL", "NETFLIX", "PAYROLL", "ATM", "CITY GYM"],
+        "type": ["Food", "Transport", "Entertainment", "Income", "Other", "Health"],
+        # Predicted rows are never learned; legacy rows (no source) only with a real category
+        "category_source": ["user", "auto", "auto", None, None, None],
+        "updated_at": pd.to_datetime(["2025-05-01T10:00:00Z"] * 6),
+    }), pd.DataFrame({
+        "id": ["t2"],
+        "description": ["SHELL FUEL"],
+        "type": ["Transport"],
+        "category_source": ["user"],
+        "updated_at": pd.to_datetime(["2025-05-02T10:00:00Z"]),
+    })]
+
+    models = CategoryModels(lambda user_id, since: changes.pop(0) if changes else pd.DataFrame(),
+                            n_features=2 ** 12)
+    model = models.model("user-1")
+    assert model.size == 2 and sorted(model.categories) == ["Food", "Health"]
+    # A predicted row the user later relabels becomes a label
+    assert models.model("user-1").size == 3
@@ -0,0 +1,198 @@
+import time
+
+import pandas as pd
+
+import database
+
+
+class FakeQuery:
+    def __init__(self, backend, table):
+        self.backend = backend
+        self.table = table
+        self.payload = None
+
+    def insert(self, payload):
+        self.payload = payload
+        return self
+
+    def execute(self):
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        self.backend.calls.append((self.table, len(rows)))
+        if any(row["description"] == "reject" for row in rows):
+            raise RuntimeError("rejected by backend")
+        self.backend.rows.extend(rows)
+        return self
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.calls = []
+        self.rows = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def test_insert_transactions_bulk_batches_and_reports_rows(monkeypatch):
+    fake = FakeSupabase()
+    balance_updates = []
+    monkeypatch.setattr(database, "supabase", fake)
+    monkeypatch.setattr(database, "apply_balance_delta", lambda *args: balance_updates.append(args))
+    rollup_updates = []
+    monkeypatch.setattr(database, "apply_rollup_deltas", rollup_updates.append)
+
+    df = pd.DataFrame({
+        "Date": ["2025-05-01", "not a date", "2025-05-03", "2025-05-04", "2025-05-05"],
+        "Amount": ["1000.00", "5", "-50", "oops", "-12.5"],
+        "Type": ["Income", "Expense", "Expense", "Expense", "Expense"],
+        "Description": ["Salary", "Bad date", "Grocery", "Bad amount", "reject"],
+    })
+    results = database.insert_transactions_bulk("user-1", "acct-1", df, chunk_size=2)
+
+    assert results["success"].tolist() == [True, False, True, False, False]
+    assert results.loc[1, "error"] == "Invalid date"
+    assert results.loc[3, "error"] == "Invalid amount"
+    assert "rejected" in results.loc[4, "error"]
+    # One batch for the first two valid rows, then a rejected batch retried row by row
+    assert fake.calls == [("transactions", 2), ("transactions", 1), ("transactions", 1)]
+    assert [row["date"] for row in fake.rows] == ["2025-05-01", "2025-05-03"]
+    # Balance moves once, by the net amount of the inserted rows
+    assert balance_updates == [("acct-1", 950.0)]
+    assert [[row["description"] for row in rows] for rows in rollup_updates] == [["Salary", "Grocery"]]
+
+
+def test_data_cache_serves_copies_and_invalidates_per_user(monkeypatch):
+    monkeypatch.setattr(database, "data_cache", database.DataCache(ttl=60, max_bytes=10**6))
+    loads = []
+
+    @database._cached_query
+    def load(user_id, columns=None):
+        loads.append((user_id, columns))
+        return pd.DataFrame({"amount": [1.0, 2.0]})
+
+    first = load("u1", columns=["amount"])
+    first["amount"] = 0.0  # callers may mutate their copy
+    assert load("u1", ["amount"])["amount"].tolist() == [1.0, 2.0]
+    load("u2")
+    assert loads == [("u1", ["amount"]), ("u2", None)]
+
+    database.data_cache.invalidate_user("u1")
+    load("u1", columns=["amount"])
+    load("u2")
+    assert len(loads) == 3
+
+    # A read that overlaps an invalidation is returned but not cached
+    @database._cached_query
+    def racing_load(user_id):
+        loads.append((user_id, "racing"))
+        database.data_cache.invalidate_user(user_id)  # e.g. an import committing meanwhile
+        return pd.DataFrame({"amount": [1.0]})
+
+    racing_load("u1")
+    racing_load("u1")
+    assert loads[-2:] == [("u1", "racing")] * 2
+
+
+def test_data_cache_evicts_least_recently_used_over_budget():
+    frame = pd.DataFrame({"amount": range(100)})
+    nbytes = int(frame.memory_usage(deep=True).sum())
+    cache = database.DataCache(ttl=60, max_bytes=2 * nbytes)
+
+    cache.put(("u1", "q", ()), frame)
+    cache.put(("u2", "q", ()), frame)
+    cache.get(("u1", "q", ()))
+    cache.put(("u3", "q", ()), frame)
+
+    assert cache.get(("u2", "q", ())) is None
+    assert cache.get(("u1", "q", ())) is not None
+    assert cache.size_bytes <= 2 * nbytes
+
+
+def test_flag_duplicates_counts_fingerprints_against_ledger(monkeypatch):
+    queries = []
+
+    def fake_fetch(user_id, **filters):
+        queries.append(filters)
+        return pd.DataFrame({
+            "date": pd.to_datetime(["2025-05-01", "2025-05-02"]),
+            "amount": [-4.5, -30.0],
+            "description": ["Coffee  Shop", "UBER *TRIP"],
+        })
+
+    monkeypatch.setattr(database, "fetch_transactions", fake_fetch)
+    df = pd.DataFrame({
+        "Date": ["2025-05-01", "2025-05-01", "2025-05-02", "2025-05-03", "2025-05-03"],
+        "Amount": [-4.5, -4.5, -30.0, -8.0, -8.0],
+        "Description": ["coffee shop", "coffee shop", "Uber trip", "Lunch", "Lunch"],
+        "Source": ["may.pdf", "may.pdf", "may.pdf", "may.pdf", "june.pdf"],
+    })
+    flags = database.flag_duplicates("user-1", "acct-1", df, source_column="Source")
+
+    # One stored coffee covers one of the two, and june.pdf repeats may.pdf's lunch
+    assert flags.tolist() == [True, False, True, False, True]
+    assert len(queries) == 1
+    assert queries[0]["account_ids"] == ["acct-1"]
+    assert queries[0]["start_date"] == pd.Timestamp("2025-05-01")
+    assert queries[0]["end_date"] == pd.Timestamp("2025-05-03")
+    assert queries[0]["use_cache"] is True
+
+
+def test_insert_transactions_bulk_skips_duplicates(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(database, "supabase", fake)
+    monkeypatch.setattr(database, "apply_balance_delta", lambda *args: None)
+    monkeypatch.setattr(database, "apply_rollup_deltas", lambda *args: None)
+    queries = []
+
+    def fake_fetch(user_id, **filters):
+        queries.append(filters)
+        return pd.DataFrame({
+            "date": pd.to_datetime(["2025-05-01"]), "amount": [12.0], "description": ["Refund"],
+        })
+
+    monkeypatch.setattr(database, "fetch_transactions", fake_fetch)
+
+    df = pd.DataFrame({"Date": ["2025-05-01", "2025-05-02"], "Amount": [12.0, 5.0],
+                       "Description": ["refund", "Refund"]})
+    results = database.insert_transactions_bulk("user-1", "acct-1", df, skip_duplicates=True)
+    # The import checks against the ledger itself, not a possibly stale cached copy
+    assert [query["use_cache"] for query in queries] == [False]
+
+    assert results["success"].tolist() == [False, True]
+    assert results.loc[0, "error"] == database.DUPLICATE_ERROR
+    assert [row["date"] for row in fake.rows] == ["2025-05-02"]
+
+
+def test_gather_queries_runs_concurrently_and_isolates_failures():
+    def slow(value):
+        time.sleep(0.2)
+        return value
+
+    def broken():
+        raise RuntimeError("backend down")
+
+    start = time.perf_counter()
+    results, errors = database.gather_queries({
+        "accounts": lambda: slow("accounts"),
+        "transactions": lambda: slow("transactions"),
+        "rules": broken,
+    })
+
+    assert time.perf_counter() - start < 0.35
+    assert results == {"accounts": "accounts", "transactions": "transactions", "rules": None}
+    assert list(errors) == ["rules"] and "backend down" in str(errors["rules"])
+
+
+def test_fetchers_raise_backend_errors_only_when_asked(monkeypatch):
+    class DownRepository:
+        def accounts(self, user_id=None, columns=None):
+            raise RuntimeError("backend down")
+
+    monkeypatch.setattr(database, "repository", DownRepository())
+    monkeypatch.setattr(database, "data_cache", database.DataCache(ttl=0))
+
+    assert database.fetch_accounts("user-1").empty
+    results, errors = database.gather_queries({
+        "accounts": lambda: database.fetch_accounts("user-1", raise_errors=True),
+    })
+    assert results == {"accounts": None} and "backend down" in str(errors["accounts"])
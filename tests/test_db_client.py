@@ -0,0 +1,120 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+
+import database
+from db_client import DataClient
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """A sliver of the Supabase REST API: GET and POST on /rest/v1/<table>"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(("GET", self.path, self.client_address[1], self.headers.get("apiKey")))
+        if server.failures:
+            server.failures -= 1
+            return self.reply(503, {"message": "unavailable"})
+        table = urlparse(self.path).path.rsplit("/", 1)[-1]
+        query = parse_qs(urlparse(self.path).query)
+        user = query.get("user_id", ["eq."])[0][3:]
+        self.reply(200, [row for row in server.tables.get(table, []) if row["user_id"] == user])
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"null")
+        server.requests.append(("POST", self.path, self.client_address[1], self.headers.get("apiKey")))
+        if server.failures:
+            server.failures -= 1
+            return self.reply(503, {"message": "unavailable"})
+        self.reply(201, body if isinstance(body, list) else [body])
+
+    def reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    server.requests, server.failures = [], 0
+    server.tables = {"accounts": [
+        {"id": "a1", "user_id": "u1", "name": "Checking", "type": "checking",
+         "balance": "10.50", "opening_balance": "0", "currency": "USD",
+         "created_at": "2025-05-01T00:00:00+00:00"},
+        {"id": "a2", "user_id": "u2", "name": "Other user", "type": "savings",
+         "balance": "1", "opening_balance": "0", "currency": "USD",
+         "created_at": "2025-05-01T00:00:00+00:00"},
+    ]}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def client_for(server, **options):
+    return DataClient(f"http://127.0.0.1:{server.server_address[1]}", "test-key", backoff=0, **options)
+
+
+def test_reads_share_one_keep_alive_connection_and_are_counted(stand_in, monkeypatch):
+    client = client_for(stand_in)
+    monkeypatch.setattr(database, "supabase", client)
+    monkeypatch.setattr(database, "data_cache", database.DataCache(ttl=0, max_bytes=10**6))
+
+    with client.track() as rerun:
+        for _ in range(3):
+            accounts = database.fetch_accounts("u1")
+
+    assert accounts["name"].tolist() == ["Checking"]
+    assert accounts["balance"].tolist() == [10.5]
+    # One connection (client port) for every call, each authenticated with the key
+    assert len({port for _, _, port, _ in stand_in.requests}) == 1
+    assert {key for _, _, _, key in stand_in.requests} == {"test-key"}
+    stats = client.stats.snapshot()
+    assert stats["calls"] == 3 and stats["errors"] == 0
+    assert stats["endpoints"]["GET /rest/v1/accounts"]["count"] == 3
+    assert rerun.snapshot()["calls"] == 3
+    client.close()
+
+
+def test_reads_are_retried_but_writes_are_not(stand_in):
+    client = client_for(stand_in, retries=2)
+
+    stand_in.failures = 2
+    rows = client.table("accounts").select("*").eq("user_id", "u1").execute().data
+    assert [row["id"] for row in rows] == ["a1"]
+    assert client.stats.snapshot()["retries"] == 2
+
+    stand_in.failures = 1
+    with pytest.raises(Exception):
+        client.table("transactions").insert({"user_id": "u1", "amount": 1}).execute()
+    assert [method for method, *_ in stand_in.requests].count("POST") == 1
+    assert client.stats.snapshot()["errors"] == 1
+    client.close()
+
+
+def test_reads_give_up_after_timeouts():
+    def hang(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    client = DataClient("http://stand-in.invalid", "test-key", retries=2, backoff=0,
+                        transport=httpx.MockTransport(hang))
+    with pytest.raises(httpx.ReadTimeout):
+        client.table("accounts").select("*").execute()
+
+    stats = client.stats.snapshot()
+    assert stats["calls"] == 1 and stats["errors"] == 1 and stats["retries"] == 2
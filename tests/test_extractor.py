@@ -0,0 +1,231 @@
+import json
+import threading
+import time
+
+import fitz
+import pandas as pd
+
+import extractor
+
+
+def make_pdf(pages):
+    doc = fitz.open()
+    for number in range(pages):
+        doc.new_page().insert_text((40, 40), f"page {number}")
+    return doc.tobytes()
+
+
+def test_pdf_pages_keep_order_and_boundaries(monkeypatch):
+    pdf_bytes = make_pdf(12)
+    monkeypatch.setattr(extractor, "PDF_PARALLEL_MIN_PAGES", 4)
+
+    serial = extractor.extract_pages_from_pdf(pdf_bytes, workers=1)
+    parallel = extractor.extract_pages_from_pdf(pdf_bytes, workers=2)
+
+    assert [page.strip() for page in serial] == [f"page {number}" for number in range(12)]
+    assert parallel == serial
+    assert extractor.extract_text_from_pdf(pdf_bytes).split(extractor.PAGE_BREAK) == serial
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """Stands in for Gemini: one transaction per statement line, in JSON"""
+
+    def __init__(self, fail_first=0, delay=0.0):
+        self.fail_first = fail_first
+        self.delay = delay
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.prompts.append(prompt)
+            if len(self.prompts) <= self.fail_first:
+                raise RuntimeError("transient failure")
+        time.sleep(self.delay)
+        statement = prompt.split("Bank Statement Text:", 1)[1]
+        rows = []
+        for line in statement.splitlines():
+            if line.startswith("2025-"):
+                date, amount, description = line.split(" ", 2)
+                rows.append({"Date": date, "Amount": float(amount), "Description": description,
+                             "Type": "Income" if float(amount) > 0 else "Expense"})
+        return StubResponse("```json\n" + json.dumps(rows) + "\n```")
+
+
+def statement_pages(pages, lines_per_page):
+    return [
+        "\n".join(f"2025-05-{page + 1:02d} {line - 10}.00 Merchant {page}-{line}"
+                  for line in range(lines_per_page))
+        for page in range(pages)
+    ]
+
+
+def test_llm_extraction_chunks_pages_and_keeps_statement_order(monkeypatch):
+    monkeypatch.setattr(extractor, "LLM_RETRY_BACKOFF", 0)
+    text = extractor.PAGE_BREAK.join(statement_pages(6, 5))
+    stub = StubModel(fail_first=1, delay=0.01)
+
+    df = extractor.extract_transactions_with_llm(text, llm=stub, max_chars=300, concurrency=3)
+
+    assert len(stub.prompts) > 2  # several chunks, plus one retried call
+    assert df.attrs["failed_chunks"] == []
+    assert df["Description"].tolist() == [
+        f"Merchant {page}-{line}" for page in range(6) for line in range(5)]
+
+
+def test_llm_extraction_drops_duplicates_from_overlapping_lines():
+    # A single oversized page is cut on line boundaries with overlapping lines
+    text = statement_pages(1, 40)[0]
+    chunks = extractor.chunk_statement_text(text, max_chars=400, overlap_lines=2)
+    assert len(chunks) > 1 and all(len(chunk) <= 400 for chunk in chunks)
+
+    df = extractor.extract_transactions_with_llm(text, llm=StubModel(), max_chars=400)
+    assert df["Description"].tolist() == [f"Merchant 0-{line}" for line in range(40)]
+
+
+def test_llm_extraction_keeps_repeated_transactions_across_page_breaks():
+    # The same coffee at the end of page 1 and the start of page 2 is two purchases
+    pages = ["2025-05-01 -4.50 Corner Cafe\n2025-05-02 -3.20 Corner Cafe",
+             "2025-05-02 -3.20 Corner Cafe\n2025-05-03 -9.99 Netflix"]
+    text = extractor.PAGE_BREAK.join(pages)
+
+    df = extractor.extract_transactions_with_llm(text, llm=StubModel(), max_chars=60)
+    assert len(extractor.chunk_statement_text(text, max_chars=60)) == 2
+    assert df["Description"].tolist() == ["Corner Cafe"] * 3 + ["Netflix"]
+
+
+def test_llm_extraction_reports_failed_chunks(monkeypatch):
+    monkeypatch.setattr(extractor, "LLM_RETRY_BACKOFF", 0)
+    text = extractor.PAGE_BREAK.join(statement_pages(1, 3))
+
+    df = extractor.extract_transactions_with_llm(text, llm=StubModel(fail_first=5), retries=1)
+    assert df.empty and df.attrs["failed_chunks"] == [0]
+
+
+def test_parse_cache_skips_the_llm_for_repeated_statements(monkeypatch, tmp_path):
+    from statement_cache import StatementCache
+
+    cache = StatementCache(str(tmp_path))
+    stub = StubModel()
+    monkeypatch.setattr(extractor, "statement_cache", cache)
+    monkeypatch.setattr(extractor, "model", stub)
+    text = statement_pages(1, 3)[0]
+
+    first = extractor.parse_statement_text(text)
+    second = extractor.parse_statement_text(text)
+    pd.testing.assert_frame_equal(first, second)
+    assert len(stub.prompts) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    monkeypatch.setattr(extractor, "PROMPT_VERSION", "next")
+    extractor.parse_statement_text(text)
+    assert len(stub.prompts) == 2
+
+    cache.max_bytes = 0
+    cache.put("x", first)
+    assert cache.stats()["entries"] == 0
+
+
+def make_statement_pdf(lines):
+    doc = fitz.open()
+    doc.new_page().insert_text((40, 40), "\n".join(lines), fontsize=9)
+    return doc.tobytes()
+
+
+def test_layout_fast_path_parses_tabular_statements_without_the_llm(monkeypatch):
+    stub = StubModel()
+    monkeypatch.setattr(extractor, "model", stub)
+    pdf_bytes = make_statement_pdf([
+        "ACME Bank statement",
+        "Date        Description        Amount     Balance",
+        "05/01/2025  Payroll ACME      1,200.00   1,200.00",
+        "05/03/2025  Grocery Mart        (54.10)  1,145.90",
+        "05/04/2025  City Transit         12.50-  1,133.40",
+    ])
+    register = list(extractor.LAYOUT_PROFILES)
+    extractor.register_layout_profile(
+        extractor.LayoutProfile(name="acme", identifiers=("ACME Bank",), amount_position=-2,
+                                date_formats=("%m/%d/%Y",)))
+    try:
+        df = extractor.parse_pdf(pdf_bytes, use_cache=False)
+    finally:
+        extractor.LAYOUT_PROFILES[:] = register
+
+    assert df.attrs["extraction_path"] == "layout:acme"
+    assert stub.prompts == []
+    assert df.to_dict("records") == [
+        {"Date": "2025-05-01", "Amount": 1200.0, "Type": "Income", "Description": "Payroll ACME"},
+        {"Date": "2025-05-03", "Amount": -54.1, "Type": "Expense", "Description": "Grocery Mart"},
+        {"Date": "2025-05-04", "Amount": -12.5, "Type": "Expense", "Description": "City Transit"},
+    ]
+
+
+def test_low_confidence_layouts_fall_back_to_the_llm(monkeypatch):
+    stub = StubModel()
+    monkeypatch.setattr(extractor, "model", stub)
+    # Amounts before descriptions: no trailing amount for the layout parser
+    pdf_bytes = make_statement_pdf([
+        "2025-05-01 1000.00 Salary",
+        "2025-05-02 -50.00 Grocery",
+    ])
+
+    df = extractor.parse_pdf(pdf_bytes, use_cache=False)
+    assert df.attrs["extraction_path"] == "llm"
+    assert len(stub.prompts) == 1
+
+
+def test_generic_layout_only_reads_a_lone_signed_amount_column(monkeypatch):
+    stub = StubModel()
+    monkeypatch.setattr(extractor, "model", stub)
+    # A running balance follows each amount: the generic profile can't tell them apart
+    with_balance = make_statement_pdf([
+        "Date        Description        Amount     Balance",
+        "2024-06-01  Opening balance              1000.00",
+        "2024-06-01  GROCERY STORE        45.00    955.00",
+        "2024-06-02  SALARY             2000.00   2955.00",
+        "2024-06-03  RENT               1200.00   1755.00",
+    ])
+    df = extractor.parse_pdf(with_balance, use_cache=False)
+    assert df.attrs["extraction_path"] == "llm"
+    assert len(stub.prompts) == 1
+
+    # Only whole-description summary rows are skipped; they still count against confidence
+    purchases = [("TOTAL WINE & MORE", -32.5), ("Balance transfer fee", -12.0), ("TotalEnergies", -60.0)]
+    purchases += [(f"SHOP {chr(64 + number)}", -float(number)) for number in range(1, 18)]
+    signed = make_statement_pdf(
+        ["Date        Description        Amount", "2024-06-01  Opening balance   1000.00"]
+        + [f"2024-06-{day:02d}  {name}   {amount:.2f}" for day, (name, amount) in enumerate(purchases, 2)]
+        + ["2024-06-30  Total             1955.00"]
+    )
+    df = extractor.parse_pdf(signed, use_cache=False)
+    assert df.attrs["extraction_path"] == "layout:generic"
+    assert df["Description"].tolist() == [name for name, _ in purchases]
+    assert df["Amount"].tolist() == [amount for _, amount in purchases]
+    assert len(stub.prompts) == 1
+
+
+def test_layout_dates_use_one_format_for_the_whole_statement(monkeypatch):
+    stub = StubModel()
+    monkeypatch.setattr(extractor, "model", stub)
+    lines = ["Date        Description        Amount"]
+    day_first = make_statement_pdf(lines + [
+        "01/05/2025  CORNER CAFE        -4.50",
+        "12/05/2025  CITY TRANSIT       -2.80",
+        "13/05/2025  GROCERY MART      -45.00",
+    ])
+    df = extractor.parse_pdf(day_first, use_cache=False)
+    assert df.attrs["extraction_path"] == "layout:generic"
+    assert df["Date"].tolist() == ["2025-05-01", "2025-05-12", "2025-05-13"]
+
+    # No day above 12: DD/MM and MM/DD both fit, so the LLM decides
+    ambiguous = make_statement_pdf(lines + [
+        "01/05/2025  CORNER CAFE        -4.50",
+        "12/05/2025  CITY TRANSIT       -2.80",
+    ])
+    assert extractor.parse_pdf(ambiguous, use_cache=False).attrs["extraction_path"] == "llm"
+    assert len(stub.prompts) == 1
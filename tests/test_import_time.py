@@ -0,0 +1,67 @@
+import ast
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["app.py"] + sorted(os.path.join("pages", name) for name in os.listdir(os.path.join(ROOT, "pages"))
+                            if name.endswith(".py"))
+# Third-party packages every page pays for anyway; only the app's own modules are budgeted
+BASELINE = ["streamlit", "pandas", "numpy", "altair"]
+# Seconds a page's own imports may add on top of the baseline
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "0.25"))
+# SDKs that must only load when they are first used
+LAZY_MODULES = ["supabase", "google.generativeai", "fitz", "msal"]
+
+
+def page_modules(page):
+    """The repo modules a page imports at its top level"""
+    with open(os.path.join(ROOT, page), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names.append(node.module)
+    local = [name for name in names
+             if os.path.exists(os.path.join(ROOT, *name.split(".")) + ".py")]
+    return list(dict.fromkeys(local))
+
+
+def import_profile(modules):
+    """Cumulative import time (seconds) of ``modules`` after the baseline, and the SDKs loaded"""
+    script = "\n".join([
+        f"import {', '.join(BASELINE)}",
+        "import sys",
+        "sys.stderr.write('--baseline--\\n')",
+        f"import {', '.join(modules)}",
+        f"print([name for name in {LAZY_MODULES!r} if name in sys.modules])",
+    ])
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", script],
+                            cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    timings = result.stderr.split("--baseline--", 1)[1].splitlines()
+    total = 0
+    for line in timings:
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            # Top-level entries have a single space before the name; nested ones are indented
+            if not name.startswith("  ") and cumulative.strip().isdigit():
+                total += int(cumulative)
+    return total / 1e6, ast.literal_eval(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_page_imports_stay_within_startup_budget(page):
+    modules = page_modules(page)
+    if not modules:
+        pytest.skip(f"{page} imports no repo modules")
+
+    seconds, loaded_sdks = import_profile(modules)
+
+    assert loaded_sdks == [], f"{page} loads {loaded_sdks} at import"
+    assert seconds <= IMPORT_BUDGET_SECONDS, f"{page} imports take {seconds:.3f}s"
@@ -0,0 +1,108 @@
+import time
+
+import pandas as pd
+
+import jobs
+
+
+def wait_for(queue, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in (jobs.SUCCEEDED, jobs.FAILED):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_parse_job_runs_in_background_and_persists_result(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_parse(user_id, content, progress):
+        calls.append(content)
+        progress("extracting", 0.5)
+        df = pd.DataFrame({"Date": ["2025-05-01"], "Amount": [-4.5], "Description": ["Coffee"]})
+        df.attrs["extraction_path"] = "layout:test"
+        return df
+
+    monkeypatch.setattr(jobs, "run_parse", fake_parse)
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), max_workers=1)
+
+    job_id = queue.submit_parse("user-1", "acct-1", "statement text")
+    job = wait_for(queue, job_id)
+
+    assert job["status"] == jobs.SUCCEEDED and job["progress"] == 1.0
+    assert job["result"]["Description"].tolist() == ["Coffee"]
+    assert job["result"].attrs["extraction_path"] == "layout:test"
+    # Resubmitting the same statement re-attaches to the finished job
+    assert queue.submit_parse("user-1", "acct-1", "statement text") == job_id
+    assert calls == ["statement text"]
+    # A fresh queue on the same database (e.g. after a restart) still sees it
+    reopened = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), max_workers=1)
+    assert reopened.get(job_id)["result"]["Description"].tolist() == ["Coffee"]
+    assert [row["id"] for row in reopened.list("user-1")] == [job_id]
+
+
+def test_failed_and_interrupted_jobs(tmp_path, monkeypatch):
+    def broken_parse(user_id, content, progress):
+        raise ValueError("no transactions")
+
+    monkeypatch.setattr(jobs, "run_parse", broken_parse)
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), max_workers=1)
+    failed = wait_for(queue, queue.submit_parse("user-1", None, b"%PDF-1.4"))
+    assert failed["status"] == jobs.FAILED and failed["error"] == "no transactions"
+    # Only an explicit retry runs a failed statement again
+    assert queue.submit_parse("user-1", None, b"%PDF-1.4") == failed["id"]
+    retried = wait_for(queue, queue.submit_parse("user-1", None, b"%PDF-1.4", force=True))
+    assert retried["id"] != failed["id"] and retried["status"] == jobs.FAILED
+    assert queue.submit_parse("user-1", None, b"%PDF-1.4") == retried["id"]
+
+    # A failed job no longer keeps the uploaded statement
+    with queue._connect() as conn:
+        assert conn.execute("SELECT payload FROM jobs WHERE id = ?", (failed["id"],)).fetchone()[0] is None
+
+    # A job left running by a dead process is picked up again on start
+    queue._update(failed["id"], status=jobs.RUNNING, error=None, payload=b"%PDF-1.4")
+    monkeypatch.setattr(jobs, "run_parse", lambda user_id, content, progress: pd.DataFrame({"n": [len(content)]}))
+    recovered = wait_for(jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), max_workers=1), failed["id"])
+    assert recovered["status"] == jobs.SUCCEEDED
+    assert recovered["result"]["n"].tolist() == [8]
+
+
+def test_concurrent_parse_jobs_merge_into_one_review_table(tmp_path, monkeypatch):
+    running, peak = [], []
+
+    def slow_parse(user_id, content, progress):
+        running.append(content)
+        peak.append(len(running))
+        time.sleep(0.05)
+        running.remove(content)
+        return pd.DataFrame({"Date": ["2025-05-01"], "Amount": [float(len(content))]})
+
+    monkeypatch.setattr(jobs, "run_parse", slow_parse)
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), max_workers=2)
+    job_ids = [queue.submit_parse("user-1", "acct-1", ("x" * n).encode(), f"{n}.pdf")
+               for n in range(1, 6)]
+    finished = [wait_for(queue, job_id) for job_id in job_ids]
+
+    merged = jobs.merge_parse_results(finished)
+    assert merged["Source"].tolist() == [f"{n}.pdf" for n in range(1, 6)]
+    assert merged["Amount"].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert max(peak) <= 2
+
+
+def test_finished_jobs_are_deleted_after_the_retention_window(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "run_parse", lambda user_id, content, progress: pd.DataFrame({"n": [1]}))
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = jobs.JobQueue(path, max_workers=1, retention_seconds=3600)
+    old = wait_for(queue, queue.submit_parse("user-1", None, "old statement"))
+    with queue._connect() as conn:
+        conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time() - 7200, old["id"]))
+
+    recent = wait_for(queue, queue.submit_parse("user-1", None, "new statement"))
+    assert queue.get(old["id"]) is None and queue.get(recent["id"]) is not None
+
+    # Starting a queue sweeps as well
+    with queue._connect() as conn:
+        conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time() - 7200, recent["id"]))
+    assert jobs.JobQueue(path, max_workers=1, retention_seconds=3600).get(recent["id"]) is None
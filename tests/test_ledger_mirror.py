@@ -0,0 +1,70 @@
+import pandas as pd
+
+from ledger_mirror import LedgerMirror
+
+
+class FakeLedger:
+    """In-memory transactions table with an updated_at watermark"""
+
+    def __init__(self):
+        self.rows = {}
+        self.pulls = []
+
+    def upsert(self, row_id, amount, updated_at):
+        self.rows[row_id] = {"id": row_id, "amount": amount,
+                             "updated_at": pd.Timestamp(updated_at, tz="UTC")}
+
+    def pull_changes(self, user_id, since):
+        self.pulls.append(since)
+        rows = [row for row in self.rows.values() if since is None or row["updated_at"] >= since]
+        return pd.DataFrame(rows)
+
+    def count_remote(self, user_id):
+        return len(self.rows)
+
+
+def make_mirror(tmp_path, ledger, **kwargs):
+    return LedgerMirror(str(tmp_path), ledger.pull_changes, ledger.count_remote,
+                        overlap_seconds=0, **kwargs)
+
+
+def test_mirror_pulls_only_rows_after_watermark(tmp_path):
+    ledger = FakeLedger()
+    ledger.upsert("t1", 10.0, "2025-01-01 10:00")
+    ledger.upsert("t2", -5.0, "2025-01-02 10:00")
+    mirror = make_mirror(tmp_path, ledger, resync_interval=3600)
+
+    assert sorted(mirror.read("u1")["id"]) == ["t1", "t2"]
+    ledger.upsert("t2", -7.0, "2025-01-03 10:00")
+    ledger.upsert("t3", 1.0, "2025-01-03 11:00")
+
+    df = mirror.read("u1").set_index("id")
+    assert df["amount"].to_dict() == {"t1": 10.0, "t2": -7.0, "t3": 1.0}
+    assert ledger.pulls == [None, pd.Timestamp("2025-01-02 10:00", tz="UTC")]
+
+
+def test_mirror_full_resync_picks_up_deletes_and_purge(tmp_path):
+    ledger = FakeLedger()
+    ledger.upsert("t1", 10.0, "2025-01-01")
+    ledger.upsert("t2", 20.0, "2025-01-02")
+    mirror = make_mirror(tmp_path, ledger, resync_interval=0)
+    mirror.read("u1")
+
+    del ledger.rows["t1"]
+    assert mirror.read("u1")["id"].tolist() == ["t2"]
+
+    mirror.purge_user("u1")
+    assert mirror.size_bytes() == 0
+
+
+def test_mirror_evicts_least_recently_read_users_over_cap(tmp_path):
+    ledger = FakeLedger()
+    for i in range(200):
+        ledger.upsert(f"t{i}", float(i), "2025-01-01")
+    mirror = make_mirror(tmp_path, ledger)
+    mirror.read("u1")
+    mirror.max_bytes = mirror.size_bytes() + 1
+
+    mirror.read("u2")
+    assert mirror.size_bytes() <= mirror.max_bytes
+    assert len(list(tmp_path.glob("*.parquet"))) == 1
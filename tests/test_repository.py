@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+import database
+from repository import SQLiteRepository
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path, monkeypatch):
+    repository = SQLiteRepository(str(tmp_path / "ledger.sqlite3"))
+    monkeypatch.setattr(database, "repository", repository)
+    monkeypatch.setattr(database, "data_cache", database.DataCache(ttl=60, max_bytes=10**6))
+    yield repository
+    repository.close()
+
+
+def test_sqlite_backend_serves_the_database_api(sqlite_backend):
+    checking = database.create_account("u1", "Checking", "checking", initial_balance=100)[0]["id"]
+    savings = database.create_account("u1", "Savings", "savings")[0]["id"]
+    database.create_account("u2", "Other user", "checking")
+
+    database.insert_transaction("u1", checking, "2025-05-02", -20.0, "Food", "Tesco")
+    results = database.insert_transactions_bulk("u1", savings, pd.DataFrame({
+        "Date": ["2025-05-01", "2025-05-03", "bad"],
+        "Amount": [500, -50, 1],
+        "Description": ["Salary", "Shell", "Broken"],
+    }))
+    assert results["success"].tolist() == [True, True, False]
+
+    accounts = database.fetch_accounts("u1").set_index("name")
+    assert accounts.loc["Checking", "balance"] == 80.0
+    assert accounts.loc["Savings", "balance"] == 450.0
+
+    ledger = database.fetch_transactions("u1")
+    assert ledger["description"].tolist() == ["Salary", "Tesco", "Shell"]
+    assert pd.api.types.is_datetime64_dtype(ledger["date"])
+    expenses = database.fetch_transactions("u1", start_date="2025-05-02", account_ids=[savings],
+                                           sign="expense", columns=["date", "amount"])
+    assert expenses.columns.tolist() == ["date", "amount"]
+    assert expenses["amount"].tolist() == [-50.0]
+
+    pages = list(database.iter_transaction_pages("u1", page_size=2))
+    assert [len(page) for page in pages] == [2, 1]
+    assert database.fetch_transactions("u2").empty
+    assert database._count_transactions("u1") == 3
+    assert len(database._pull_transaction_changes("u1", pd.Timestamp("2000-01-01", tz="UTC"))) == 3
+    assert database.fetch_category_rules("u1").empty
+
+
+def test_sqlite_backend_reconciles_drifted_balances(sqlite_backend):
+    account = database.create_account("u1", "Checking", "checking", initial_balance=10)[0]["id"]
+    database.insert_transaction("u1", account, "2025-05-02", 5.0, "Income", "Refund")
+    sqlite_backend.apply_balance_delta(account, 1.0)
+
+    drifted = database.reconcile_account_balances("u1", fix=True)
+    assert drifted["drift"].tolist() == [1.0]
+    assert database.reconcile_account_balances("u1").empty
+    assert database.fetch_accounts("u1")["balance"].tolist() == [15.0]
+
+
+def test_rollup_cube_tracks_inserts_and_is_checked_against_the_ledger(sqlite_backend):
+    account = database.create_account("u1", "Checking", "checking")[0]["id"]
+    database.insert_transaction("u1", account, "2025-05-02", -20.0, "Food", "Tesco")
+    database.insert_transactions_bulk("u1", account, pd.DataFrame({
+        "Date": ["2025-05-02", "2025-05-02", "2025-06-01"],
+        "Amount": [-5, 100, -7.5],
+        "Category": ["Food", "Salary", "Food"],
+    }))
+
+    cells = database.fetch_rollup("u1", start_date="2025-05-01", end_date="2025-05-31")
+    assert sorted(zip(cells["category"], cells["income"], cells["expense"], cells["count"])) == [
+        ("Food", 0.0, 25.0, 2), ("Salary", 100.0, 0.0, 1)]
+    assert database.reconcile_rollups("u1").empty
+
+    # A write that bypassed the cube shows up as drift until the cube is rebuilt
+    sqlite_backend.insert_transactions([{"user_id": "u1", "account_id": account, "date": "2025-06-01",
+                                         "amount": -2.5, "type": "Food", "description": "Elsewhere"}])
+    drifted = database.reconcile_rollups("u1", fix=True)
+    assert drifted[["cube_expense", "ledger_expense"]].values.tolist() == [[7.5, 10.0]]
+    assert database.reconcile_rollups("u1").empty
+    assert database.fetch_rollup("u1", start_date="2025-06-01")["expense"].tolist() == [10.0]
+
+
+def test_existing_ledgers_get_their_rollup_cube_filled(sqlite_backend, tmp_path):
+    account = database.create_account("u1", "Checking", "checking")[0]["id"]
+    database.insert_transaction("u1", account, "2025-05-02", -20.0, "Food", "Tesco")
+    # A database from before the cube existed
+    sqlite_backend._connection().execute("DROP TABLE transaction_rollups")
+    sqlite_backend.close()
+
+    reopened = SQLiteRepository(str(tmp_path / "ledger.sqlite3"))
+    try:
+        cells = reopened.rollup_cells("u1")
+        assert cells[["category", "expense", "count"]].values.tolist() == [["Food", 20.0, 1]]
+    finally:
+        reopened.close()
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+import database
+import tracing
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracing, "TRACE_LOG_PATH", None)
+    monkeypatch.setattr(tracing, "TRACE_PROMETHEUS_PATH", None)
+    monkeypatch.setattr(tracing, "stats", tracing.SpanStats())
+    return tracing.stats
+
+
+def test_nested_spans_record_histograms_and_self_time(tracer):
+    @tracing.traced()
+    def outer():
+        with tracing.span("inner"):
+            time.sleep(0.02)
+        time.sleep(0.015)
+        tracing.record_span("supabase GET /rest/v1/transactions", 0.01)
+
+    with tracing.collect() as spans:
+        outer()
+        with pytest.raises(ValueError):
+            with tracing.span("inner"):
+                raise ValueError("boom")
+
+    snapshot = tracer.snapshot()
+    name = f"{__name__}.test_nested_spans_record_histograms_and_self_time.<locals>.outer"
+    assert snapshot["inner"]["count"] == 2 and snapshot["inner"]["errors"] == 1
+    assert snapshot[name]["count"] == 1 and sum(snapshot[name]["counts"]) == 1
+    assert [span[0] for span in spans] == ["inner", "supabase GET /rest/v1/transactions", name, "inner"]
+    outer_seconds, outer_self = spans[2][1], spans[2][2]
+    # The inner span and the reported HTTP call are not counted as the outer function's own time
+    assert outer_self == pytest.approx(outer_seconds - spans[0][1] - 0.01, abs=1e-6)
+    assert tracer.quantile("inner", 0.5) <= tracer.quantile(name, 0.95)
+
+
+def test_collect_sees_spans_from_gathered_queries(tracer):
+    def query(seconds):
+        with tracing.span("query"):
+            time.sleep(seconds)
+        return seconds
+
+    with tracing.collect() as spans:
+        results, errors = database.gather_queries({"a": lambda: query(0.01), "b": lambda: query(0.02)})
+    assert results == {"a": 0.01, "b": 0.02} and errors == {}
+    assert [span[0] for span in spans] == ["query", "query"]
+    assert tracer.snapshot()["query"]["count"] == 2
+
+
+def test_prometheus_export(tracer, tmp_path):
+    tracing.record_span('fetch "x"', 0.003)
+    tracing.record_span('fetch "x"', 2.0, error=True)
+    path = tmp_path / "metrics.prom"
+    tracing.export_prometheus(str(path))
+    text = path.read_text()
+    assert "# TYPE app_span_seconds histogram" in text
+    assert 'app_span_seconds_bucket{span="fetch \\"x\\"",le="0.005"} 1' in text
+    assert 'app_span_seconds_bucket{span="fetch \\"x\\"",le="+Inf"} 2' in text
+    assert 'app_span_seconds_count{span="fetch \\"x\\""} 2' in text
+    assert 'app_span_seconds_errors_total{span="fetch \\"x\\""} 1' in text
+
+
+def test_disabled_tracing_records_nothing(tracer, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", False)
+    traced = tracing.traced("off")(lambda value: value * 2)
+    with tracing.collect() as spans:
+        assert traced(21) == 42
+        with tracing.span("off"):
+            pass
+        tracing.record_span("off", 1.0)
+    assert spans == [] and tracer.snapshot() == {}
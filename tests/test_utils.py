@@ -0,0 +1,28 @@
+import pandas as pd
+
+from utils import Categorizer, CategoryRule, categorize_transaction
+
+
+def test_categorizer_matches_rule_order_on_series():
+    descriptions = pd.Series(["PAYROLL ACME", "Uber to the supermarket", "Movie night",
+                              "Business lunch", None, "rent via bus"], index=list("abcdef"))
+    categories = Categorizer().categorize(descriptions)
+
+    assert categories.index.tolist() == list("abcdef")
+    # Food is listed before Transport, so the supermarket wins over the ride
+    assert categories.tolist() == ["Income", "Food", "Entertainment", "Transport", "Other", "Transport"]
+    assert [categorize_transaction(text)[1] for text in descriptions.fillna("")] == categories.tolist()
+    assert categorize_transaction("Uber to the supermarket") == ("Supermarket", "Food")
+
+
+def test_user_rules_with_priorities():
+    categorizer = Categorizer().with_rules([
+        {"keyword": "Uber Eats", "category": "Food", "priority": 5},
+        CategoryRule("acme", "Work"),
+    ])
+    descriptions = pd.Series(["uber eats order", "UBER trip", "Payroll ACME", "acme supplies"])
+
+    # A higher priority beats a built-in match; at equal priority user rules come first
+    assert categorizer.categorize(descriptions).tolist() == ["Food", "Transport", "Work", "Work"]
+    assert categorizer.match("payroll acme") == ("acme", "Work")
+    assert Categorizer([]).categorize(descriptions).tolist() == ["Other"] * 4
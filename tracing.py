@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import atexit
+import bisect
+import threading
+import functools
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+# Timing spans around the hot paths; when off a span costs one flag check
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+# Optional exports: one JSON line per finished span, and a Prometheus text
+# file with every span's histogram, rewritten at most every N seconds
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH")
+TRACE_PROMETHEUS_PATH = os.getenv("TRACE_PROMETHEUS_PATH")
+TRACE_EXPORT_INTERVAL = float(os.getenv("TRACE_EXPORT_INTERVAL", "15"))
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_active = ContextVar("trace_active", default=())
+_collector = ContextVar("trace_collector", default=None)
+
+class SpanStats:
+    """Per-span latency histograms for the whole process"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, name, seconds, error=False):
+        with self._lock:
+            entry = self._spans.get(name)
+            if entry is None:
+                entry = self._spans[name] = {"counts": [0] * (len(self.buckets) + 1), "count": 0,
+                                             "seconds": 0.0, "max_seconds": 0.0, "errors": 0}
+            entry["counts"][bisect.bisect_left(self.buckets, seconds)] += 1
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["errors"] += int(error)
+
+    def snapshot(self):
+        """``{span: {count, seconds, max_seconds, errors, counts}}``; ``counts`` are per bucket, not cumulative"""
+        with self._lock:
+            return {name: {**entry, "counts": list(entry["counts"])} for name, entry in self._spans.items()}
+
+    def reset(self):
+        with self._lock:
+            self._spans = {}
+
+    def quantile(self, name, q):
+        """Upper bound of the bucket holding the ``q`` quantile of a span's durations"""
+        entry = self.snapshot().get(name)
+        if not entry or not entry["count"]:
+            return None
+        rank, seen = q * entry["count"], 0
+        for bound, count in zip(self.buckets + (entry["max_seconds"],), entry["counts"]):
+            seen += count
+            if seen >= rank:
+                return min(bound, entry["max_seconds"])
+        return entry["max_seconds"]
+
+    def prometheus(self, metric="app_span_seconds"):
+        """The histograms in the Prometheus text exposition format"""
+        lines = [f"# HELP {metric} Time spent in instrumented code paths.",
+                 f"# TYPE {metric} histogram"]
+        errors = [f"# HELP {metric}_errors_total Spans that raised.",
+                  f"# TYPE {metric}_errors_total counter"]
+        for name, entry in sorted(self.snapshot().items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry["counts"]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{span="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{span="{label}",le="+Inf"}} {entry["count"]}')
+            lines.append(f'{metric}_sum{{span="{label}"}} {entry["seconds"]:.6f}')
+            lines.append(f'{metric}_count{{span="{label}"}} {entry["count"]}')
+            errors.append(f'{metric}_errors_total{{span="{label}"}} {entry["errors"]}')
+        return "\n".join(lines + errors) + "\n"
+
+stats = SpanStats()
+_export_lock = threading.Lock()
+_last_export = time.monotonic()
+
+class _Span:
+    __slots__ = ("name", "start", "child_seconds", "token")
+
+    def __init__(self, name):
+        self.name = name
+        self.child_seconds = 0.0
+
+    def __enter__(self):
+        self.token = _active.set(_active.get() + (self,))
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        _active.reset(self.token)
+        # Children running concurrently (e.g. gathered queries) can overlap their parent
+        record_span(self.name, seconds, exc_type is not None, max(seconds - self.child_seconds, 0.0))
+        return False
+
+def span(name):
+    """Context manager timing the block as span ``name``"""
+    if not TRACING_ENABLED:
+        return nullcontext()
+    return _Span(name)
+
+def traced(name=None):
+    """Decorator timing every call as span ``name`` (default ``module.function``)"""
+    def decorate(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACING_ENABLED:
+                return func(*args, **kwargs)
+            with _Span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def record_span(name, seconds, error=False, self_seconds=None):
+    """Record a span timed elsewhere (e.g. by the Supabase client's transport)"""
+    if not TRACING_ENABLED:
+        return
+    parents = _active.get()
+    if parents:
+        parents[-1].child_seconds += seconds
+    stats.record(name, seconds, error)
+    collected = _collector.get()
+    if collected is not None:
+        collected.append((name, seconds, seconds if self_seconds is None else self_seconds, error))
+    if TRACE_LOG_PATH:
+        _log_span(name, seconds, error)
+    if TRACE_PROMETHEUS_PATH:
+        _maybe_export()
+
+@contextmanager
+def collect():
+    """Collect the spans finished in this context (e.g. one Streamlit rerun).
+
+    Yields a list of ``(name, seconds, self_seconds, error)`` tuples that
+    also receives spans from threads started with a copy of the context.
+    """
+    spans = []
+    token = _collector.set(spans)
+    try:
+        yield spans
+    finally:
+        _collector.reset(token)
+
+def start_collecting():
+    """Collect this context's spans from now on into the returned list (no end needed)"""
+    spans = []
+    _collector.set(spans)
+    return spans
+
+def stop_collecting():
+    _collector.set(None)
+
+def _log_span(name, seconds, error):
+    line = json.dumps({"ts": time.time(), "span": name, "seconds": round(seconds, 6), "error": error})
+    try:
+        with _export_lock, open(TRACE_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        print(f"Error writing trace log: {e}")
+
+def _maybe_export():
+    global _last_export
+    now = time.monotonic()
+    if now - _last_export < TRACE_EXPORT_INTERVAL:
+        return
+    _last_export = now
+    export_prometheus()
+
+def export_prometheus(path=None):
+    """Write the histograms to ``path`` (default ``TRACE_PROMETHEUS_PATH``) atomically"""
+    path = path or TRACE_PROMETHEUS_PATH
+    if not path:
+        return
+    try:
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with _export_lock:
+            with open(temporary, "w", encoding="utf-8") as f:
+                f.write(stats.prometheus())
+            os.replace(temporary, path)
+    except OSError as e:
+        print(f"Error exporting trace metrics: {e}")
+
+if TRACING_ENABLED and TRACE_PROMETHEUS_PATH:
+    atexit.register(export_prometheus)
@@ -1,17 +1,93 @@
-def categorize_transaction(description: str) -> tuple[str, str]:
-    description = description.lower()
+import re
+from dataclasses import dataclass
+from itertools import groupby
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+@dataclass(frozen=True)
+class CategoryRule:
+    """Assign ``category`` to descriptions containing ``keyword`` (case-insensitive).
+
+    When several rules match, the highest ``priority`` wins and ties go to the
+    rule listed first.
+    """
+    keyword: str
+    category: str
+    priority: int = 0
 
-    keyword_map = {
+DEFAULT_CATEGORY_RULES = [
+    CategoryRule(keyword, category)
+    for category, keywords in {
         "Income": ["salary", "payroll", "deposit", "bonus"],
         "Food": ["grocery", "supermarket", "food", "restaurant"],
         "Transport": ["uber", "lyft", "transport", "bus", "subway"],
         "Housing": ["rent", "mortgage", "housing"],
         "Entertainment": ["netflix", "spotify", "entertainment", "movie"]
-    }
+    }.items()
+    for keyword in keywords
+]
+
+class Categorizer:
+    """Keyword rules compiled once and applied to whole Series of descriptions.
+
+    Rules are ranked by priority; consecutive rules of the same category are
+    merged into one regex alternation, so ``categorize`` makes one vectorized
+    pass (Arrow's RE2 engine) per category run rather than one substring test
+    per keyword and row.
+    """
 
-    for category, keywords in keyword_map.items():
-        for keyword in keywords:
-            if keyword in description:
-                return keyword.title(), category
+    def __init__(self, rules=DEFAULT_CATEGORY_RULES, default="Other"):
+        rules = [CategoryRule(**rule) if isinstance(rule, dict) else rule for rule in rules]
+        # sorted() is stable, so equal priorities keep their listed order
+        self.rules = sorted(
+            (CategoryRule(rule.keyword.lower(), rule.category, rule.priority) for rule in rules if rule.keyword),
+            key=lambda rule: -rule.priority
+        )
+        self.default = default
+        self._runs = [
+            (category, "|".join(re.escape(rule.keyword) for rule in run))
+            for category, run in groupby(self.rules, key=lambda rule: rule.category)
+        ]
+        self._categories = np.array([category for category, _ in self._runs] + [default], dtype=object)
+        self._rank = {}
+        for rank, rule in enumerate(self.rules):
+            self._rank.setdefault(rule.keyword, rank)
+        # Lookahead so overlapping keywords ("bus" inside "business") are all found
+        self._pattern = re.compile(
+            "(?=(" + "|".join(re.escape(rule.keyword) for rule in self.rules) + "))"
+        ) if self.rules else None
 
-    return "Other", "Other"
\ No newline at end of file
+    def with_rules(self, rules):
+        """A categorizer where ``rules`` (e.g. a user's own) precede these at equal priority"""
+        return Categorizer(list(rules) + self.rules, self.default)
+
+    def categorize(self, descriptions: pd.Series) -> pd.Series:
+        """Category of every description, indexed like ``descriptions``"""
+        lowered = pc.utf8_lower(pa.array(descriptions.fillna("").astype("str")))
+        best = np.full(len(descriptions), len(self._runs))
+        # Walk from the lowest ranked run so higher ranked matches overwrite it
+        for rank in range(len(self._runs) - 1, -1, -1):
+            matched = pc.match_substring_regex(lowered, self._runs[rank][1])
+            best[matched.to_numpy(zero_copy_only=False)] = rank
+        return pd.Series(self._categories[best], index=descriptions.index, dtype=object)
+
+    def match(self, description: str):
+        """``(keyword, category)`` of the winning rule for one description, or None"""
+        if self._pattern is None:
+            return None
+        found = self._pattern.findall(description.lower())
+        if not found:
+            return None
+        rule = self.rules[min(self._rank[keyword] for keyword in found)]
+        return rule.keyword, rule.category
+
+default_categorizer = Categorizer()
+
+def categorize_transaction(description: str) -> tuple[str, str]:
+    matched = default_categorizer.match(description)
+    if matched is None:
+        return "Other", "Other"
+    keyword, category = matched
+    return keyword.title(), category